@@ -0,0 +1,242 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), 'pipeline'))
+
+from data_helper import (
+    TOP_strings, apply_on_unique, resolve_department_attributes, resolve_logistic_freight, apply_routine_logic,
+    extract_finalisasi_dates, calculate_purchasing_status, item_category_merged_vectorized,
+    build_lebaran_calendar, days_excluding_lebaran_vectorized
+)
+from reference_registry import build_reference_registry, lookup_series
+from synthetic_data import generate_po_entry_list, generate_reference_tables, LEBARAN_RANGES
+
+# ---------------------------------------------------------
+# Microbenchmarks of the data_helper hot loops
+# ---------------------------------------------------------
+#Each case times the column path the stage graph runs for one helper on a fixed-size
+#synthetic PO Entry List, checks the result against the stored golden output and the
+#best time against the case's budget. Goldens live in GOLDEN_DIR and are rewritten
+#with --update-golden after an intended rule change.
+
+HELPER_BENCHMARKS = {}
+
+#rows and seed of the generated inputs; the goldens are only valid for these
+HELPER_BENCHMARK_ROWS = 50000
+HELPER_BENCHMARK_SEED = 0
+
+GOLDEN_DIR = os.path.join(current_dir, 'golden', 'helpers')
+
+def helper_benchmark(name, budget):
+    """
+    Registers a function(data) -> (func, args) as the benchmark of a helper; only func(*args) is timed.
+
+    :param budget: Seconds allowed for the best of the timed repeats at HELPER_BENCHMARK_ROWS.
+    """
+    def register(setup):
+        HELPER_BENCHMARKS[name] = {'name': name, 'setup': setup, 'budget': budget}
+        return setup
+    return register
+
+def benchmark_inputs(n_rows=HELPER_BENCHMARK_ROWS, seed=HELPER_BENCHMARK_SEED):
+    """Generated PO Entry List (dates parsed like the pipeline does), its reference tables, registry and Lebaran calendar."""
+    df = generate_po_entry_list(n_rows, seed)
+    for col in [c for c in df.columns if 'Date' in c]:
+        df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
+    refs = generate_reference_tables(df, seed)
+
+    lebaran_dates = set()
+    for _, start, end in LEBARAN_RANGES:
+        lebaran_dates.update(pd.date_range(start, end).date)
+    return {
+        'df': df,
+        'refs': refs,
+        'registry': build_reference_registry(refs),
+        'lebaran_calendar': build_lebaran_calendar(lebaran_dates),
+    }
+
+@helper_benchmark('days_excluding_lebaran', budget=0.12)
+def _days_excluding_lebaran(data):
+    df = data['df']
+    return days_excluding_lebaran_vectorized, (df['Requisition Approved Date'], df['PO Approval Date'], data['lebaran_calendar'])
+
+@helper_benchmark('LOC_strings', budget=0.1)
+def _loc_strings(data):
+    # No cache path: every distinct Department goes through LOC_strings / project_string / divisi_string
+    return resolve_department_attributes, (data['df']['Department'],)
+
+@helper_benchmark('TOP_strings', budget=0.04)
+def _top_strings(data):
+    return apply_on_unique, (data['df']['Term of Payment'], TOP_strings)
+
+@helper_benchmark('determine_freight', budget=0.08)
+def _determine_freight(data):
+    df, registry = data['df'], data['registry']
+    maps = [lookup_series(registry[name], 'Freight Type') for name in ['freight', 'rara', 'ryi', 'way', 'sln']]
+    return resolve_logistic_freight, (df['Item Category'], df['Supplier'], df['PO Number'], *maps)
+
+@helper_benchmark('apply_routine_logic', budget=0.2)
+def _apply_routine_logic(data):
+    df = data['df']
+    lower = lambda col: df[col].str.lower().fillna('')
+    strip_lower = lambda col: df[col].str.strip().str.lower().fillna('')
+    category_l = pd.Series(item_category_merged_vectorized(df['Item Category'], df.get('Unit')), index=df.index).str.lower().fillna('')
+    return apply_routine_logic, (
+        df['Routine'], category_l, lower('Item Name'), strip_lower('Procurement Name'),
+        strip_lower('Requisition Type'), strip_lower('Supplier')
+    )
+
+@helper_benchmark('extract_finalisasi_date', budget=0.03)
+def _extract_finalisasi_date(data):
+    return extract_finalisasi_dates, (data['df']['Req Progress Status'],)
+
+@helper_benchmark('calculate_purchasing_status', budget=0.03)
+def _calculate_purchasing_status(data):
+    df = data['df']
+    duration = pd.Series(
+        days_excluding_lebaran_vectorized(df['Requisition Approved Date'], df['PO Approval Date'], data['lebaran_calendar']),
+        index=df.index
+    )
+    return calculate_purchasing_status, (df['Procurement Name'], duration)
+
+def output_frame(result):
+    """
+    Helper result as a DataFrame of comparable columns: numbers and flags as float64,
+    everything else as text with None for missing values.
+    """
+    if isinstance(result, pd.DataFrame):
+        columns = {col: result[col] for col in result.columns}
+    elif isinstance(result, tuple):
+        columns = {f"out_{i}": value for i, value in enumerate(result)}
+    else:
+        columns = {'out': result}
+
+    frame = {}
+    for col, values in columns.items():
+        values = pd.Series(values).reset_index(drop=True)
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            frame[col] = values.astype('float64')
+        else:
+            values = values.astype(object)
+            frame[col] = values.where(values.isna(), values.map(str)).where(values.notna(), None).astype(object)
+    return pd.DataFrame(frame)
+
+def input_fingerprint(data):
+    """Hash of the generated PO Entry List, so goldens are never compared against different inputs."""
+    hashes = pd.util.hash_pandas_object(data['df'].astype(str), index=False).to_numpy()
+    return format(int(np.bitwise_xor.reduce(hashes * np.arange(1, len(hashes) + 1, dtype=np.uint64))), 'x')
+
+def compare_with_golden(name, frame, golden_dir=None):
+    """
+    Mismatching row count per output column against the stored golden of the case.
+
+    :return: dict {column: mismatching rows}, or None when no golden is stored.
+    """
+    path = os.path.join(golden_dir or GOLDEN_DIR, f"{name}.parquet")
+    if not os.path.exists(path):
+        return None
+    golden = output_frame(pd.read_parquet(path, engine='pyarrow'))
+    if list(golden.columns) != list(frame.columns) or len(golden) != len(frame):
+        return {'shape': max(len(golden), len(frame))}
+
+    mismatches = {}
+    for col in frame.columns:
+        a, b = frame[col].to_numpy(dtype=object), golden[col].to_numpy(dtype=object)
+        same = (a == b) | (pd.isna(a) & pd.isna(b))
+        mismatches[col] = int((~same).sum())
+    return mismatches
+
+def load_budgets(path):
+    """Budget overrides {case name: seconds} from a JSON file."""
+    with open(path) as f:
+        return {name: float(seconds) for name, seconds in json.load(f).items()}
+
+def run_helper_benchmarks(names=None, repeats=5, budgets=None, budget_scale=1.0, update_golden=False, golden_dir=None):
+    """
+    Runs the registered helper benchmarks: one checked run against the golden output,
+    then `repeats` timed runs whose best time is held against the budget.
+
+    :param names: Case names to run, all of HELPER_BENCHMARKS when None.
+    :param budgets: Dict of per-case budget overrides in seconds (see load_budgets).
+    :param budget_scale: Multiplier on every budget, for slower or shared machines.
+    :param update_golden: Rewrite the golden outputs and manifest instead of comparing.
+    :return: list of dicts with name, best_seconds, budget, golden (mismatch dict / None) and passed.
+    """
+    golden_dir = golden_dir or GOLDEN_DIR
+    budgets = budgets or {}
+    cases = [HELPER_BENCHMARKS[name] for name in (names or list(HELPER_BENCHMARKS))]
+
+    print(f"Generating helper benchmark inputs ({HELPER_BENCHMARK_ROWS} rows, seed {HELPER_BENCHMARK_SEED})...")
+    data = benchmark_inputs()
+    fingerprint = input_fingerprint(data)
+
+    manifest_path = os.path.join(golden_dir, 'manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    if not update_golden and manifest.get('fingerprint') not in (None, fingerprint):
+        print("Warning: benchmark inputs differ from the ones the goldens were written for; rerun with --update-golden after checking the generator change")
+
+    results = []
+    for case in cases:
+        func, args = case['setup'](data)
+        frame = output_frame(func(*args))
+
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            func(*args)
+            timings.append(time.perf_counter() - started)
+
+        if update_golden:
+            if not os.path.exists(golden_dir):
+                os.makedirs(golden_dir)
+            frame.to_parquet(os.path.join(golden_dir, f"{case['name']}.parquet"), index=False, engine='pyarrow')
+            golden = {}
+        else:
+            golden = compare_with_golden(case['name'], frame, golden_dir) if manifest.get('fingerprint') == fingerprint else None
+
+        budget = budgets.get(case['name'], case['budget']) * budget_scale
+        best = min(timings)
+        matches = golden is not None and not any(golden.values())
+        results.append({'name': case['name'], 'best_seconds': best, 'budget': budget, 'golden': golden, 'passed': matches and best <= budget})
+
+        if golden is None:
+            status = 'NO GOLDEN'
+        elif not matches:
+            status = 'MISMATCH ' + ', '.join(f"{col}: {count}" for col, count in golden.items() if count)
+        else:
+            status = 'ok' if best <= budget else 'OVER BUDGET'
+        print(f"   {case['name']:<28} {best * 1000:>9.1f} ms / budget {budget * 1000:>7.1f} ms  {status}")
+
+    if update_golden:
+        with open(manifest_path, 'w') as f:
+            json.dump({'rows': HELPER_BENCHMARK_ROWS, 'seed': HELPER_BENCHMARK_SEED, 'fingerprint': fingerprint}, f, indent=2)
+        print(f"Golden outputs written to {os.path.abspath(golden_dir)}")
+
+    failed = [result['name'] for result in results if not result['passed']]
+    if failed and not update_golden:
+        print(f"Helper benchmarks failed: {', '.join(failed)}")
+    return results
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="data_helper microbenchmarks with golden outputs and time budgets")
+    parser.add_argument('--only', default=None, help='Comma separated case names')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--budgets', default=None, help='JSON file of {case name: seconds} budget overrides')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiplier on every budget')
+    parser.add_argument('--update-golden', action='store_true', help='Rewrite the golden outputs from the current helpers')
+    args = parser.parse_args()
+
+    results = run_helper_benchmarks(
+        args.only.split(',') if args.only else None, args.repeats,
+        load_budgets(args.budgets) if args.budgets else None, args.budget_scale, args.update_golden
+    )
+    sys.exit(0 if args.update_golden or all(result['passed'] for result in results) else 1)
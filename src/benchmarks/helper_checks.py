@@ -0,0 +1,191 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import re
+import datetime
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), 'pipeline'))
+
+import data_helper
+
+# ---------------------------------------------------------
+# Pinned-input checks of the data_helper column helpers
+# ---------------------------------------------------------
+#Each check feeds a small fixed input to a column helper and to its per-row reference,
+#compares both against the expected values written out below and calls the helper's
+#verify_* function. A check returns its failure messages; any failure exits non-zero.
+
+HELPER_CHECKS = {}
+
+def helper_check(name):
+    """Registers a function() -> list of failure messages as the check of a helper."""
+    def register(check):
+        HELPER_CHECKS[name] = {'name': name, 'check': check}
+        return check
+    return register
+
+def compare_values(label, actual, expected):
+    """
+    Failure messages for the positions where actual differs from expected;
+    missing values (None / NaN / NaT) are equal to each other.
+    """
+    actual, expected = list(actual), list(expected)
+    if len(actual) != len(expected):
+        return [f"{label}: {len(actual)} values, expected {len(expected)}"]
+    failures = []
+    for i, (a, e) in enumerate(zip(actual, expected)):
+        if pd.isna(a) and pd.isna(e):
+            continue
+        if pd.isna(a) or pd.isna(e) or a != e:
+            failures.append(f"{label}[{i}]: {a!r}, expected {e!r}")
+    return failures
+
+#Req Progress Status texts; the stored pattern escapes its backslashes, so only a text that
+#contains the pattern's literal tail matches and no real status yields a date (kept as is)
+FINALISASI_STATUSES = [
+    'Finalisasi 05/03/2024',
+    'PO Finalisasi 5 Mar 2024, menunggu approval',
+    'finalisasi: 12 03 2024',
+    'Menunggu vendor',
+    None,
+    'Finalisasi 05/03/2024',
+    'FINALISASI\\s\\d/03/\\dddd',
+    '',
+]
+FINALISASI_EXPECTED_MATCHES = [np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, '\\d/03/\\dddd', np.nan]
+FINALISASI_EXPECTED_DATES = [None] * len(FINALISASI_STATUSES)
+
+#matched date strings and the date each one parses to, formats first, then the dayfirst fallback
+FINALISASI_DATE_STRINGS = {
+    '05/03/2024': datetime.date(2024, 3, 5),
+    '5 03 2024': datetime.date(2024, 3, 5),
+    '05/Mar/2024': datetime.date(2024, 3, 5),
+    '5 mar 2024': datetime.date(2024, 3, 5),
+    'March 5, 2024': datetime.date(2024, 3, 5),
+    '2024-03-05': datetime.date(2024, 5, 3),
+    '31/02/2024': None,
+    '13/25/2024': None,
+    '\\d/03/\\dddd': None,
+}
+
+@helper_check('extract_finalisasi_date')
+def _check_finalisasi():
+    statuses = pd.Series(FINALISASI_STATUSES, dtype=object)
+    matched = statuses.astype(str).str.extract(data_helper.FINALISASI_DATE_PATTERN, flags=re.IGNORECASE, expand=False)
+    failures = compare_values('pattern match', matched.where(statuses.notna()), FINALISASI_EXPECTED_MATCHES)
+    failures += compare_values('extract_finalisasi_date', statuses.apply(data_helper.extract_finalisasi_date), FINALISASI_EXPECTED_DATES)
+    failures += compare_values('extract_finalisasi_dates', data_helper.extract_finalisasi_dates(statuses), FINALISASI_EXPECTED_DATES)
+    failures += compare_values(
+        '_parse_finalisasi_date_string',
+        [data_helper._parse_finalisasi_date_string(s) for s in FINALISASI_DATE_STRINGS],
+        list(FINALISASI_DATE_STRINGS.values())
+    )
+    mismatches = data_helper.verify_finalisasi_extraction(statuses)
+    if mismatches:
+        failures.append(f"verify_finalisasi_extraction: {mismatches} rows differ")
+    return failures
+
+#step 1 columns plus LOC and LEAD TIME, covering every category branch, a missing row,
+#Consignment rows and the HO / Sulawesi / Halmahera urgent thresholds
+VECTORIZED_HELPER_ROWS = pd.DataFrame({
+    'Item Category': ['Spare Part XCMG', 'sparepart sany ', ' zs filter', 'Tire DT', 'TIRE DT 12R', 'APD', 'APD', 'ATK', 'Jasa Logistik ', 'Filter', None, 'Solar', 'Spare Part XCMG'],
+    'Unit': ['PCS', 'PCS', 'PCS', 'SET', 'pcs', None, 'PSG', 'PCS', 'LOT', 'set', 'PCS', np.nan, 'PCS'],
+    'Requisition Type': ['Normal', 'Consignment', 'Normal', 'Normal', ' Consignment', 'Normal', 'Normal', 'Normal', 'Normal', 'Consignment', None, 'Normal', 'Consignment'],
+    'Item Name': ['Filter oli', 'Sepatu safety', 'Bolt', 'Ban GT', 'Ban', 'SEPATU boots', 'Helm safety', 'Pulpen', 'Kirim', 'Filter', None, 'Solar', 'Bolt'],
+    'Background Needs': ['Pengambilan stok', 'BA pemakaian', 'berita acara', 'Consignment stock', '-', None, 'Pengambilan', 'BA', 'x', 'Berita acara pengeluaran', None, 'BA', 'BA'],
+    'LOC': ['HO', 'LC KNW', 'HO LWK', 'HO OBI', 'Unknown', None, 'HO KDI', 'LC', 'HO', 'HO FLUK', 'PALU', 'HO OBI', 'HO'],
+    'LEAD TIME': [15, 10, 36, 44, 5, 3, 37, 15.0, 16, 43, np.nan, 43, 1],
+})
+VECTORIZED_HELPER_EXPECTED = {
+    'CATEGORYMERGED': ['Spare Part XCMG', 'Spare Part SANY', 'Spare Part ZS', 'Tire DT - Set', 'Tire DT - non Set', 'APD', 'APD', 'ATK', 'Jasa Logistik ', 'Filter', None, 'Solar', 'Spare Part XCMG'],
+    'CATEGORYVALUE': [0, 1, 0, 0, 1, 1, 0, 1, 1, 1, 0, 0, 1],
+    'CATEGORYVALUEXCMG': [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+    'URGENT_NORMAL': ['Urgent', 'Normal', 'Urgent', 'Normal', 'Normal', 'Normal', 'Normal', 'Urgent', 'Normal', 'Normal', 'Normal', 'Urgent', 'Normal'],
+}
+
+@helper_check('vectorized_helpers')
+def _check_vectorized_helpers():
+    df = VECTORIZED_HELPER_ROWS
+    expected = VECTORIZED_HELPER_EXPECTED
+    outputs = {
+        'CATEGORYMERGED': (
+            df.apply(lambda x: data_helper.item_category_merged(x['Item Category'], x['Unit']), axis=1),
+            data_helper.item_category_merged_vectorized(df['Item Category'], df['Unit']),
+        ),
+        'CATEGORYVALUE': (
+            df.apply(data_helper.category_value_marker, axis=1),
+            data_helper.category_value_marker_vectorized(df['Item Category'], df['Requisition Type'], df['Item Name']),
+        ),
+        'CATEGORYVALUEXCMG': (
+            df.apply(data_helper.category_value_xcmg, axis=1),
+            data_helper.category_value_xcmg_vectorized(df['Requisition Type'], df['Item Category'], df['Background Needs']),
+        ),
+        'URGENT_NORMAL': (
+            df.apply(data_helper.urgent_normal_function, axis=1),
+            data_helper.urgent_normal_vectorized(df['Requisition Type'], df['LOC'], df['LEAD TIME']),
+        ),
+    }
+    failures = []
+    for col, (reference, vectorized) in outputs.items():
+        failures += compare_values(f"{col} per row", reference, expected[col])
+        failures += compare_values(f"{col} vectorized", vectorized, expected[col])
+    mismatches = {col: count for col, count in data_helper.verify_vectorized_helpers(df).items() if count}
+    if mismatches:
+        failures.append(f"verify_vectorized_helpers: {mismatches}")
+    return failures
+
+#Item ID / PO Number keys: IDs read as float, as text and padded, missing IDs, a key absent
+#from the reference and duplicated reference keys (the first row wins)
+COMPOSITE_KEY_LEFT = [
+    pd.Series([123.0, '123', ' 123 ', np.nan, 456.0, '789', '123', np.nan], dtype=object),
+    pd.Series(['PO1', 'PO1', 'PO1', 'PO1', 'PO2', 'PO2', 'PO9', 'PO2'], dtype=object),
+]
+COMPOSITE_KEY_RIGHT = [
+    pd.Series(['123', np.nan, '456', '456.0', '123'], dtype=object),
+    pd.Series(['PO1', 'PO1', 'PO2', 'PO2', 'PO1'], dtype=object),
+]
+COMPOSITE_KEY_EXPECTED_IDS = ['123', '123', '123', None, '456', '789', '123', None]
+#reference row matched by each left row; the last one differs: with missing='key' a missing
+#part makes the whole key missing and missing keys match each other
+COMPOSITE_KEY_EXPECTED_POSITIONS = {
+    'key': [0, 0, 0, 1, 2, -1, -1, 1],
+    'part': [0, 0, 0, 1, 2, -1, -1, -1],
+}
+
+@helper_check('composite_keys')
+def _check_composite_keys():
+    failures = compare_values('clean_id_text', data_helper.clean_id_text(COMPOSITE_KEY_LEFT[0]), COMPOSITE_KEY_EXPECTED_IDS)
+    for missing, expected in COMPOSITE_KEY_EXPECTED_POSITIONS.items():
+        left_keys, right_keys = data_helper.composite_key_codes(
+            COMPOSITE_KEY_LEFT, COMPOSITE_KEY_RIGHT, clean=data_helper.clean_id_text, missing=missing
+        )
+        failures += compare_values(f"first_match_positions missing={missing}", data_helper.first_match_positions(left_keys, right_keys), expected)
+        if not data_helper.verify_composite_keys(COMPOSITE_KEY_LEFT, COMPOSITE_KEY_RIGHT, clean=data_helper.clean_id_text, missing=missing):
+            failures.append(f"verify_composite_keys missing={missing}: packed keys differ from the string keys")
+    return failures
+
+def run_helper_checks(names=None):
+    """
+    Runs the registered helper checks and prints each one's failures.
+
+    :param names: Check names to run, all of HELPER_CHECKS when None.
+    :return: dict {name: list of failure messages}.
+    """
+    results = {}
+    for name in (names or list(HELPER_CHECKS)):
+        failures = HELPER_CHECKS[name]['check']()
+        results[name] = failures
+        print(f"   {'ok' if not failures else 'FAILED':<6} {name}")
+        for failure in failures:
+            print(f"          {failure}")
+    return results
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="data_helper column helpers against pinned inputs and expected outputs")
+    parser.add_argument('--only', default=None, help='Comma separated check names')
+    args = parser.parse_args()
+    results = run_helper_checks(args.only.split(',') if args.only else None)
+    sys.exit(0 if not any(results.values()) else 1)
@@ -0,0 +1,152 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import datetime
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(os.path.join(os.path.dirname(current_dir), 'pipeline'))
+
+import data_loader
+import data_export
+import processing_steps
+import reference_registry
+import validation_rules
+from synthetic_data import write_synthetic_dataset
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+DEFAULT_RESULTS_PATH = os.path.join(project_root, 'export', 'benchmarks', 'pipeline_benchmark.json')
+
+def peak_rss_mb():
+    """Peak resident memory of the current process so far (ru_maxrss is in KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _timed(phases, memory, name, func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    phases[name] = time.perf_counter() - started
+    memory[name] = peak_rss_mb()
+    print(f"[benchmark] {name}: {phases[name]:.2f}s (peak RSS {memory[name]:.0f} MB)")
+    return result
+
+def benchmark_size(n_rows, workdir, seed=0, export=True):
+    """
+    One benchmark run in the current process: generate the dataset, then time
+    load_all_data, the reference registry, run_all_processing (per stage),
+    validate_processed_data and export_data against it, the way orchestrator.py runs them.
+
+    :return: dict with rows, export success, phase seconds, stage seconds, peak RSS (MB) after each phase and output shape.
+    """
+    root = os.path.join(workdir, f"rows_{n_rows}")
+    phases, memory = {}, {}
+    _timed(phases, memory, 'generate', write_synthetic_dataset, root, n_rows, seed)
+
+    # Same path patching as orchestrator.py, pointed at the generated tree
+    data_loader.raw_dir = os.path.join(root, 'data', 'po_entry')
+    data_loader.reference_dir = os.path.join(root, 'data', 'reference')
+    data_export.export_dir = os.path.join(root, 'export')
+    validation_rules.export_dir = data_export.export_dir
+    reference_registry.registry_dir = os.path.join(root, 'data', 'reference', 'registry')
+
+    loaded_data = _timed(phases, memory, 'load_all_data', data_loader.load_all_data)
+    refs = {name: loaded_data[name] for name in processing_steps.REFERENCE_TABLES}
+    refs['lebaran_dates_df'] = loaded_data.get('lebaran_dates_df')
+    registry = _timed(phases, memory, 'reference_registry', reference_registry.load_reference_registry, refs)
+
+    stage_timings = {}
+    df = _timed(
+        phases, memory, 'run_all_processing', processing_steps.run_all_processing,
+        loaded_data['df'], *[refs[name] for name in processing_steps.REFERENCE_TABLES],
+        lebaran_dates_df=refs['lebaran_dates_df'], department_cache_path=os.path.join(root, 'department_attributes.parquet'),
+        validate=False, registry=registry, stage_timings=stage_timings
+    )
+    _timed(phases, memory, 'validate_processed_data', processing_steps.validate_processed_data, df)
+    exported = None
+    if export:
+        exported = _timed(phases, memory, 'export_data', data_export.export_data, df)
+
+    return {
+        'rows': n_rows,
+        'exported': exported is not None,
+        'phases': phases,
+        'stages': stage_timings,
+        'peak_rss_mb': memory,
+        'output_shape': list(df.shape),
+    }
+
+def run_benchmarks(sizes=None, results_path=None, seed=0, export=True, workdir=None):
+    """
+    Runs benchmark_size for every size in a fresh process (so peak memory is per size)
+    and appends one record with the commit, environment and all runs to the JSON results file.
+
+    :param sizes: Row counts, defaults to DEFAULT_SIZES.
+    :param results_path: JSON file holding a list of records, defaults to DEFAULT_RESULTS_PATH.
+    :param export: Include export_data (Excel writing dominates the largest size).
+    :param workdir: Directory for the generated data, a temporary directory removed afterwards when None.
+    :return: The appended record.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    results_path = results_path or DEFAULT_RESULTS_PATH
+    cleanup = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix='pipeline_benchmark_')
+
+    record = {
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'runs': [],
+    }
+    try:
+        for n_rows in sizes:
+            print(f"[benchmark] {n_rows} rows...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                record['runs'].append(pool.submit(benchmark_size, n_rows, workdir, seed, export).result())
+    finally:
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = []
+    if os.path.exists(results_path):
+        with open(results_path) as f:
+            results = json.load(f)
+    results.append(record)
+    os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+    with open(results_path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"[benchmark] results appended to {os.path.abspath(results_path)}")
+    for run in record['runs']:
+        total = sum(seconds for name, seconds in run['phases'].items() if name != 'generate')
+        print(f"   {run['rows']:>9} rows: {total:.2f}s, peak RSS {max(run['peak_rss_mb'].values()):.0f} MB")
+    return record
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark on synthetic PO Entry Lists")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='Comma separated row counts')
+    parser.add_argument('--output', default=DEFAULT_RESULTS_PATH, help='JSON results file, one record is appended per run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-export', action='store_true', help='Do not time export_data (Excel writing)')
+    parser.add_argument('--workdir', default=None, help='Keep the generated data in this directory')
+    args = parser.parse_args()
+    run_benchmarks([int(size) for size in args.sizes.split(',')], args.output, args.seed, not args.skip_export, args.workdir)
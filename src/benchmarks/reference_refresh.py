@@ -0,0 +1,126 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), 'pipeline'))
+
+import data_loader
+from synthetic_data import generate_po_entry_list, generate_reference_tables
+
+# ---------------------------------------------------------
+# Reference refresh against a local Google Sheets stand-in
+# ---------------------------------------------------------
+#A local HTTP server answers the CSV export requests of REFERENCE_SHEETS with synthetic
+#reference tables after a fixed delay, so the concurrent download, the unchanged-payload
+#skip, the timeout fallback and the speedup over sequential downloads run offline.
+
+def start_sheet_server(payloads, delay=0.0, stalled=()):
+    """
+    Serves payloads {url path: CSV bytes} on 127.0.0.1. Every response waits `delay`
+    seconds; paths in `stalled` wait 10x longer, to trip the download timeout.
+
+    :return: (server, base URL); call server.shutdown() when done.
+    """
+    class SheetHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay * 10 if self.path in stalled else delay)
+            body = payloads.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/csv')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SheetHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def _refresh(refresh_stats):
+    return data_loader.load_all_data(refresh_cache=True, include_po_entry=False, refresh_stats=refresh_stats)
+
+def run_reference_refresh_check(delay=0.2, seed=0):
+    """
+    Runs load_all_data(refresh_cache=True) against the local stand-in and checks that
+    a cold refresh writes every table, a repeated one rewrites none, a changed table is
+    the only one rewritten and a stalled request falls back to its cache after the timeout.
+    Also times the refresh with one download worker for comparison.
+
+    :return: dict with the checks {name: passed} and the sequential / concurrent seconds.
+    """
+    tables = generate_reference_tables(generate_po_entry_list(2000, seed), seed)
+    payloads = {f"/{key}.csv": tables[key].to_csv(index=False).encode() for key in data_loader.REFERENCE_SHEETS}
+    server, base_url = start_sheet_server(payloads, delay)
+
+    workdir = tempfile.mkdtemp(prefix='reference_refresh_')
+    saved = (data_loader.REFERENCE_SHEETS, data_loader.reference_dir, data_loader.REFERENCE_DOWNLOAD_WORKERS, data_loader.REFERENCE_DOWNLOAD_TIMEOUT)
+    data_loader.REFERENCE_SHEETS = {key: (pq_name, f"{base_url}/{key}.csv") for key, (pq_name, _) in saved[0].items()}
+    data_loader.reference_dir = workdir
+    n_tables = len(data_loader.REFERENCE_SHEETS)
+    mtimes = lambda: {name: os.path.getmtime(os.path.join(workdir, name)) for name, _ in data_loader.REFERENCE_SHEETS.values()}
+
+    checks = {}
+    try:
+        cold = {}
+        data = _refresh(cold)
+        checks['cold refresh writes every table'] = len(cold['changed']) == n_tables and all(
+            data[key].shape == tables[key].shape for key in data_loader.REFERENCE_SHEETS
+        )
+
+        before = mtimes()
+        warm = {}
+        _refresh(warm)
+        checks['unchanged payloads are not rewritten'] = len(warm['unchanged']) == n_tables and mtimes() == before
+
+        payloads['/wilayah_df.csv'] = tables['wilayah_df'].iloc[:-1].to_csv(index=False).encode()
+        changed = {}
+        data = _refresh(changed)
+        checks['only the changed table is rewritten'] = changed['changed'] == ['wilayah_df'] and len(data['wilayah_df']) == len(tables['wilayah_df']) - 1
+
+        sequential = {}
+        data_loader.REFERENCE_DOWNLOAD_WORKERS = 1
+        _refresh(sequential)
+        data_loader.REFERENCE_DOWNLOAD_WORKERS = saved[2]
+        concurrent = {}
+        _refresh(concurrent)
+
+        server.shutdown()
+        server, base_url = start_sheet_server(payloads, delay, stalled={'/pulau_df.csv'})
+        data_loader.REFERENCE_SHEETS = {key: (pq_name, f"{base_url}/{key}.csv") for key, (pq_name, _) in saved[0].items()}
+        data_loader.REFERENCE_DOWNLOAD_TIMEOUT = delay * 5
+        stalled = {}
+        data = _refresh(stalled)
+        checks['timed out request falls back to its cache'] = stalled['failed'] == ['pulau_df'] and len(data['pulau_df']) == len(tables['pulau_df'])
+    finally:
+        server.shutdown()
+        data_loader.REFERENCE_SHEETS, data_loader.reference_dir, data_loader.REFERENCE_DOWNLOAD_WORKERS, data_loader.REFERENCE_DOWNLOAD_TIMEOUT = saved
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\nReference refresh against the local stand-in ({n_tables} tables, {delay:.2f}s per request):")
+    for name, passed in checks.items():
+        print(f"   {'ok' if passed else 'FAILED':<6} {name}")
+    print(f"   sequential {sequential['seconds']:.2f}s vs {data_loader.REFERENCE_DOWNLOAD_WORKERS} workers {concurrent['seconds']:.2f}s")
+    return {'checks': checks, 'sequential_seconds': sequential['seconds'], 'concurrent_seconds': concurrent['seconds']}
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Check the concurrent reference refresh against a local HTTP stand-in")
+    parser.add_argument('--delay', type=float, default=0.2, help='Seconds the stand-in waits before every response')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    result = run_reference_refresh_check(args.delay, args.seed)
+    sys.exit(0 if all(result['checks'].values()) else 1)
@@ -0,0 +1,293 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), 'pipeline'))
+
+import data_loader
+
+# ---------------------------------------------------------
+# Synthetic PO Entry List with the real export schema
+# ---------------------------------------------------------
+#Values follow the formats the pipeline parses (Department codes, supplier prefixes,
+#Term of Payment wording, Req Progress Status finalisasi notes, PO Number groups) with
+#cardinalities close to a yearly CPS export. Everything is seeded, so a size and seed
+#always produce the same frames.
+
+#company / division / site pieces combined into Department codes like 'MMP-ENG_LAR' or 'XIMS 52-HRGA__HO'
+COMPANIES = ['IMS', 'IMS 52', 'IMS 147', 'MMP', 'MPS', 'ABC', 'KTS', 'POM', 'BARU', 'MUNA', 'LWI', 'OBI', 'FLUK', 'KNW']
+DIVISIONS = ['ENG', 'PROD', 'HRGA', 'HSE', 'FIN', 'SC', 'LOG', 'IT', 'GA', 'OPS', 'PLANT', 'GEO', 'SURVEY', 'LAB']
+SITES = ['LAR', 'LWK', 'PALU', 'KDI', 'MUNA', 'WATU', 'LAEYA', 'OBI', 'FLUK', 'BARU', 'LWI', 'POM', 'KNW', 'SOL', 'HO']
+
+#Item Category values: routine rule categories, LC special categories and not-counted categories
+ITEM_CATEGORIES = [
+    'Kontrak', 'Seragam', 'Jasa Logistik', 'Jasa/Service', 'ATK', 'Cetak', 'Makanan dan Minuman', 'Seragam Security',
+    'x Kebutuhan Kantin', 'x Kebutuhan Mess', 'x Medical dan Obat', 'APD', 'Solar', 'Spare Part XCMG', 'SANY part',
+    'ZS Part', 'Tire DT', 'Tire Innova', 'Tire Manhaul', 'Tire TL', 'Tire VB', 'Elektrikal', 'Packaging',
+    'Aksesoris Kendaraan', 'Alat Hiburan', 'Karoseri FT', 'Karoseri LT', 'Oli dan Grease', 'Peralatan Dapur',
+    'Peralatan Shipping', 'Peralatan Survey', 'Lab Peralatan', 'Telepon', 'Perangkat IT', 'Mesin Bor dan Part',
+    'Alat Teknik', 'Container dan Part', 'Radio HT, RIG', 'Consumable Workshop', 'Alat dan Bahan Bangunan',
+    'Bolt dan Nut', 'Consumable Cleaning', 'Perabotan', 'Peralatan Geologi', 'Spare Part Umum', 'Filter',
+    'Battery', 'Hydraulic Hose', 'Bearing', 'Welding', 'Cat dan Thinner', 'Pipa dan Fitting', 'Pompa',
+    'Genset Part', 'Kendaraan Ringan Part', 'Alat Ukur', 'Chemical', 'Obat Pertanian', 'Bibit', 'Pupuk',
+]
+#relative frequency of the categories above, consumables dominate the export
+CATEGORY_WEIGHTS = np.where(np.isin(ITEM_CATEGORIES, ['Spare Part Umum', 'Filter', 'Consumable Workshop', 'Solar', 'Jasa Logistik', 'APD', 'ATK']), 6.0, 1.0)
+
+ITEM_WORDS = ['Filter oli', 'Lampu rotary 12V', 'Terpal', 'Helm safety', 'Sepatu safety', 'Ban GT', 'Delium', 'Shuttlecock',
+              'Oreas std', 'Flagging tape', 'Bolt M12', 'Kabel NYY', 'Hose hydraulic', 'Bearing 6205', 'Kertas A4',
+              'Rompi', 'Masker medis', 'Plastik klip', 'Grease', 'Oli mesin', 'Baterai', 'Kawat las', 'Cat besi',
+              'Pipa PVC', 'Pompa air', 'Solar HSD', 'Jasa pengiriman', 'Jasa perbaikan', 'Seal kit', 'V-belt']
+SUPPLIER_WORDS = ['Maju', 'Jaya', 'Sentosa', 'Abadi', 'Makmur', 'Sejahtera', 'Mandiri', 'Teknik', 'Sarana', 'Prima',
+                  'Karya', 'Utama', 'Nusantara', 'Sulawesi', 'Bersama', 'Cipta', 'Mitra', 'Perkasa', 'Logistik', 'Indah']
+#logistics vendors with their own PO-to-freight sheets, plus suppliers with a direct freight mapping
+FREIGHT_VENDORS = ['PT RARA LOGISTIK', 'CV RYI EXPRESS', 'PT WAY CARGO', 'PT SYAMSUDDIN LOGISTIK NUSANTARA']
+DIRECT_FREIGHT_SUPPLIERS = ['PT Samudera Cargo', 'PT Udara Express', 'CV Darat Jaya']
+
+TERMS_OF_PAYMENT = ['DP 30%', 'Cash', '30 hari setelah invoice diterima', 'Tempo 14 hari', 'Transfer sebelum pengiriman',
+                    'Pembayaran tahap 1', '100% di muka', 'Kontrak', 'Net 0', 'COD', 'Pembayaran setelah pengiriman', None]
+PROCUREMENT_NAMES = ['Syifa Alifia', 'Rizal Agus Fianto', 'Linda Permata Sari', 'Puji Astuti', 'Laurensius Adi',
+                     'Stheven Immanuel', 'Joko', 'Rona / Joko', 'Olvan', 'Dewi', 'Andi', None]
+SUPPLIER_LOCATIONS = ['Jakarta', 'jakarta ', 'Makassar', 'MAKASSAR', 'Kendari', 'Surabaya', 'Balikpapan', 'Ternate',
+                      'Palu', 'Manado', 'Bitung', 'Morowali', 'Kolaka', 'Luwuk', 'Medan', 'Bandung', 'Semarang', None]
+WILAYAH = {'jakarta': 'Jakarta', 'makassar': 'Makassar', 'kendari': 'Kendari', 'surabaya': 'Surabaya',
+           'balikpapan': 'Balikpapan', 'ternate': 'Ternate', 'palu': 'Palu', 'manado': 'Manado', 'bitung': 'Manado',
+           'morowali': 'Kendari', 'kolaka': 'Kendari', 'luwuk': 'Palu', 'medan': 'Medan', 'bandung': 'Jakarta'}
+PULAU = {'jakarta': 'Jawa', 'surabaya': 'Jawa', 'medan': 'Sumatera', 'balikpapan': 'Kalimantan', 'ternate': 'Maluku',
+         'makassar': 'Sulawesi', 'kendari': 'Sulawesi', 'palu': 'Sulawesi', 'manado': 'Sulawesi'}
+RECEIVE_LOCATIONS = ['Jakarta Warehouse', 'Makassar Warehouse', 'Site OPM', 'Site IMS 52', 'Site KTS', 'Site LAR',
+                     'Site OBI', 'Site KDI', 'Site WATU', None]
+LEBARAN_RANGES = [(2024, '2024-04-05', '2024-04-16'), (2025, '2025-03-28', '2025-04-13'), (2026, '2026-03-18', '2026-03-31')]
+HOLIDAYS = ['01/01', '17/08', '25/12', '01/05', '01/06']
+
+#first requisition date of the generated history
+HISTORY_START = pd.Timestamp('2024-01-01')
+HISTORY_DAYS = 820
+
+def _pick(rng, values, n, weights=None):
+    values = np.array(values, dtype=object)
+    if weights is None:
+        return values[rng.integers(0, len(values), n)]
+    return values[rng.choice(len(values), n, p=np.asarray(weights) / np.sum(weights))]
+
+def _with_missing(rng, values, share):
+    values = np.array(values, dtype=object)
+    values[rng.random(len(values)) < share] = None
+    return values
+
+def _po_group_sizes(rng, n_rows):
+    # Most POs hold a few lines, some hold dozens (geometric sizes capped at 60)
+    sizes = np.minimum(rng.geometric(0.3, size=n_rows), 60)
+    ends = np.cumsum(sizes)
+    n_groups = int(np.searchsorted(ends, n_rows)) + 1
+    sizes = sizes[:n_groups]
+    sizes[-1] -= ends[n_groups - 1] - n_rows
+    return sizes
+
+def _departments(rng):
+    names = []
+    for company in COMPANIES:
+        for division in rng.choice(DIVISIONS, 8, replace=False):
+            for site in rng.choice(SITES, 3, replace=False):
+                separator = '__' if site == 'HO' else '_'
+                prefix = 'X' if rng.random() < 0.1 else ''
+                names.append(f"{prefix}{company}-{division}{separator}{site}")
+    return names
+
+def _suppliers(rng, n_suppliers):
+    prefixes = _pick(rng, ['PT', 'CV', 'Toko', 'UD'], n_suppliers, weights=[6, 3, 2, 1])
+    first = _pick(rng, SUPPLIER_WORDS, n_suppliers)
+    second = _pick(rng, SUPPLIER_WORDS, n_suppliers)
+    names = pd.unique(pd.Series([f"{p} {a} {b} {i}" for i, (p, a, b) in enumerate(zip(prefixes, first, second))]))
+    return list(names) + FREIGHT_VENDORS + DIRECT_FREIGHT_SUPPLIERS + ['Toko Sulawesi', 'PT Satrya Reksa Binaguna']
+
+def _add_days(rng, start, low, high, missing=0.0):
+    days = pd.to_timedelta(rng.integers(low, high + 1, len(start)), unit='D')
+    result = pd.Series(start) + days
+    if missing:
+        result[rng.random(len(result)) < missing] = pd.NaT
+    return result
+
+def generate_po_entry_list(n_rows, seed=0):
+    """
+    Synthetic PO Entry List of n_rows lines in the CPS export schema.
+
+    :return: DataFrame with every column run_all_processing reads.
+    """
+    rng = np.random.default_rng(seed)
+    sizes = _po_group_sizes(rng, n_rows)
+    n_pos = len(sizes)
+    po_of_row = np.repeat(np.arange(n_pos), sizes)
+
+    # Per-PO attributes, broadcast to the PO's lines
+    departments = _departments(rng)
+    suppliers = _suppliers(rng, max(min(n_pos // 8, 6000), 50))
+    po_company = _pick(rng, COMPANIES, n_pos)
+    po_date = HISTORY_START + pd.to_timedelta(rng.integers(0, HISTORY_DAYS, n_pos), unit='D')
+    po_numbers = np.array([f"{i}/PO/{c}/{d:%m%Y}" for i, c, d in zip(range(n_pos), po_company, po_date)], dtype=object)
+
+    po = {
+        'PO Number': po_numbers,
+        'Department': _with_missing(rng, _pick(rng, departments, n_pos), 0.01),
+        'Supplier': _with_missing(rng, _pick(rng, suppliers, n_pos), 0.01),
+        'Supplier Location': _pick(rng, SUPPLIER_LOCATIONS, n_pos),
+        'Term of Payment': _pick(rng, TERMS_OF_PAYMENT, n_pos),
+        'Procurement Name': _pick(rng, PROCUREMENT_NAMES, n_pos),
+        'Requisition Type': _pick(rng, ['Normal', 'Consignment', 'Contract (Fix Price)', 'Urgent'], n_pos, weights=[14, 2, 2, 2]),
+        'Urgent': _pick(rng, ['Normal', 'Urgent'], n_pos, weights=[4, 1]),
+        'PO Receive Location': _pick(rng, RECEIVE_LOCATIONS, n_pos),
+        'Final Destination Location': _pick(rng, RECEIVE_LOCATIONS, n_pos),
+        'Shipping Type': _pick(rng, ['Darat', 'Laut', 'Udara', 'Laut - Darat', None], n_pos),
+        'Currency': _pick(rng, ['IDR', 'USD', 'CNY'], n_pos, weights=[18, 1, 1]),
+    }
+    df = pd.DataFrame({col: values[po_of_row] for col, values in po.items()})
+    df['Exchange Rate'] = np.select([df['Currency'] == 'USD', df['Currency'] == 'CNY'], [15800.0, 2200.0], default=1.0)
+
+    # Requisition numbers: a PO usually serves one requisition, sometimes two
+    requisition_of_row = po_of_row * 2 + (rng.random(n_rows) < 0.1)
+    df['Requisition Number'] = np.array([f"RQ-{r:07d}" for r in requisition_of_row], dtype=object)
+
+    # Line attributes
+    n_items = max(n_rows // 5, 100)
+    item_ids = rng.integers(1000, 1000 + n_items, n_rows)
+    df['Item ID'] = item_ids
+    df['Item Name'] = _with_missing(rng, [f"{ITEM_WORDS[i % len(ITEM_WORDS)]} {i % 997}" for i in item_ids], 0.005)
+    df['Item Category'] = _with_missing(rng, _pick(rng, ITEM_CATEGORIES, n_rows, weights=CATEGORY_WEIGHTS), 0.01)
+    df['Unit'] = _pick(rng, ['PCS', 'SET', 'Unit', 'Liter', 'Roll', 'Box', None], n_rows)
+    df['Background Needs'] = _pick(rng, ['Pengambilan barang', 'Berita acara pengeluaran', 'Stock rutin', 'Kebutuhan project', None], n_rows)
+    df['Routine'] = _pick(rng, ['Routine', 'Non-Routine'], n_rows)
+    df['Asset / Non Asset'] = _pick(rng, ['Asset', 'Non Asset'], n_rows, weights=[1, 9])
+
+    qty_order = rng.integers(1, 50, n_rows).astype(float)
+    price = np.round(rng.lognormal(12, 1.5, n_rows), -2)
+    df['Qty Order'] = qty_order
+    df['PO Price'] = price
+    df['PO Disc/Cost'] = 0.0
+    df['PO Sub Total'] = qty_order * price
+    df['Jumlah PPN'] = np.round(df['PO Sub Total'] * 0.11, 2)
+    df['Qty Requisition'] = qty_order
+    df['Requisition Unit Price'] = np.round(price * rng.uniform(0.9, 1.3, n_rows), -2)
+    df['Requisition SubTotal'] = df['Qty Requisition'] * df['Requisition Unit Price']
+    df['Cost Saving'] = np.round((df['Requisition Unit Price'] - price) * qty_order, 2)
+    df['Urgent Cost'] = np.nan
+    received_share = rng.choice([0.0, 0.5, 1.0, 1.0, 1.0, 1.2], n_rows)
+    df['Qty Received'] = np.floor(qty_order * received_share)
+    df['Qty Handover'] = df['Qty Received']
+
+    # Date chain per line: requisition -> approval -> PO submit -> PO approval -> receive -> TL -> site
+    requisition_date = pd.Series(po_date[po_of_row]) - pd.to_timedelta(rng.integers(0, 10, n_rows), unit='D')
+    df['Requisition Date'] = requisition_date
+    df['Requisition Submited Date'] = _add_days(rng, requisition_date, 0, 2)
+    df['Requisition Approved Date'] = _add_days(rng, df['Requisition Submited Date'], 0, 5, missing=0.02)
+    df['Requisition Required Date'] = _add_days(rng, requisition_date, 7, 90, missing=0.02)
+    df['PO Submit Date'] = _add_days(rng, df['Requisition Approved Date'], 0, 30, missing=0.03)
+    df['PO Approval Date'] = _add_days(rng, df['PO Submit Date'], 0, 7, missing=0.03)
+    df['PO Required Date'] = _add_days(rng, df['PO Approval Date'], 7, 60, missing=0.05)
+    df['Receive PO Estimation'] = _add_days(rng, df['PO Approval Date'], 7, 45)
+    df['Receive PO Date'] = _add_days(rng, df['PO Approval Date'], 2, 75, missing=0.3)
+    df['Handover Date'] = _add_days(rng, df['Receive PO Date'], 0, 5, missing=0.3)
+    df['Status Update Date'] = _add_days(rng, df['PO Approval Date'], 0, 30)
+
+    has_tl = rng.random(n_rows) < 0.5
+    df['TL Number'] = np.where(has_tl, np.array([f"TL-{p:06d}" for p in po_of_row], dtype=object), None)
+    df['Created TL Date'] = _add_days(rng, df['Receive PO Date'], 0, 10).where(has_tl)
+    df['Shipped Date'] = _add_days(rng, df['Created TL Date'], 0, 14, missing=0.1)
+    df['ETA Date'] = _add_days(rng, df['Shipped Date'], 3, 30)
+    df['Received TL Date'] = _add_days(rng, df['Shipped Date'], 2, 45, missing=0.15)
+    df['Qty Shipped'] = np.where(has_tl, df['Qty Received'], np.nan)
+    df['TL Qty Received'] = np.where(df['Received TL Date'].notna(), df['Qty Shipped'], 0.0)
+    df['Location TL Received'] = np.where(df['Received TL Date'].notna(), df['Final Destination Location'], None)
+
+    df['PO Status'] = _pick(rng, ['Approved', 'Closed', 'Partial Received'], n_rows)
+    df['PO Progress Status'] = _pick(rng, ['Done', 'On Progress', 'Waiting Shipment'], n_rows)
+    df['Req Status'] = _pick(rng, ['Approved', 'Closed'], n_rows)
+    finalisasi = pd.Series(df['Requisition Approved Date'] + pd.to_timedelta(rng.integers(0, 3, n_rows), unit='D'))
+    df['Req Progress Status'] = np.where(
+        rng.random(n_rows) < 0.3,
+        'Finalisasi ' + finalisasi.dt.strftime('%d/%m/%Y').fillna('') + ' oleh procurement',
+        _pick(rng, ['Approved by manager', 'Waiting PO', 'Done'], n_rows)
+    )
+    df['Urgent Note'] = None
+    df['Remarks'] = None
+    return df
+
+def generate_reference_tables(df, seed=0):
+    """
+    Reference tables matching a generated PO Entry List: every lookup hits a share of the
+    frame's keys, like the maintained Google Sheets do.
+
+    :return: dict {data_loader.REFERENCE_SHEETS key: DataFrame}.
+    """
+    rng = np.random.default_rng(seed + 1)
+    po_numbers = pd.unique(df['PO Number'])
+    sample_pos = lambda share: po_numbers[rng.random(len(po_numbers)) < share]
+
+    solar = df[df['Item Category'] == 'Solar']
+    jasa_service = df[df['Item Category'] == 'Jasa/Service']
+    jasa_logistik = df[df['Item Category'] == 'Jasa Logistik']
+    requisitions = pd.unique(df['Requisition Number'])
+    normalized_requisitions = requisitions[rng.random(len(requisitions)) < 0.01]
+
+    def vendor_pos(vendor):
+        return pd.unique(jasa_logistik.loc[jasa_logistik['Supplier'] == vendor, 'PO Number'])
+
+    refs = {
+        'holidays_df': pd.DataFrame({'NONWORKDAYS': [f"{day}/{year}" for year in (2024, 2025, 2026) for day in HOLIDAYS]}),
+        'wilayah_df': pd.DataFrame({'Supplier Location': [k.title() for k in WILAYAH], 'To': list(WILAYAH.values())}),
+        'pulau_df': pd.DataFrame({'Wilayah': [k.title() for k in PULAU], 'Pulau': list(PULAU.values())}),
+        'jasa_service_df': jasa_service[['Item ID', 'PO Number']].drop_duplicates().sample(frac=0.5, random_state=seed).assign(JS_SERVICE='Jasa Service'),
+        'cost_saving_df': df[['Item Name', 'PO Number']].drop_duplicates().sample(frac=0.002, random_state=seed).assign(**{'Cost Saving': 250000.0}),
+        'freight_df': pd.DataFrame({'Supplier': DIRECT_FREIGHT_SUPPLIERS, 'Freight Type': ['Sea Freight', 'Air Freight', 'Land Freight']}),
+        'rara_df': pd.DataFrame({'PO Number': vendor_pos(FREIGHT_VENDORS[0]), 'Freight Type': 'Land Freight'}),
+        'ryi_df': pd.DataFrame({'PO Number': vendor_pos(FREIGHT_VENDORS[1]), 'Freight Type': 'Sea Freight'}),
+        'way_df': pd.DataFrame({'PO Number': vendor_pos(FREIGHT_VENDORS[2]), 'Freight Type': 'Sea Freight'}),
+        'sln_df': pd.DataFrame({'PO Number': vendor_pos(FREIGHT_VENDORS[3]), 'Freight Type': 'Land Freight'}),
+        'rfm_normalized_df': pd.DataFrame({
+            'Requisition Number': normalized_requisitions,
+            'Updated Requisition Approved Date': HISTORY_START + pd.to_timedelta(rng.integers(0, HISTORY_DAYS, len(normalized_requisitions)), unit='D'),
+            'Updated Requisition Required Date': HISTORY_START + pd.to_timedelta(rng.integers(30, HISTORY_DAYS, len(normalized_requisitions)), unit='D'),
+            'Background Update': 'Normalisasi RFM',
+        }),
+        'ontime_normalized_df': pd.DataFrame({'PO Number': sample_pos(0.01)}),
+        'timedate_normalized_df': pd.DataFrame({'PO Number': sample_pos(0.005), 'timedate': 30}),
+        'notcounted_df': pd.DataFrame({'PO Number': sample_pos(0.005)}),
+        'logistic_normalized_df': pd.DataFrame({'PO Number': sample_pos(0.01)}),
+        'normalisasi_rfm_solar_df': solar[['Requisition Number', 'PO Number']].drop_duplicates().assign(**{
+            'Updated Requisition Approved Date': solar.groupby(['Requisition Number', 'PO Number'])['PO Approval Date'].transform('min'),
+            'Updated Requisition Required Date': solar.groupby(['Requisition Number', 'PO Number'])['PO Required Date'].transform('max'),
+            'Background Update': 'Normalisasi Solar',
+        }),
+        'lebaran_dates_df': pd.DataFrame(LEBARAN_RANGES, columns=['YEAR', 'START_DATE', 'END_DATE']),
+    }
+    return {name: table.reset_index(drop=True) for name, table in refs.items()}
+
+def write_synthetic_dataset(root, n_rows, seed=0):
+    """
+    Writes a generated PO Entry List parquet cache and the reference parquet caches under
+    root/data, in the layout data_loader.load_all_data reads without downloading.
+
+    :return: (po_entry_dir, reference_dir).
+    """
+    po_entry_dir = os.path.join(root, 'data', 'po_entry')
+    reference_dir = os.path.join(root, 'data', 'reference')
+    for path in (po_entry_dir, reference_dir):
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    df = generate_po_entry_list(n_rows, seed)
+    df.to_parquet(os.path.join(po_entry_dir, 'PO_Entry_List.parquet'), index=False, engine='pyarrow')
+    for name, table in generate_reference_tables(df, seed).items():
+        table.to_parquet(os.path.join(reference_dir, data_loader.REFERENCE_SHEETS[name][0]), index=False, engine='pyarrow')
+    print(f"Wrote synthetic PO Entry List ({len(df)} rows, {df['PO Number'].nunique()} POs) to {os.path.abspath(root)}")
+    return po_entry_dir, reference_dir
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Write a synthetic PO Entry List and reference tables")
+    parser.add_argument('root', help='Directory receiving data/po_entry and data/reference')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_synthetic_dataset(args.root, args.rows, args.seed)
@@ -3,6 +3,7 @@ import numpy as np
 import os
 import sys
 import argparse
+import datetime
 
 # Add pipeline directory to sys.path to ensure imports work
 # Assuming this script is located in src/orchestrator.py
@@ -13,7 +14,12 @@ sys.path.append(pipeline_dir)
 import data_loader
 import data_helper
 import processing_steps
+import incremental_processing
+import streaming_processing
+import parallel_processing
+import reference_registry
 import data_export
+import validation_rules
 
 def main():
     print("Starting Orchestrator...")
@@ -21,6 +27,14 @@ def main():
     # parse command line arguments
     parser = argparse.ArgumentParser(description="Procurement Processor Pipeline")
     parser.add_argument('--refresh', action='store_true', help='Refresh cache from Google Sheets')
+    parser.add_argument('--incremental', action='store_true', help='Only process new or changed PO groups, reusing data/state')
+    parser.add_argument('--stream-batch-rows', type=int, default=None, help='Stream the PO Entry List in PO-aligned batches of about N rows and write parquet parts to export/')
+    parser.add_argument('--workers', type=int, default=None, help='Process PO-hash partitions on N worker processes (0 = all cores but one)')
+    parser.add_argument('--compare-serial', action='store_true', help='With --workers, also time a serial run and report the speedup')
+    parser.add_argument('--columns', default=None, help='Comma separated output columns; only the stages they depend on are run')
+    sheet_group = parser.add_mutually_exclusive_group()
+    sheet_group.add_argument('--sheet', default=None, help='Name of the PO Entry List.xlsx sheet to read (default the first sheet)')
+    sheet_group.add_argument('--sheet-index', type=int, default=None, help='0-based position of the PO Entry List.xlsx sheet to read')
     args, unknown = parser.parse_known_args()
     
     if args.refresh:
@@ -38,21 +52,58 @@ def main():
     data_loader.project_root = project_root
     data_loader.raw_dir = os.path.join(project_root, 'data', 'po_entry')
     data_loader.reference_dir = os.path.join(project_root, 'data', 'reference')
+    if args.sheet is not None:
+        data_loader.PO_ENTRY_SHEET = args.sheet
+    elif args.sheet_index is not None:
+        data_loader.PO_ENTRY_SHEET = args.sheet_index
     print(f"Data Source: {data_loader.raw_dir}")
     
     # 2. Patch data_export
     data_export.project_root = project_root
     data_export.export_dir = os.path.join(project_root, 'export')
+    validation_rules.export_dir = data_export.export_dir
     print(f"Export Target: {data_export.export_dir}")
 
+    # 2b. Patch incremental state store and reference registry location
+    incremental_processing.state_dir = os.path.join(project_root, 'data', 'state')
+    reference_registry.registry_dir = os.path.join(project_root, 'data', 'reference', 'registry')
+
     # 3. Load Data
     print("Loading data...")
     try:
-        loaded_data = data_loader.load_all_data(refresh_cache=args.refresh)
+        loaded_data = data_loader.load_all_data(refresh_cache=args.refresh, include_po_entry=not args.stream_batch_rows)
     except Exception as e:
         print(f"Error loading data: {e}")
         return
 
+    department_cache_path = os.path.join(data_loader.reference_dir, 'department_attributes.parquet')
+
+    # 3a. Reference registry: normalized keys and indexes of every lookup, rebuilt only when a reference table changes
+    refs = {name: loaded_data[name] for name in processing_steps.REFERENCE_TABLES}
+    refs['lebaran_dates_df'] = loaded_data.get('lebaran_dates_df')
+    try:
+        registry = reference_registry.load_reference_registry(refs)
+    except Exception as e:
+        print(f"Error building reference registry: {e}")
+        return
+
+    # 3b. Streaming mode: the PO Entry List is never loaded whole, processed batches go straight to parquet parts
+    if args.stream_batch_rows:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = os.path.join(data_export.export_dir, f"procurement_data_{timestamp}_parts")
+        try:
+            streaming_processing.run_streaming_processing(
+                data_loader.ensure_po_entry_parquet(), refs, output_dir,
+                batch_rows=args.stream_batch_rows, department_cache_path=department_cache_path, registry=registry
+            )
+        except Exception as e:
+            print(f"Error during streaming processing: {e}")
+            import traceback
+            traceback.print_exc()
+            return
+        print("Pipeline execution completed successfully.")
+        return
+
     # Unpack loaded data
     df = loaded_data['df']
     holidays_df = loaded_data['holidays_df']
@@ -78,26 +129,44 @@ def main():
     # def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays_df, ...)
     print("Running processing pipeline...")
     try:
-        df = processing_steps.run_all_processing(
-            df, 
-            picnorm_df, 
-            normalisasi_rfm_solar_df,
-            holidays_df,
-            wilayah_df, 
-            pulau_df, 
-            jasa_service_df, 
-            freight_df, 
-            rara_df, 
-            ryi_df, 
-            way_df,
-            sln_df,
-            cost_saving_df, 
-            timedate_normalized_df, 
-            ontime_normalized_df, 
-            notcounted_df, 
-            logistic_normalized_df,
-            lebaran_dates_df=lebaran_dates_df
-        )
+        if args.columns:
+            # Partial run through the stage graph, references are passed by name
+            outputs = [col.strip() for col in args.columns.split(',') if col.strip()]
+            df = processing_steps.run_stages(df, refs, outputs=outputs, department_cache_path=department_cache_path, registry=registry)
+        elif args.incremental:
+            # Only new/changed PO groups are processed, the rest comes from data/state
+            df = incremental_processing.run_incremental_processing(df, refs, department_cache_path=department_cache_path, registry=registry)
+        elif args.workers is not None:
+            # PO groups are hash-partitioned over a process pool, references and registry are shipped once per worker
+            workers = args.workers or parallel_processing.default_workers()
+            if args.compare_serial:
+                df, _ = parallel_processing.compare_with_serial(df, refs, workers=workers, department_cache_path=department_cache_path, registry=registry)
+                processing_steps.validate_processed_data(df)
+            else:
+                df, _ = parallel_processing.run_parallel_processing(df, refs, workers=workers, department_cache_path=department_cache_path, registry=registry)
+        else:
+            df = processing_steps.run_all_processing(
+                df, 
+                picnorm_df, 
+                normalisasi_rfm_solar_df,
+                holidays_df,
+                wilayah_df, 
+                pulau_df, 
+                jasa_service_df, 
+                freight_df, 
+                rara_df, 
+                ryi_df, 
+                way_df,
+                sln_df,
+                cost_saving_df, 
+                timedate_normalized_df, 
+                ontime_normalized_df, 
+                notcounted_df, 
+                logistic_normalized_df,
+                lebaran_dates_df=lebaran_dates_df,
+                department_cache_path=department_cache_path,
+                registry=registry
+            )
     except Exception as e:
         print(f"Error during processing: {e}")
         import traceback
@@ -1,9 +1,13 @@
 import pandas as pd
 import numpy as np
+import datetime
+import os
 import re
+import hashlib
+import inspect
 
 # Lebaran blockout dates are loaded dynamically from Google Sheets via data_loader.py
-# and passed into days_excluding_lebaran as a parameter.
+# and passed into days_excluding_lebaran (per row) or build_lebaran_calendar (per column).
 
 #extract LOC from Department column
 def LOC_strings(s):
@@ -92,6 +96,65 @@ def divisi_string(s):
         return first_part
     return None
 
+DEPARTMENT_ATTRIBUTE_COLUMNS = ['LOC', 'DEPARTMENT_', 'DIVISI']
+
+#persisted Department tables are keyed on the source of the rules that built them
+def department_rules_fingerprint():
+    """Hex digest of the source of LOC_strings, project_string and divisi_string (incl. their maps)."""
+    digest = hashlib.sha256()
+    for func in [LOC_strings, project_string, divisi_string]:
+        digest.update(inspect.getsource(func).encode())
+    return digest.hexdigest()
+
+#LOC, DEPARTMENT_ and DIVISI resolved once per distinct Department
+def resolve_department_attributes(department_series, cache_path=None):
+    """
+    Factorizes the Department column, runs LOC_strings, project_string and divisi_string
+    once per distinct department and broadcasts the results back through the codes.
+
+    :param department_series: The 'Department' Series.
+    :param cache_path: Optional parquet path of a persisted Department -> attributes table,
+                       reused and extended between runs.
+    :return: DataFrame with LOC, DEPARTMENT_ and DIVISI aligned to department_series.index.
+    """
+    codes, uniques = pd.factorize(department_series)
+    uniques = pd.Index(uniques, dtype=object)
+
+    known = pd.DataFrame(columns=['Department'] + DEPARTMENT_ATTRIBUTE_COLUMNS)
+    rules_fingerprint = department_rules_fingerprint() if cache_path is not None else None
+    if cache_path is not None and os.path.exists(cache_path):
+        try:
+            cached = pd.read_parquet(cache_path)
+            # tables written by other rules (or without a fingerprint) are rebuilt
+            if 'RULES_FINGERPRINT' in cached.columns and (cached['RULES_FINGERPRINT'] == rules_fingerprint).all():
+                known = cached.drop(columns=['RULES_FINGERPRINT'])
+        except Exception as e:
+            print(f"Warning: Failed to read department attribute cache, rebuilding: {e}")
+    known = known.drop_duplicates(subset='Department').set_index('Department')
+
+    missing = uniques[~uniques.isin(known.index)]
+    if len(missing) > 0:
+        resolved = pd.DataFrame({
+            'LOC': [LOC_strings(s) for s in missing],
+            'DEPARTMENT_': [project_string(s) for s in missing],
+            'DIVISI': [divisi_string(s) for s in missing],
+        }, index=pd.Index(missing, name='Department'), dtype=object)
+        known = pd.concat([known.astype(object), resolved]) if len(known) else resolved
+
+        if cache_path is not None:
+            try:
+                known.reset_index().assign(RULES_FINGERPRINT=rules_fingerprint).to_parquet(cache_path, index=False)
+            except Exception as e:
+                print(f"Warning: Failed to save department attribute cache: {e}")
+
+    # Code -1 (missing Department) picks the trailing NaN row appended below
+    result = {}
+    for col, nan_value in zip(DEPARTMENT_ATTRIBUTE_COLUMNS, [LOC_strings(np.nan), project_string(np.nan), divisi_string(np.nan)]):
+        per_unique = known[col].reindex(uniques).to_numpy(dtype=object)
+        result[col] = np.append(per_unique, np.array([nan_value], dtype=object))[codes]
+
+    return pd.DataFrame(result, index=department_series.index)
+
 #extract supplier type PT/CV/Lainnya
 def PTCV_strings(s):
     if pd.isna(s):
@@ -100,19 +163,91 @@ def PTCV_strings(s):
     if str(s).startswith('CV'): return 'CV'
     return 'Toko/Lainnya'
 
+#Term of Payment keywords per category, listed in priority order (first matching category wins)
+TOP_CATEGORY_KEYWORDS = {
+    'Progressive': ['dp', 'downpayment', 'down payment', 'pembayaran 1 ', '50% sebelum', 'kredit', 'tahap', 'leasing', 'installment'],
+    'TBD': ['pembayaran sebelum', 'before delivery', 'sebelum pengiriman', 'cash', 'uang muka', '100% sebelum', 'tunai', 'seelum', 'sebeulm', 'transfer', 'pengiriman setelah pembayaran', 'setelah pembayaran','100% di muka'],
+    'Tempo': ['hari setelah', 'hari dari', 'tempo', 'invoice diterima', 'penagihan dilakukan', 'setelah pengiriman', 'pembayaran setelah', 'kontrak', 'after delivery', 'hari kerja', 'telah diterima', 'pembayaran per bulan', 'ari', '0', 'pekerjaan pengujian dilakukan setelah pembayaran dilakukan'],
+}
+TOP_DEFAULT_CATEGORY = 'Not Applicable'
+
+def compile_keyword_classifier(category_keywords):
+    """
+    Compiles {category: [keywords]} into one anchored regex. Each category is a
+    lookahead branch tried in dict order, so the matched group index is the
+    highest-priority category with any keyword as a substring.
+
+    :return: (compiled pattern, list of categories indexed by group number - 1)
+    """
+    categories = list(category_keywords)
+    branches = [
+        '(?=.*?(' + '|'.join(re.escape(k) for k in category_keywords[c]) + '))'
+        for c in categories
+    ]
+    return re.compile('|'.join(branches), re.DOTALL), categories
+
+_TOP_CLASSIFIER = compile_keyword_classifier(TOP_CATEGORY_KEYWORDS)
+
 #categorizing Term of Payment
 def TOP_strings(s):
     if pd.isna(s): return np.nan
     s = str(s).lower().strip()
-    
-    progressive_keywords = ['dp', 'downpayment', 'down payment', 'pembayaran 1 ', '50% sebelum', 'kredit', 'tahap', 'leasing', 'installment']
-    tbd_keywords = ['pembayaran sebelum', 'before delivery', 'sebelum pengiriman', 'cash', 'uang muka', '100% sebelum', 'tunai', 'seelum', 'sebeulm', 'transfer', 'pengiriman setelah pembayaran', 'setelah pembayaran','100% di muka']
-    tempo_keywords = ['hari setelah', 'hari dari', 'tempo', 'invoice diterima', 'penagihan dilakukan', 'setelah pengiriman', 'pembayaran setelah', 'kontrak', 'after delivery', 'hari kerja', 'telah diterima', 'pembayaran per bulan', 'ari', '0', 'pekerjaan pengujian dilakukan setelah pembayaran dilakukan']
-    
-    if any(keyword in s for keyword in progressive_keywords): return 'Progressive'
-    if any(keyword in s for keyword in tbd_keywords): return 'TBD'
-    if any(keyword in s for keyword in tempo_keywords): return 'Tempo'
-    return 'Not Applicable'
+
+    pattern, categories = _TOP_CLASSIFIER
+    match = pattern.match(s)
+    if match:
+        return categories[match.lastindex - 1]
+    return TOP_DEFAULT_CATEGORY
+
+#apply a scalar helper once per distinct value and broadcast back
+def apply_on_unique(series, func):
+    """
+    Runs func over the distinct values of series only and maps the results back
+    through the factorized codes. Missing values are passed to func once.
+    """
+    codes, uniques = pd.factorize(series)
+    per_unique = [func(v) for v in uniques] + [func(np.nan)]
+    return pd.Series(np.array(per_unique, dtype=object)[codes], index=series.index)
+
+#masked evaluation: columns that only exist where a condition holds run their expensive
+#branch on those rows alone instead of np.where(mask, expensive(all rows), fill)
+def masked_compute(mask, func, columns, fill=np.nan, dtype=float, stats=None, name=None):
+    """
+    Evaluates func only on the rows where mask is true and fills the others.
+
+    :param mask: Boolean Series/array, one entry per row.
+    :param func: Called as func(*columns restricted to the masked rows), returns one value per masked row.
+    :param columns: List of Series/arrays aligned with mask.
+    :param fill: Value of the rows outside the mask.
+    :param dtype: dtype of the returned array.
+    :param stats: Optional dict receiving {name: {'computed': rows, 'skipped': rows}} (see report_masked_stats).
+    :return: numpy array with func's results on the masked rows and fill elsewhere.
+    """
+    rows = np.flatnonzero(np.asarray(mask, dtype=bool))
+    result = np.full(len(mask), fill, dtype=dtype)
+    if len(rows):
+        subset = [column.iloc[rows] if isinstance(column, pd.Series) else np.asarray(column)[rows] for column in columns]
+        result[rows] = func(*subset)
+
+    if stats is not None:
+        counts = stats.setdefault(name or getattr(func, '__name__', 'masked'), {'computed': 0, 'skipped': 0})
+        counts['computed'] += len(rows)
+        counts['skipped'] += len(mask) - len(rows)
+    return result
+
+def report_masked_stats(stats):
+    """Prints the computed / skipped row counts collected by masked_compute."""
+    for name, counts in stats.items():
+        total = counts['computed'] + counts['skipped']
+        share = counts['skipped'] / total * 100 if total else 0.0
+        print(f"   {name}: computed {counts['computed']} rows, skipped {counts['skipped']} ({share:.1f}%)")
+
+#object view of a column for .str operations; non-string values come back as NaN
+def _text_series(series):
+    dtype = series.dtype.categories.dtype if isinstance(series.dtype, pd.CategoricalDtype) else series.dtype
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        return series.astype(object)
+    return pd.Series(np.nan, index=series.index, dtype=object)
 
 #categorization within Item Category for CATEGORYMERGED 
 def item_category_merged(item_category, unit=None):
@@ -134,199 +269,318 @@ def item_category_merged(item_category, unit=None):
 
     return item_category
 
+def item_category_merged_vectorized(item_category_series, unit_series=None):
+    """Column version of item_category_merged."""
+    category_upper = _text_series(item_category_series).str.upper().str.strip()
+    if unit_series is None:
+        unit_has_set = np.zeros(len(item_category_series), dtype=bool)
+    else:
+        unit_has_set = _text_series(unit_series).str.upper().str.contains('SET', regex=False, na=False).to_numpy()
+
+    is_tire_dt = category_upper.str.contains('TIRE DT', regex=False, na=False).to_numpy()
+    conditions = [
+        category_upper.str.contains('XCMG', regex=False, na=False).to_numpy(),
+        category_upper.str.contains('SANY', regex=False, na=False).to_numpy(),
+        category_upper.str.contains('ZS', regex=False, na=False).to_numpy(),
+        is_tire_dt & unit_has_set,
+        is_tire_dt,
+    ]
+    choices = ['Spare Part XCMG', 'Spare Part SANY', 'Spare Part ZS', 'Tire DT - Set', 'Tire DT - non Set']
+    merged = np.select(conditions, choices, default=item_category_series.to_numpy(dtype=object))
+    return pd.Series(merged, index=item_category_series.index, dtype=object)
+
+#categories that are not counted for performance (CATEGORYVALUE = 1)
+NOT_COUNTED_CATEGORIES = ["Kontrak", "Seragam", "Jasa Logistik", "Jasa/Service", "ATK", "Cetak", "Makanan dan Minuman", "Seragam Security", "x Kebutuhan Kantin", "x Kebutuhan Mess", "x Medical dan Obat"]
+
 #Value marker, for more info check documentation
 def category_value_marker(row):
     """Marks categories that should not be counted for performance."""
-    specific_categories = ["Kontrak", "Seragam", "Jasa Logistik", "Jasa/Service", "ATK", "Cetak", "Makanan dan Minuman", "Seragam Security", "x Kebutuhan Kantin", "x Kebutuhan Mess", "x Medical dan Obat"]
     item_category = str(row['Item Category']).strip()   
     requisition_type = str(row['Requisition Type']).strip()
     item_name = str(row['Item Name']).strip().lower()
     
-    if item_category in specific_categories or requisition_type == "Consignment" or (item_category == "APD" and "sepatu" in item_name):
+    if item_category in NOT_COUNTED_CATEGORIES or requisition_type == "Consignment" or (item_category == "APD" and "sepatu" in item_name):
         return 1
     return 0
 
+def category_value_marker_vectorized(item_category_series, requisition_type_series, item_name_series):
+    """Column version of category_value_marker."""
+    item_category = _text_series(item_category_series).str.strip()
+    requisition_type = _text_series(requisition_type_series).str.strip()
+    has_sepatu = _text_series(item_name_series).str.lower().str.contains('sepatu', regex=False, na=False)
+
+    is_marked = (
+        item_category.isin(NOT_COUNTED_CATEGORIES)
+        | (requisition_type == "Consignment")
+        | ((item_category == "APD") & has_sepatu)
+    )
+    return pd.Series(np.where(is_marked, 1, 0), index=item_category_series.index)
+
+XCMG_BACKGROUND_KEYWORDS = ["Pengambilan", "Berita acara pengeluaran", "BA", "Consignment"]
+
 def category_value_xcmg(row):
     requisition_type = row['Requisition Type']
     item_category = row['Item Category']
     background_needs = row['Background Needs']
-    keywords = ["Pengambilan", "Berita acara pengeluaran", "BA", "Consignment"]
     
     if (isinstance(requisition_type, str) and requisition_type != "Consignment" and
         isinstance(item_category, str) and "XCMG" in item_category and
-        isinstance(background_needs, str) and any(keyword in background_needs for keyword in keywords)):
+        isinstance(background_needs, str) and any(keyword in background_needs for keyword in XCMG_BACKGROUND_KEYWORDS)):
         return 1
     return 0
 
+def category_value_xcmg_vectorized(requisition_type_series, item_category_series, background_needs_series):
+    """Column version of category_value_xcmg."""
+    requisition_type = _text_series(requisition_type_series)
+    keyword_pattern = '|'.join(re.escape(k) for k in XCMG_BACKGROUND_KEYWORDS)
+
+    is_xcmg = (
+        requisition_type.str.len().notna() & (requisition_type != "Consignment")
+        & _text_series(item_category_series).str.contains('XCMG', regex=False, na=False)
+        & _text_series(background_needs_series).str.contains(keyword_pattern, regex=True, na=False)
+    )
+    return pd.Series(np.where(is_xcmg, 1, 0), index=requisition_type_series.index)
+
+ROUTINE_NONROUTINE_PICS = [
+    'rizal agus fianto', 'syifa alifia', 'syifa ramadhani luthfi',
+    'linda permata sari', 'puji astuti', 'laurensius adi', 'stheven immanuel'
+]
+
+#routine rules as (category, requisition_type, item_pattern, supplier_pattern, pic_names, value), all lowercase.
+#None means "any". Rules are applied in order and the last matching rule wins, so a
+#category-wide default must come before its item/supplier exception.
+ROUTINE_RULES = [
+    # ---------------------------------------------------------
+    # fix price contract 
+    # ---------------------------------------------------------
+    (None, 'contract (fix price)', None, None, None, 'Routine'),
+
+    # ---------------------------------------------------------
+    # aksesoris kendaraan
+    # ---------------------------------------------------------
+    ('aksesoris kendaraan', None, None, None, None, 'Non-Routine'),
+    ('aksesoris kendaraan', None, 'lampu rotary', None, None, 'Routine'),
+
+    # ---------------------------------------------------------
+    ('alat hiburan', None, 'shuttlecock|cock', None, None, 'Routine'),
+    ('apd', None, 'helm|kacamata|kaca mata|rompi|masker medis|safety shoes|tali|backsupport', None, None, 'Routine'),
+
+    ('cetak', None, None, None, None, 'Non-Routine'),
+    ('container & part', None, None, None, None, 'Non-Routine'),
+
+    ('elektrikal', None, None, None, ROUTINE_NONROUTINE_PICS, 'Non-Routine'),
+
+    # ---------------------------------------------------------
+    # karoseri ft
+    # ---------------------------------------------------------
+    ('karoseri ft', None, None, None, None, 'Non-Routine'),
+    ('karoseri ft', None, 'filter', None, None, 'Routine'),
+
+    ('karoseri lt', None, None, None, None, 'Non-Routine'),
+    ('peralatan dapur', None, None, None, None, 'Non-Routine'),
+
+    # ---------------------------------------------------------
+    # peralatan shipping
+    # ---------------------------------------------------------
+    ('peralatan shipping', None, None, None, None, 'Non-Routine'),
+    ('peralatan shipping', None, 'terpal', None, None, 'Routine'),
+
+    # ---------------------------------------------------------
+    # peralatan survey
+    # ---------------------------------------------------------
+    ('peralatan survey', None, None, None, None, 'Non-Routine'),
+    ('peralatan survey', None, 'flagging tape', None, None, 'Routine'),
+
+    # ---------------------------------------------------------
+    # lab peralatan
+    # ---------------------------------------------------------
+    ('lab peralatan', None, None, None, None, 'Non-Routine'),
+    ('lab peralatan', None, 'oreas|plastik klip', None, None, 'Routine'),
+
+    # ---------------------------------------------------------
+    # oli dan grease 
+    # ---------------------------------------------------------
+    ('oli dan grease', None, None, None, None, 'Non-Routine'),
+    ('oli dan grease', None, None, 'toko sulawesi|pt satrya reksa binaguna', None, 'Routine'),
+
+    ('telepon', None, None, None, None, 'Non-Routine'),
+    ('tire dt', None, None, None, None, 'Routine'),
+    ('perangkat it', None, None, None, None, 'Non-Routine'),
+    ('jasa/service', None, None, None, None, 'Non-Routine'),
+    ('mesin bor dan part', None, None, None, None, 'Non-Routine'),
+    ('alat teknik', None, None, None, None, 'Non-Routine'),
+    ('mesin epsilon dan part', None, None, None, None, 'Non-Routine'),
+    ('container dan part', None, None, None, None, 'Non-Routine'),
+    ('telephone/hp', None, None, None, None, 'Non-Routine'),
+
+    ('tire innova', None, 'delium', None, None, 'Routine'),
+    ('tire manhaul', None, 'gt|gajah tunggal', None, None, 'Routine'),
+
+    ('tire tl', None, None, None, None, 'Non-Routine'),
+    ('tire vb', None, None, None, None, 'Routine'),
+    ('radio ht, rig', None, None, None, None, 'Non-Routine'),
+    ('packaging', None, None, None, None, 'Routine'),
+]
+
+def compile_routine_rules(rules):
+    """
+    Compiles a routine rule table into an engine: rules grouped by category
+    (None = all rows), each distinct regex compiled once, and the rule values
+    indexed by rule position for last-rule-wins resolution.
+    """
+    patterns = {}
+    by_category = {}
+    values = []
+    for idx, (category, requisition_type, item_pattern, supplier_pattern, pic_names, value) in enumerate(rules):
+        for pattern in (item_pattern, supplier_pattern):
+            if pattern is not None and pattern not in patterns:
+                patterns[pattern] = re.compile(pattern)
+        by_category.setdefault(category, []).append((
+            idx,
+            requisition_type,
+            patterns.get(item_pattern),
+            patterns.get(supplier_pattern),
+            frozenset(pic_names) if pic_names is not None else None,
+        ))
+        values.append(value)
+    return {'by_category': by_category, 'values': np.array(values, dtype=object)}
+
+_ROUTINE_ENGINE = compile_routine_rules(ROUTINE_RULES)
+
+#regex search over the distinct values of a row subset, broadcast back to the subset
+def _search_unique(pattern, values):
+    codes, uniques = pd.factorize(values)
+    hits = np.array([isinstance(v, str) and pattern.search(v) is not None for v in uniques] + [False], dtype=bool)
+    return hits[codes]
+
 #override routine with parameter inside
-def apply_routine_logic(df_series_routine : pd.Series, category_series : pd.Series, item_name_series : pd.Series, pic_name_series : pd.Series, requisition_type_series : pd.Series, supplier_name_series : pd.Series):
+def apply_routine_logic(df_series_routine : pd.Series, category_series : pd.Series, item_name_series : pd.Series, pic_name_series : pd.Series, requisition_type_series : pd.Series, supplier_name_series : pd.Series, engine=None):
     """
-    normalization for routine column based on aggred terms
+    normalization for routine column based on aggred terms (ROUTINE_RULES)
     
     :param df_series_routine: initial data frame
     :param category_series: The 'CATEGORYMERGED' (lowercase) Series.
     :param item_name_series: The 'Item Name' (lowercase) Series.
     :param pic_name_series: The 'Procurement Name' (lowercase) Series.
     :param requisition_type_series: The 'Requisition Type' (lowercase) Series.
+    :param supplier_name_series: The 'Supplier' (lowercase) Series.
+    :param engine: Compiled rule table, defaults to the compiled ROUTINE_RULES.
     :return: The updated '_Routine' status Series.
     """
-    df_series_routine = df_series_routine.copy()
-    
-    nonroutine_pics = [
-        'rizal agus fianto', 'syifa alifia', 'syifa ramadhani luthfi',
-        'linda permata sari', 'puji astuti', 'laurensius adi', 'stheven immanuel'
-    ]
+    engine = _ROUTINE_ENGINE if engine is None else engine
+    n = len(df_series_routine)
+
+    category_values = category_series.to_numpy(dtype=object)
+    item_values = item_name_series.to_numpy(dtype=object)
+    pic_values = pic_name_series.to_numpy(dtype=object)
+    requisition_values = requisition_type_series.to_numpy(dtype=object)
+    supplier_values = supplier_name_series.to_numpy(dtype=object)
+
+    #row positions per category in a single hashing pass
+    category_rows = pd.Series(np.arange(n)).groupby(category_values, sort=False).indices if n else {}
+
+    #index of the last matching rule per row (-1 = untouched)
+    winner = np.full(n, -1, dtype=np.int64)
+
+    for category, category_rules in engine['by_category'].items():
+        rows = np.arange(n) if category is None else category_rows.get(category)
+        if rows is None or len(rows) == 0:
+            continue
+
+        #each distinct pattern is evaluated once per category, on that category's unique values only
+        match_cache = {}
+        for idx, requisition_type, item_re, supplier_re, pic_names in category_rules:
+            mask = np.ones(len(rows), dtype=bool)
+            if requisition_type is not None:
+                mask &= requisition_values[rows] == requisition_type
+            for field, pattern, values in (('item', item_re, item_values), ('supplier', supplier_re, supplier_values)):
+                if pattern is None:
+                    continue
+                key = (field, pattern.pattern)
+                if key not in match_cache:
+                    match_cache[key] = _search_unique(pattern, values[rows])
+                mask &= match_cache[key]
+            if pic_names is not None:
+                mask &= pd.Series(pic_values[rows]).isin(pic_names).to_numpy()
+            hit_rows = rows[mask]
+            winner[hit_rows] = np.maximum(winner[hit_rows], idx)
+
+    routine_values = df_series_routine.to_numpy(dtype=object, copy=True)
+    has_rule = winner >= 0
+    routine_values[has_rule] = engine['values'][winner[has_rule]]
+    return pd.Series(routine_values, index=df_series_routine.index, name=df_series_routine.name)
     
-    #define rules as a list of (condition_mask, value)
-    rules = [
-        # ---------------------------------------------------------
-        # fix price contract 
-        # ---------------------------------------------------------
-        (
-            (requisition_type_series == 'contract (fix price)'),
-            'Routine'
-        ),
+#site locations per area, shared by TIME DATE, URGENT_NORMAL and logistic on-time thresholds
+SULAWESI_LOCATIONS = ['LAR', 'LWK', 'PALU', 'KDI', 'MUNA', 'TKE', 'WATU', 'LAEYA']
+HALMAHERA_LOCATIONS = ['OBI', 'FLUK', 'BARU', 'LWI']
 
-        # ---------------------------------------------------------
-        # aksesoris kendaraan
-        # ---------------------------------------------------------
-        (
-            (category_series == 'aksesoris kendaraan') &
-            (item_name_series.str.contains('lampu rotary', na=False)),
-            'Routine'
-        ),
-        (
-            (category_series == 'aksesoris kendaraan') &
-            (~item_name_series.str.contains('lampu rotary', na=False)),
-            'Non-Routine'
-        ),
+#categories that get the area lead time on LC locations
+LC_SPECIAL_CATEGORIES = [
+    'Consumable Workshop', 'Packaging', 'Alat dan Bahan Bangunan', 
+    'Bolt dan Nut', 'Elektrikal', 'Consumable Cleaning',
+    'Perabotan', 'Peralatan Geologi', 'Peralatan Dapur'
+]
 
-        # ---------------------------------------------------------
-        ( (category_series == 'alat hiburan') &
-          (item_name_series.str.contains('shuttlecock|cock', na=False)),
-          'Routine'
-        ),
+#lead time for HO,Local Site; Sulawesi Area and Halmahera Area
+URGENT_HO_SULAWESI_LOCS = [f'HO {loc}' for loc in SULAWESI_LOCATIONS]
+URGENT_HO_HALMAHERA_LOCS = [f'HO {loc}' for loc in HALMAHERA_LOCATIONS]
 
-        ( (category_series == 'apd') &
-          (item_name_series.str.contains('helm|kacamata|kaca mata|rompi|masker medis|safety shoes|tali|backsupport', na=False)),
-          'Routine'
-        ),
+#logistic on-time thresholds (days)
+LOGISTIC_FAR_DESTINATIONS = ["Site IMS 52", "Site OPM", "Site KTS"]
+LOGISTIC_HALMAHERA_LOCS = [f'{prefix} {loc}' for prefix in ('LC', 'HO') for loc in HALMAHERA_LOCATIONS]
 
-        (category_series == 'cetak', 'Non-Routine'),
-        (category_series == 'container & part', 'Non-Routine'),
+def build_location_table(loc_values):
+    """
+    Lookup table with one row per distinct LOC value holding every LOC-driven
+    number used by the pipeline:
 
-        (
-            (category_series == 'elektrikal') & (pic_name_series.isin(nonroutine_pics)),
-            'Non-Routine'
-        ),
+    - REGION: categorical area (HO/LC x Halmahera/Sulawesi, HO/LC, Unknown)
+    - TIME_DATE_DAYS / TIME_DATE_DAYS_SPECIAL: TIME DATE baseline for regular / LC_SPECIAL_CATEGORIES items
+    - URGENT_THRESHOLD: max lead time (days) still counted as Urgent, NaN if never urgent
+    - LOGISTIC_ONTIME_DAYS: logistic on-time threshold before the destination override
 
-        # ---------------------------------------------------------
-        # karoseri ft
-        # ---------------------------------------------------------
-        (
-            (category_series == 'karoseri ft') &
-            (item_name_series.str.contains('filter', na=False)),
-            'Routine'
-        ),
-        (
-            (category_series == 'karoseri ft') &
-            (~item_name_series.str.contains('filter', na=False)),
-            'Non-Routine'
-        ),
+    Each column keeps the matching semantics of the rule it replaces
+    (substring patterns for TIME DATE, exact names for URGENT / logistic).
+    A trailing row for a missing LOC is appended so factorize code -1 gathers it.
+    """
+    locs = pd.Series(pd.unique(pd.Series(loc_values, dtype=object).dropna()), dtype=object)
+    locs = pd.concat([locs, pd.Series([np.nan], dtype=object)], ignore_index=True)
+    text = _text_series(locs)
 
-        (category_series == 'karoseri lt', 'Non-Routine'),
-        (category_series == 'peralatan dapur', 'Non-Routine'),
+    ho_halmahera = text.str.contains('|'.join(URGENT_HO_HALMAHERA_LOCS), na=False)
+    ho_sulawesi = text.str.contains('|'.join(URGENT_HO_SULAWESI_LOCS), na=False)
+    lc_halmahera = text.str.contains('|'.join(f'LC {loc}' for loc in HALMAHERA_LOCATIONS), na=False)
+    lc_sulawesi = text.str.contains('|'.join(f'LC {loc}' for loc in SULAWESI_LOCATIONS), na=False)
+    ho_or_lc = text.str.contains(r"LC|HO", na=False)
 
-        # ---------------------------------------------------------
-        # peralatan shipping
-        # ---------------------------------------------------------
-        (
-            (category_series == 'peralatan shipping') &
-            (item_name_series.str.contains('terpal', na=False)),
-            'Routine'
-        ),
-        (
-            (category_series == 'peralatan shipping') &
-            (~item_name_series.str.contains('terpal', na=False)),
-            'Non-Routine'
-        ),
+    regions = ['HO Halmahera', 'HO Sulawesi', 'LC Halmahera', 'LC Sulawesi', 'HO/LC', 'Unknown']
+    region = np.select([ho_halmahera, ho_sulawesi, lc_halmahera, lc_sulawesi, ho_or_lc], regions[:-1], default='Unknown')
 
-        # ---------------------------------------------------------
-        # peralatan survey
-        # ---------------------------------------------------------
-        (
-            (category_series == 'peralatan survey') &
-            (item_name_series.str.contains('flagging tape', na=False)),
-            'Routine'
-        ),
-        (
-            (category_series == 'peralatan survey') &
-            (~item_name_series.str.contains('flagging tape', na=False)),
-            'Non-Routine'
-        ),
+    regular_days = np.select([ho_halmahera, ho_sulawesi, ho_or_lc], [43, 36, 15], default=0)
+    special_days = np.select([ho_halmahera, ho_sulawesi, lc_halmahera, lc_sulawesi, ho_or_lc], [43, 36, 43, 36, 15], default=0)
 
-        # ---------------------------------------------------------
-        # lab peralatan
-        # ---------------------------------------------------------
-        (
-            (category_series == 'lab peralatan') &
-            (item_name_series.str.contains('oreas|plastik klip', na=False)),
-            'Routine'
-        ),
-        (
-            (category_series == 'lab peralatan') &
-            (~item_name_series.str.contains('oreas|plastik klip', na=False)),
-            'Non-Routine'
-        ),
+    #conditions are OR-ed in urgent_normal_function, so the widest applicable threshold decides
+    urgent_threshold = np.fmax.reduce([
+        np.where((text == 'HO') | text.str.contains('LC', regex=False, na=False), 15.0, np.nan),
+        np.where(text.isin(URGENT_HO_SULAWESI_LOCS), 36.0, np.nan),
+        np.where(text.isin(URGENT_HO_HALMAHERA_LOCS), 43.0, np.nan),
+    ])
 
-        # ---------------------------------------------------------
-        # oli dan grease 
-        # ---------------------------------------------------------
-        (
-            (category_series == 'oli dan grease') &
-            (supplier_name_series.str.contains('toko sulawesi|pt satrya reksa binaguna', na=False)),
-            'Routine'
-        ),
-        (
-            (category_series == 'oli dan grease') &
-            (~supplier_name_series.str.contains('toko sulawesi|pt satrya reksa binaguna', na=False)),
-            'Non-Routine'
-        ),
+    return pd.DataFrame({
+        'LOC': locs,
+        'REGION': pd.Categorical(region, categories=regions),
+        'TIME_DATE_DAYS': regular_days.astype(int),
+        'TIME_DATE_DAYS_SPECIAL': special_days.astype(int),
+        'URGENT_THRESHOLD': urgent_threshold,
+        'LOGISTIC_ONTIME_DAYS': np.where(text.isin(LOGISTIC_HALMAHERA_LOCS), 24, 17),
+    })
 
-        (category_series == 'telepon', 'Non-Routine'),
-        (category_series == 'tire dt', 'Routine'),
-        (category_series == 'perangkat it', 'Non-Routine'),
-        (category_series == 'jasa/service', 'Non-Routine'),
-        (category_series == 'mesin bor dan part', 'Non-Routine'),
-        (category_series == 'alat teknik', 'Non-Routine'),
-        (category_series == 'mesin epsilon dan part', 'Non-Routine'),
-        (category_series == 'container dan part', 'Non-Routine'),
-        (category_series == 'telephone/hp', 'Non-Routine'),
-
-        (
-            (category_series == 'tire innova') &
-            (item_name_series.str.contains('delium', na=False)),
-            'Routine'
-        ),
-        (
-            (category_series == 'tire manhaul') &
-            (item_name_series.str.contains('gt|gajah tunggal', na=False)),
-            'Routine'
-        ),
+#factorized LOC codes plus the table built over those codes (missing LOC -> last row)
+def lookup_location_table(loc_series):
+    codes, uniques = pd.factorize(loc_series)
+    table = build_location_table(uniques)
+    return codes, table
 
-        (category_series == 'tire tl', 'Non-Routine'),
-        (category_series == 'tire vb', 'Routine'),
-        (category_series == 'radio ht, rig', 'Non-Routine'),
-        (category_series == 'packaging', 'Routine'),
-    ]
-    
-    #apply all rules sequentially 
-    for condition, value in rules:
-        df_series_routine.loc[condition] = value
-        
-    return df_series_routine
-    
-#lead time for HO,Local Site; Sulawesi Area and Halmahera Area
 def urgent_normal_function(row):
     if row['Requisition Type'] == 'Consignment': return 'Normal'
     
@@ -337,35 +591,67 @@ def urgent_normal_function(row):
     #hardcoded logic
     if (loc == 'HO' and lead_time <= 15) or \
        ('LC' in loc and lead_time <= 15) or \
-       (loc in ['HO LAR', 'HO LWK', 'HO PALU', 'HO KDI', 'HO MUNA', 'HO WATU', 'HO LAEYA', 'HO TKE'] and lead_time <= 36) or \
-       (loc in ['HO OBI', 'HO FLUK', 'HO BARU', 'HO LWI'] and lead_time <= 43):
+       (loc in URGENT_HO_SULAWESI_LOCS and lead_time <= 36) or \
+       (loc in URGENT_HO_HALMAHERA_LOCS and lead_time <= 43):
         return 'Urgent'
     return 'Normal'
 
+def urgent_normal_vectorized(requisition_type_series, loc_series, lead_time_series):
+    """Column version of urgent_normal_function as a URGENT_STATUSES categorical, thresholds gathered from the location table."""
+    codes, table = lookup_location_table(loc_series)
+    threshold = table['URGENT_THRESHOLD'].to_numpy()[codes]
+    lead_time = pd.to_numeric(lead_time_series, errors='coerce').to_numpy(dtype=float)
+
+    #NaN lead time or NaN threshold compares False -> Normal
+    is_urgent = (lead_time <= threshold) & (_text_series(requisition_type_series) != 'Consignment').to_numpy()
+    return pd.Series(status_categorical(is_urgent.astype(np.int8), URGENT_STATUSES), index=loc_series.index)
+
+#equivalence check between the per-row reference helpers and their column versions
+def verify_vectorized_helpers(df):
+    """
+    Runs the axis=1 reference helpers and the vectorized versions on df and
+    returns {column: mismatching row count}. Needs the step 1 columns incl. LOC and LEAD TIME.
+    """
+    def same(a, b):
+        a, b = pd.Series(a).reset_index(drop=True), pd.Series(b).reset_index(drop=True)
+        return ((a == b) | (a.isna() & b.isna())).to_numpy()
+
+    checks = {
+        'CATEGORYMERGED': (
+            df.apply(lambda x: item_category_merged(x['Item Category'], x.get('Unit')), axis=1),
+            item_category_merged_vectorized(df['Item Category'], df.get('Unit')),
+        ),
+        'CATEGORYVALUE': (
+            df.apply(category_value_marker, axis=1),
+            category_value_marker_vectorized(df['Item Category'], df['Requisition Type'], df['Item Name']),
+        ),
+        'CATEGORYVALUEXCMG': (
+            df.apply(category_value_xcmg, axis=1),
+            category_value_xcmg_vectorized(df['Requisition Type'], df['Item Category'], df['Background Needs']),
+        ),
+        'URGENT_NORMAL': (
+            df.apply(urgent_normal_function, axis=1),
+            urgent_normal_vectorized(df['Requisition Type'], df['LOC'], df['LEAD TIME']),
+        ),
+    }
+    return {col: int((~same(reference, vectorized)).sum()) for col, (reference, vectorized) in checks.items()}
+
 def determine_time_date_days(loc_series, item_category_series):
-    sulawesi_locations = ['LAR', 'LWK', 'PALU', 'KDI', 'MUNA', 'TKE', 'WATU', 'LAEYA']
-    halmahera_locations = ['OBI', 'FLUK', 'BARU', 'LWI']
-    ho_halmahera_pattern = '|'.join([f'HO {loc}' for loc in halmahera_locations])
-    ho_sulawesi_pattern = '|'.join([f'HO {loc}' for loc in sulawesi_locations])
-    lc_halmahera_pattern = '|'.join([f'LC {loc}' for loc in halmahera_locations])
-    lc_sulawesi_pattern = '|'.join([f'LC {loc}' for loc in sulawesi_locations])
-    LC_Categorizatoin = [
-        'Consumable Workshop', 'Packaging', 'Alat dan Bahan Bangunan', 
-        'Bolt dan Nut', 'Elektrikal', 'Consumable Cleaning',
-        'Perabotan', 'Peralatan Geologi', 'Peralatan Dapur'
-    ]
-    is_special_lc_category = item_category_series.isin(LC_Categorizatoin)
-    
-    conditions = [
-        loc_series.str.contains(ho_halmahera_pattern, na=False),
-        loc_series.str.contains(ho_sulawesi_pattern, na=False),
-        loc_series.str.contains(lc_halmahera_pattern, na=False) & is_special_lc_category,
-        loc_series.str.contains(lc_sulawesi_pattern, na=False) & is_special_lc_category,
-        loc_series.str.contains(r"LC|HO", na=False)
-    ]
-    choices = [43, 36, 43, 36, 15]
-    
-    return np.select(conditions, choices, default=0).astype(int)
+    """TIME DATE baseline days: one gather from the location table by (LOC code, special LC category)."""
+    codes, table = lookup_location_table(loc_series)
+    days = table[['TIME_DATE_DAYS', 'TIME_DATE_DAYS_SPECIAL']].to_numpy()
+
+    category_codes, category_uniques = pd.factorize(item_category_series)
+    is_special_unique = np.append(pd.Index(category_uniques).isin(LC_SPECIAL_CATEGORIES), False)
+    is_special = is_special_unique[category_codes]
+
+    return days[codes, is_special.astype(int)].astype(int)
+
+def logistic_ontime_threshold(final_destination_series, loc_series):
+    """Logistic on-time threshold per row: far destinations 34, Halmahera LOC 24, otherwise 17."""
+    codes, table = lookup_location_table(loc_series)
+    loc_days = table['LOGISTIC_ONTIME_DAYS'].to_numpy()[codes]
+    return np.where(final_destination_series.isin(LOGISTIC_FAR_DESTINATIONS), 34, loc_days)
 
 #def for exclude lebaran
 def days_excluding_lebaran(start_date, end_date, lebaran_dates=None):
@@ -393,6 +679,49 @@ def days_excluding_lebaran(start_date, end_date, lebaran_dates=None):
     else:
         return non_lebaran_days
 
+#sorted day array of the lebaran exclusion set, built once per run
+def build_lebaran_calendar(lebaran_dates=None):
+    """
+    Converts the Lebaran exclusion set into a sorted datetime64[D] array so the
+    excluded-day count up to any date is a single searchsorted lookup.
+
+    :param lebaran_dates: Iterable of datetime.date (or None for no exclusion).
+    :return: Sorted, de-duplicated numpy array of datetime64[D].
+    """
+    if lebaran_dates is None:
+        return np.array([], dtype='datetime64[D]')
+    return np.unique(np.array(list(lebaran_dates), dtype='datetime64[D]'))
+
+#vectorized version of days_excluding_lebaran for whole columns
+def days_excluding_lebaran_vectorized(start_dates, end_dates, lebaran_calendar=None):
+    """
+    Columnar equivalent of days_excluding_lebaran: signed day difference between
+    two date columns minus the Lebaran days inside the (start, end] span.
+
+    Uses the cumulative count of excluded days (searchsorted on the sorted calendar),
+    so excluded(start, end] = cum(end) - cum(start), which keeps the sign for
+    negative spans exactly like the per-row function.
+
+    :param start_dates: Series/array of start dates (NaT allowed).
+    :param end_dates: Series/array of end dates (NaT allowed).
+    :param lebaran_calendar: Output of build_lebaran_calendar, or a set of dates.
+    :return: float numpy array of signed day counts, NaN where either date is missing.
+    """
+    if not isinstance(lebaran_calendar, np.ndarray):
+        lebaran_calendar = build_lebaran_calendar(lebaran_calendar)
+
+    start_d = pd.to_datetime(pd.Series(start_dates), errors='coerce', dayfirst=True).to_numpy().astype('datetime64[D]')
+    end_d = pd.to_datetime(pd.Series(end_dates), errors='coerce', dayfirst=True).to_numpy().astype('datetime64[D]')
+    is_missing = np.isnat(start_d) | np.isnat(end_d)
+
+    raw_days = (end_d - start_d).astype('int64')
+    excluded_start = np.searchsorted(lebaran_calendar, start_d, side='right')
+    excluded_end = np.searchsorted(lebaran_calendar, end_d, side='right')
+
+    result = (raw_days - (excluded_end - excluded_start)).astype(float)
+    result[is_missing] = np.nan
+    return result
+
 #freight type
 def determine_freight(row, freight_mapping, rara_map, ryi_map, way_map, sln_map):
     supplier = row['Supplier']
@@ -422,6 +751,70 @@ def determine_freight(row, freight_mapping, rara_map, ryi_map, way_map, sln_map)
         
     return "Other Freight"
 
+#PO-number based freight maps, in precedence order after the supplier mapping
+FREIGHT_PO_VENDORS = ['RARA', 'RYI', 'WAY', 'SLN']
+SLN_SUPPLIER_NAME = "PT SYAMSUDDIN LOGISTIK NUSANTARA"
+
+#vectorized freight type for Jasa Logistik rows only
+def resolve_logistic_freight(item_category_series, supplier_series, po_number_series, freight_mapping, rara_map, ryi_map, way_map, sln_map, stats=None):
+    """
+    Column version of determine_freight, restricted to 'Jasa Logistik' rows.
+    Supplier precedence is resolved once per unique supplier, then each vendor's
+    PO map is joined over the unique PO numbers of that vendor's rows.
+
+    :param stats: Optional masked_compute stats dict.
+    :return: object numpy array, '' for rows that are not 'Jasa Logistik'.
+    """
+    is_jasa_logistik = (_text_series(item_category_series) == 'Jasa Logistik').to_numpy()
+    return masked_compute(
+        is_jasa_logistik,
+        lambda suppliers, po_numbers: _jasa_logistik_freight(suppliers, po_numbers, freight_mapping, rara_map, ryi_map, way_map, sln_map),
+        [supplier_series, po_number_series], fill='', dtype=object, stats=stats, name='LOGISTIC_FREIGHT'
+    )
+
+def _jasa_logistik_freight(supplier_series, po_number_series, freight_mapping, rara_map, ryi_map, way_map, sln_map):
+    supplier_codes, supplier_uniques = pd.factorize(supplier_series.to_numpy(dtype=object))
+    po_numbers = po_number_series.to_numpy(dtype=object)
+
+    #per unique supplier: direct mapping first, then the vendor whose PO map applies
+    suppliers = pd.Series(supplier_uniques, dtype=object)
+    supplier_upper = _text_series(suppliers).str.upper()
+    is_str = supplier_upper.notna()
+    direct = suppliers.map(freight_mapping).where(is_str)
+    vendor = np.select(
+        [
+            direct.notna(),
+            supplier_upper.str.contains('RARA', regex=False, na=False),
+            supplier_upper.str.contains('RYI', regex=False, na=False),
+            supplier_upper.str.contains('WAY', regex=False, na=False),
+            supplier_upper == SLN_SUPPLIER_NAME,
+        ],
+        ['DIRECT'] + FREIGHT_PO_VENDORS,
+        default='OTHER',
+    )
+
+    #code -1 (missing supplier) picks the trailing "Other Freight" entry
+    row_vendor = np.append(vendor, 'OTHER')[supplier_codes]
+    row_direct = np.append(direct.to_numpy(dtype=object), None)[supplier_codes]
+
+    jasa_freight = np.full(len(po_numbers), "Other Freight", dtype=object)
+    is_direct = row_vendor == 'DIRECT'
+    jasa_freight[is_direct] = row_direct[is_direct]
+
+    for vendor_name, po_map in zip(FREIGHT_PO_VENDORS, [rara_map, ryi_map, way_map, sln_map]):
+        is_vendor = row_vendor == vendor_name
+        if not is_vendor.any():
+            continue
+        po_codes, po_uniques = pd.factorize(po_numbers[is_vendor])
+        mapped = pd.Series(po_uniques, dtype=object).map(po_map).to_numpy(dtype=object)
+        mapped = np.append(mapped, None)[po_codes]
+        jasa_freight[is_vendor] = np.where(pd.isna(mapped), f"Unknown {vendor_name} Freight", mapped)
+    return jasa_freight
+
+#pattern kept byte-identical to the original extractor; note the escaped backslashes are part of its current behaviour
+FINALISASI_DATE_PATTERN = r"finalisasi.*?\\s*(\\d{1,2}[/\\s][A-Za-z0-9]{2,3}[/\\s]\\d{4})"
+FINALISASI_DATE_FORMATS = ['%d/%m/%Y', '%d %m %Y', '%d/%b/%Y', '%d %b %Y']
+
 #take finalization date
 def extract_finalisasi_date(text):
     """
@@ -432,8 +825,7 @@ def extract_finalisasi_date(text):
         return None
     text = str(text)
     # Matches "Finalisasi" followed by optional characters, whitespace, and a date pattern
-    regex = r"finalisasi.*?\\s*(\\d{1,2}[/\\s][A-Za-z0-9]{2,3}[/\\s]\\d{4})"
-    match = re.search(regex, text, re.IGNORECASE)
+    match = re.search(FINALISASI_DATE_PATTERN, text, re.IGNORECASE)
     if match:
         date_string = match.group(1).strip().replace('.', '')
         try:
@@ -443,6 +835,72 @@ def extract_finalisasi_date(text):
     else:
         return None
 
+def _parse_finalisasi_date_string(date_string):
+    for fmt in FINALISASI_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(date_string, fmt).date()
+        except ValueError:
+            continue
+    #anything outside the fixed formats keeps the dayfirst parser of the per-row version
+    try:
+        return pd.to_datetime(date_string, dayfirst=True, errors='raise').date()
+    except Exception:
+        return None
+
+def extract_finalisasi_dates(status_series):
+    """
+    Column version of extract_finalisasi_date: str.extract over the distinct
+    'Req Progress Status' texts, one parse per distinct matched date string,
+    mapped back to every row.
+
+    :return: object Series of datetime.date / None aligned to status_series.
+    """
+    codes, uniques = pd.factorize(status_series)
+    texts = pd.Series(uniques, dtype=object).astype(str)
+    matched = texts.str.extract(FINALISASI_DATE_PATTERN, flags=re.IGNORECASE, expand=False)
+    date_strings = matched.str.strip().str.replace('.', '', regex=False)
+
+    string_codes, string_uniques = pd.factorize(date_strings)
+    parsed = np.array([_parse_finalisasi_date_string(d) for d in string_uniques] + [None], dtype=object)
+
+    #missing status (code -1) and texts without a match both end up as None
+    per_unique = np.append(parsed[string_codes], None)
+    return pd.Series(per_unique[codes], index=status_series.index, dtype=object)
+
+#regression check of the column extractor against the per-row reference
+def verify_finalisasi_extraction(status_series):
+    """Returns the number of rows where extract_finalisasi_dates differs from extract_finalisasi_date."""
+    reference = status_series.apply(extract_finalisasi_date).reset_index(drop=True)
+    vectorized = extract_finalisasi_dates(status_series).reset_index(drop=True)
+    same = (reference == vectorized) | (reference.isna() & vectorized.isna())
+    return int((~same).sum())
+
+#status label sets; a label's position is its int8 code and -1 means missing
+ON_TIME_STATUSES = ['On Time', 'Late']
+REC_STATUSES = ['On Time', 'Late', '']
+URGENT_STATUSES = ['Normal', 'Urgent']
+URGENT_FINAL_STATUSES = ['Normal', 'Urgent', 'Urgent*']
+RECEIVE_PO_STATUSES = ["PO Not Received", "Fully Received", "Partial Received"]
+TL_RECEIVE_STATUSES = ["Without Logistical Process", "PO Not Received", "Transfer List Preparation", "On Transit", "At Intermediate Location", "Fully Received", "Partial Received", "Check Status"]
+
+def status_categorical(codes, categories):
+    """Wraps int8 status codes (-1 = missing) as a pd.Categorical with the given labels."""
+    return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int8), categories=categories)
+
+def on_time_flags(status_codes, on_time_code=0, late_code=1):
+    """
+    Derives the (ON_TIME, LATE, ON_TIME%) flag arrays from status codes.
+
+    :return: A tuple of float arrays: 1/NaN, 1/NaN and 1/0/NaN.
+    """
+    status_codes = np.asarray(status_codes)
+    is_on_time = status_codes == on_time_code
+    is_late = status_codes == late_code
+    on_time_series = np.where(is_on_time, 1, np.nan)
+    late_series = np.where(is_late, 1, np.nan)
+    on_time_percent_series = np.where(is_on_time, 1, np.where(is_late, 0, np.nan))
+    return on_time_series, late_series, on_time_percent_series
+
 #for determining ontime status
 def calculate_purchasing_status(procurement_name_series, duration_series):
     """
@@ -450,7 +908,7 @@ def calculate_purchasing_status(procurement_name_series, duration_series):
     
     :param procurement_name_series: Series containing 'Procurement Name'.
     :param duration_series: Series containing 'Purchasing_Duration' (days).
-    :return: A tuple of (status_series, on_time_series, late_series, on_time_percent_series)
+    :return: A tuple of (status_categorical, on_time_series, late_series, on_time_percent_series)
     """
     
     #Define team members (Core Business Rule)
@@ -471,16 +929,272 @@ def calculate_purchasing_status(procurement_name_series, duration_series):
         (is_site_team) & (duration_series <= 3),
         (is_site_team) & (duration_series > 3)
     ]
-    choices = ['On Time', 'Late', 'On Time', 'Late']
+    #codes into ON_TIME_STATUSES
+    choices = [0, 1, 0, 1]
     
-    status_series = np.select(conditions, choices, default=None)
+    status_codes = np.select(conditions, choices, default=-1)
     
     #calculate flag and ontime marker
-    on_time_series = np.where(status_series == 'On Time', 1, np.nan)
-    late_series = np.where(status_series == 'Late', 1, np.nan)
-    on_time_percent_series = np.where(status_series == 'On Time', 1, np.where(status_series == 'Late', 0, np.nan))
+    on_time_series, late_series, on_time_percent_series = on_time_flags(status_codes)
     
-    return status_series, on_time_series, late_series, on_time_percent_series
+    return status_categorical(status_codes, ON_TIME_STATUSES), on_time_series, late_series, on_time_percent_series
+
+#PO group index shared by every per-PO transform of a run, so PO Number is hashed once
+def build_po_group_index(po_series, codes=None):
+    """
+    Factorizes the PO Number column once.
+
+    :param po_series: The raw 'PO Number' Series.
+    :param codes: Optional pd.factorize codes of po_series that were already computed.
+    :return: dict with
+        codes           - int64 group code per row, -1 for a missing PO Number (dropped like groupby does),
+        n_groups        - number of distinct PO Numbers,
+        sizes           - rows per group,
+        first_positions - row position of each group's first row,
+        is_first        - per-row flag equal to ~duplicated() (missing PO Numbers count as one group),
+        order / starts  - rows sorted by group and each group's offset, for reduceat reductions.
+    """
+    if codes is None:
+        codes, _ = pd.factorize(po_series)
+    codes = codes.astype(np.int64)
+    n_groups = int(codes.max()) + 1 if len(codes) else 0
+    valid = codes >= 0
+
+    # factorize numbers groups by first appearance, so a row opens its group when its code exceeds every earlier code
+    running_max = np.maximum.accumulate(np.r_[-1, codes[:-1]]) if len(codes) else codes
+    is_first = valid & (codes > running_max)
+    first_positions = np.flatnonzero(is_first)
+    if (~valid).any():
+        is_first[np.argmax(~valid)] = True
+
+    order = np.argsort(np.where(valid, codes, n_groups), kind='stable')[:int(valid.sum())]
+    sizes = np.bincount(codes[valid], minlength=n_groups)
+    starts = np.r_[0, np.cumsum(sizes)[:-1]] if n_groups else np.array([], dtype=np.int64)
+
+    return {
+        'codes': codes, 'n_groups': n_groups, 'sizes': sizes, 'first_positions': first_positions,
+        'is_first': is_first, 'order': order, 'starts': starts,
+    }
+
+def _broadcast_po_groups(po_groups, per_group):
+    # Code -1 (missing PO Number) picks the trailing NaN, like groupby().transform
+    return np.append(per_group.astype(float), np.nan)[po_groups['codes']]
+
+def po_group_size(po_groups):
+    """Per-row size of the row's PO group, groupby('PO Number')['PO Number'].transform('count')."""
+    return _broadcast_po_groups(po_groups, po_groups['sizes'])
+
+def po_group_sum(po_groups, values):
+    """Per-row NaN-skipping group sum, groupby('PO Number')[col].transform('sum')."""
+    values = np.asarray(values, dtype=float)
+    weights = np.where(np.isnan(values), 0.0, values)
+    valid = po_groups['codes'] >= 0
+    sums = np.bincount(po_groups['codes'][valid], weights=weights[valid], minlength=po_groups['n_groups'])
+    return _broadcast_po_groups(po_groups, sums)
+
+def po_group_max(po_groups, values):
+    """Per-row NaN-skipping group max, groupby('PO Number')[col].transform('max')."""
+    if po_groups['n_groups'] == 0:
+        return np.full(len(po_groups['codes']), np.nan)
+    values = np.asarray(values, dtype=float)
+    maxima = np.fmax.reduceat(values[po_groups['order']], po_groups['starts'])
+    return _broadcast_po_groups(po_groups, maxima)
+
+#Composite join keys: the reference side of a join is indexed once (distinct cleaned values per
+#key column, per-row codes packed into one int64), main-frame keys are packed against that index,
+#so joins compare integers instead of concatenated key strings built over the whole frame
+def clean_id_text(values):
+    """
+    Cleanup rule for ID-like key parts: str() of the value, one trailing '.0' removed
+    (an ID read as float, '123.0' == '123'), then stripped. Missing values stay missing.
+    """
+    return pd.Series(values).astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
+
+def key_text(values):
+    """Cleanup rule for plain text key parts: str() of the value, missing values stay missing."""
+    return pd.Series(values).astype(str)
+
+def stripped_key_text(values):
+    """Cleanup rule for PO Number key parts: str() of the value, stripped."""
+    return pd.Series(values).astype(str).str.strip()
+
+def location_key_text(values):
+    """Cleanup rule for location names: stripped and lower-cased, non-text values become missing."""
+    return _text_series(pd.Series(values)).str.strip().str.lower()
+
+def lower_text(values):
+    """Lower-cased text, non-text values become missing."""
+    return _text_series(pd.Series(values)).str.lower()
+
+#normalized variants of a column shared through the text view cache, also the key rules of the reference registry
+TEXT_VARIANTS = {
+    'raw': lambda values: pd.Series(values),
+    'str': key_text,
+    'str_strip': stripped_key_text,
+    'id_text': clean_id_text,
+    'lower': lower_text,
+    'strip_lower': location_key_text,
+}
+
+#Per-run cache of normalized column views: a column is factorized once and every variant is
+#computed on its distinct values once, then shared by all stages. Entries belong to the frame's
+#index object, so a join that rebuilds the rows invalidates them; run_stages drops the entries
+#of the columns each stage rewrites.
+def unique_text_view(cache, df, column, variant):
+    """
+    :param cache: dict kept for one run (ctx['text_views']).
+    :param variant: TEXT_VARIANTS name.
+    :return: (codes, values) - row codes of df[column] (-1 for missing) and the variant of each
+             distinct value. values may repeat when the variant merges distinct raw values.
+    """
+    entry = cache.get(column)
+    if entry is None or entry['index'] is not df.index:
+        codes, uniques = pd.factorize(df[column])
+        entry = cache[column] = {'index': df.index, 'codes': codes, 'uniques': pd.Series(uniques), 'variants': {}, 'views': {}}
+    if variant not in entry['variants']:
+        entry['variants'][variant] = TEXT_VARIANTS[variant](entry['uniques']).reset_index(drop=True)
+    return entry['codes'], entry['variants'][variant]
+
+def text_view(cache, df, column, variant):
+    """Full-length variant of df[column] (missing rows stay missing), built once per cache entry."""
+    codes, values = unique_text_view(cache, df, column, variant)
+    views = cache[column]['views']
+    if variant not in views:
+        views[variant] = take_matched(values, codes, index=df.index)
+    return views[variant]
+
+def invalidate_text_views(cache, columns):
+    """Drops the cached views of columns that were rewritten."""
+    for column in columns:
+        cache.pop(column, None)
+
+def build_key_index(columns, clean=None, missing='part'):
+    """
+    Indexes the reference side of a (multi-column) join key once.
+
+    :param columns: List of key Series from the reference table.
+    :param clean: Optional rule applied to the distinct values of every key part before matching
+                  (clean_id_text, key_text, ...). None compares the raw values.
+    :param missing: 'part' - a missing part is an ordinary value matched part by part (MultiIndex lookups);
+                    'key'  - a missing part makes the whole key missing and missing keys match each other
+                             (what a merge or map on concatenated key strings does, since NaN + text is NaN).
+    :return: dict with parts (pd.Index of the distinct cleaned values of each key column),
+             keys (int64 packed key per reference row, -1 for a missing key), clean and missing.
+    """
+    keys = np.zeros(len(columns[0]), dtype=np.int64)
+    is_missing = np.zeros(len(keys), dtype=bool)
+    parts = []
+    for column in columns:
+        codes, uniques = pd.factorize(column)
+        values = clean(uniques) if clean is not None else pd.Series(uniques)
+        # cleaning can merge distinct raw values ('123.0' and '123'), so factorize again
+        part_codes, part_values = pd.factorize(pd.Series(values, dtype=object))
+        row_codes = np.append(part_codes, -1)[codes]
+        part_values = list(part_values)
+        if missing == 'part':
+            row_codes = np.where(row_codes < 0, len(part_values), row_codes)
+            part_values.append(np.nan)
+        parts.append(pd.Index(part_values, dtype=object))
+        is_missing |= row_codes < 0
+        # shift by one so a missing part (-1) packs as 0
+        keys = keys * (len(part_values) + 1) + row_codes + 1
+
+    if missing == 'key':
+        keys[is_missing] = -1
+    return {'parts': parts, 'keys': keys, 'clean': clean, 'missing': missing}
+
+def key_index_codes(key_index, columns, clean=True):
+    """
+    Packs main-frame key columns against a build_key_index result. Only the distinct
+    values of each column are cleaned and looked up.
+
+    :param columns: List of key Series, or (codes, values) pairs from unique_text_view.
+    :param clean: True applies the index's own cleanup rule, False treats the columns as already clean.
+    :return: int64 array; equal to the reference key where the keys match, -1 for a missing key
+             (missing='key'), -2 for keys absent from the reference.
+    """
+    rule = key_index['clean'] if clean else None
+    factorized = [column if isinstance(column, tuple) else pd.factorize(column) for column in columns]
+    keys = np.zeros(len(factorized[0][0]), dtype=np.int64)
+    is_missing = np.zeros(len(keys), dtype=bool)
+    is_absent = np.zeros(len(keys), dtype=bool)
+    for (codes, uniques), part_values in zip(factorized, key_index['parts']):
+        values = pd.Series(rule(uniques) if rule is not None else uniques, dtype=object)
+        unique_codes = part_values.get_indexer(pd.Index(values, dtype=object))
+        unique_missing = values.isna().to_numpy()
+        missing_code = part_values.get_indexer(pd.Index([np.nan], dtype=object))[0] if key_index['missing'] == 'part' else -1
+        row_codes = np.append(unique_codes, missing_code)[codes]
+        row_missing = np.append(unique_missing, True)[codes]
+        if key_index['missing'] == 'key':
+            is_missing |= row_missing
+            is_absent |= (row_codes < 0) & ~row_missing
+        else:
+            is_absent |= row_codes < 0
+        keys = keys * (len(part_values) + 1) + row_codes + 1
+
+    keys[is_missing] = -1
+    keys[is_absent & ~is_missing] = -2
+    return keys
+
+def composite_key_codes(left_columns, right_columns, clean=None, missing='part'):
+    """
+    Packs multi-column join keys of the main frame and a reference table into comparable int64 codes.
+    See build_key_index for clean and missing.
+
+    :param left_columns: List of key Series from the main frame.
+    :param right_columns: List of key Series from the reference table, in the same order.
+    :return: (left_keys, right_keys) int64 arrays; a left key equals a right key exactly when the keys match.
+    """
+    key_index = build_key_index(right_columns, clean=clean, missing=missing)
+    return key_index_codes(key_index, left_columns), key_index['keys']
+
+def first_match_positions(left_keys, right_keys):
+    """
+    Row position of each left key's first occurrence in right_keys, -1 when it has none.
+    Same rows as drop_duplicates(keep='first') on the reference followed by a map.
+    """
+    right_index = pd.Index(right_keys)
+    first_rows = np.flatnonzero(~right_index.duplicated())
+    positions = pd.Index(right_keys[first_rows]).get_indexer(left_keys)
+    return np.append(first_rows, -1)[positions]
+
+def take_matched(series, positions, index=None):
+    """Values of series at positions (keeping its dtype), NaN where the position is -1."""
+    if len(series) == 0:
+        return pd.Series(np.nan, index=index if index is not None else pd.RangeIndex(len(positions)))
+    taken = series.iloc[np.maximum(positions, 0)]
+    taken.index = index if index is not None else pd.RangeIndex(len(positions))
+    return taken.where(positions >= 0)
+
+#equivalence check between composite_key_codes and the string keys it replaces
+def verify_composite_keys(left_columns, right_columns, clean=None, missing='part', separator=''):
+    """
+    Builds the old keys - the cleaned parts concatenated with separator for missing='key',
+    tuples of the parts for missing='part' - and checks that every left row matches
+    the same reference rows through the packed codes. Returns True when it does.
+    """
+    def old_keys(columns):
+        parts = [(clean(col) if clean is not None else pd.Series(col)).reset_index(drop=True) for col in columns]
+        if missing == 'key':
+            joined = parts[0]
+            for part in parts[1:]:
+                joined = joined + separator + part
+            return joined.astype(object)
+        # every missing value is one None, like a MultiIndex level code of -1
+        return pd.Series(list(zip(*[part.astype(object).where(part.notna(), None) for part in parts])), dtype=object)
+
+    left_keys, right_keys = composite_key_codes(left_columns, right_columns, clean=clean, missing=missing)
+    old_codes, _ = pd.factorize(pd.concat([old_keys(left_columns), old_keys(right_columns)], ignore_index=True), use_na_sentinel=False)
+    left_old, right_old = old_codes[:len(left_keys)], old_codes[len(left_keys):]
+
+    # reference rows: one packed code per old key and the other way round
+    pairs = pd.DataFrame({'NEW': right_keys, 'OLD': right_old}).drop_duplicates()
+    if not len(pairs) == pairs['NEW'].nunique() == pairs['OLD'].nunique():
+        return False
+    expected = pd.Series(left_old).map(pairs.set_index('OLD')['NEW']).to_numpy()
+    matched = ~pd.isna(expected)
+    same = np.where(matched, left_keys == np.where(matched, expected, 0), ~np.isin(left_keys, right_keys))
+    return bool(same.all())
 
 if __name__ == '__main__':
-    print("data_helpers.py is a utility module. Functions defined.")
\ No newline at end of file
+    print("data_helpers.py is a utility module. Functions defined.")
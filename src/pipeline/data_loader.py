@@ -1,6 +1,19 @@
 import pandas as pd
 import os
+import io
+import time
+import hashlib
+import urllib.request
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from dtype_plan import optimize_dtypes
+
+# Rust-backed xlsx reader (same package as to_parquet/excel_to_parquet.py), openpyxl is used without it
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
 
 project_root = '../../' 
 raw_dir = os.path.join(project_root, 'data', 'po_entry') 
@@ -48,12 +61,210 @@ sln_path = f'https://docs.google.com/spreadsheets/d/{sheet_id}/{exportformat}{sl
 normalisasi_rfm_solar_path = f'https://docs.google.com/spreadsheets/d/{sheet_id}/{exportformat}{normalisasi_rfm_solar_id}'
 lebaran_dates_path = f'https://docs.google.com/spreadsheets/d/{sheet_id}/{exportformat}{lebaran_dates_id}'
 
-def load_all_data(refresh_cache=False):
-    data = {}
-    
-    # 1. Load Main Data with automatic timestamp-based caching
-    xlsx_path = os.path.join(raw_dir, "PO Entry List.xlsx")
-    parquet_path = os.path.join(raw_dir, "PO_Entry_List.parquet")
+#reference tables: data key -> (parquet cache file in reference_dir, Google Sheets CSV export URL)
+REFERENCE_SHEETS = {
+    'holidays_df': ('holidays.parquet', nonworkdays_path),
+    'wilayah_df': ('wilayah.parquet', wilayah_path),
+    'pulau_df': ('pulau.parquet', pulau_path),
+    'jasa_service_df': ('jasa_service.parquet', jasa_service_path),
+    'cost_saving_df': ('cost_saving.parquet', cost_saving_path),
+    'freight_df': ('freight.parquet', freight_path),
+    'rara_df': ('rara.parquet', rara_path),
+    'ryi_df': ('ryi.parquet', ryi_path),
+    'way_df': ('way.parquet', way_path),
+    'sln_df': ('sln.parquet', sln_path),
+    'rfm_normalized_df': ('rfm_normalized.parquet', normalisasi_rfm_path),
+    'ontime_normalized_df': ('ontime_normalized.parquet', normalisasi_po_path),
+    'timedate_normalized_df': ('timedate_normalized.parquet', timedate_path),
+    'notcounted_df': ('notcounted.parquet', notcounted_po_path),
+    'logistic_normalized_df': ('logistic_normalized.parquet', normalisasi_logistic_path),
+    'normalisasi_rfm_solar_df': ('normalisasi_rfm_solar.parquet', normalisasi_rfm_solar_path),
+    'lebaran_dates_df': ('lebaran_dates.parquet', lebaran_dates_path),
+}
+
+#reference downloads run in parallel on a bounded thread pool, each request limited to the timeout (seconds)
+REFERENCE_DOWNLOAD_WORKERS = 8
+REFERENCE_DOWNLOAD_TIMEOUT = 30
+
+#sha256 of the last downloaded CSV export per reference table, kept next to the parquet caches
+REFERENCE_MANIFEST = 'reference_manifest.parquet'
+
+def read_reference_manifest():
+    """Returns {data key: sha256 of the CSV payload the parquet cache was written from}."""
+    path = os.path.join(reference_dir, REFERENCE_MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    try:
+        manifest = pd.read_parquet(path, engine='pyarrow')
+        return dict(zip(manifest['KEY'], manifest['SHA256']))
+    except Exception as e:
+        print(f"Warning: Failed to read reference manifest, every downloaded table will be rewritten: {e}")
+        return {}
+
+def write_reference_manifest(hashes):
+    try:
+        pd.DataFrame({'KEY': list(hashes), 'SHA256': list(hashes.values())}).to_parquet(
+            os.path.join(reference_dir, REFERENCE_MANIFEST), index=False, engine='pyarrow')
+    except Exception as e:
+        print(f"Warning: Failed to save reference manifest: {e}")
+
+def fetch_reference_csv(url_path, timeout=None):
+    """Downloads one CSV export, returns (payload bytes, sha256 hex digest)."""
+    with urllib.request.urlopen(url_path, timeout=timeout or REFERENCE_DOWNLOAD_TIMEOUT) as response:
+        payload = response.read()
+    return payload, hashlib.sha256(payload).hexdigest()
+
+def download_references(keys, workers=None, timeout=None):
+    """
+    Fetches the CSV exports of the given REFERENCE_SHEETS keys concurrently.
+
+    :return: dict {key: (payload, sha256)} or {key: exception} for failed downloads.
+    """
+    def fetch(key):
+        try:
+            return fetch_reference_csv(REFERENCE_SHEETS[key][1], timeout)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(min(workers or REFERENCE_DOWNLOAD_WORKERS, len(keys)), 1)) as pool:
+        return dict(zip(keys, pool.map(fetch, keys)))
+
+def refresh_references(data, keys, refresh_stats=None):
+    """
+    Downloads the reference tables in keys into data. A payload whose hash matches the
+    manifest keeps its parquet cache untouched (same content, so the reference registry and
+    incremental fingerprints stay valid); changed payloads are parsed and rewritten.
+
+    :param refresh_stats: Optional dict receiving the changed / unchanged / failed keys and seconds.
+    """
+    hashes = read_reference_manifest()
+    started = time.perf_counter()
+    print(f"Downloading {len(keys)} reference tables from Google Sheets...")
+    fetched = download_references(keys)
+
+    stats = {'changed': [], 'unchanged': [], 'failed': []}
+    error = None
+    for key in keys:
+        pq_name, url_path = REFERENCE_SHEETS[key]
+        pq_path = os.path.join(reference_dir, pq_name)
+        outcome = fetched[key]
+
+        if not isinstance(outcome, Exception):
+            payload, digest = outcome
+            if hashes.get(key) == digest and os.path.exists(pq_path):
+                try:
+                    data[key] = pd.read_parquet(pq_path, engine='pyarrow')
+                    stats['unchanged'].append(key)
+                    continue
+                except Exception as e:
+                    print(f"Error reading cache for {key}, rewriting it: {e}")
+            try:
+                data[key] = pd.read_csv(io.BytesIO(payload))
+                # Save to cache
+                data[key].to_parquet(pq_path, index=False, engine='pyarrow')
+                hashes[key] = digest
+                stats['changed'].append(key)
+                continue
+            except Exception as e:
+                outcome = e
+
+        stats['failed'].append(key)
+        hashes.pop(key, None)
+        print(f"Failed to download {key} from {url_path}: {outcome}")
+        # Special fallback for lebaran_dates_df
+        if key == 'lebaran_dates_df':
+            print("Using hardcoded fallback defaults for Lebaran dates...")
+            default_lebaran_df = pd.DataFrame([
+                {"YEAR": 2025, "START_DATE": "2025-03-28", "END_DATE": "2025-04-13"},
+                {"YEAR": 2026, "START_DATE": "2026-03-18", "END_DATE": "2026-03-31"}
+            ])
+            data[key] = default_lebaran_df
+            # Cache the fallback so we don't try downloading it again unless forced
+            default_lebaran_df.to_parquet(pq_path, index=False, engine='pyarrow')
+        elif os.path.exists(pq_path):
+            # Check if cache exists as fallback even if refresh_cache was True
+            print(f"Loading cached version of {key} as fallback...")
+            data[key] = pd.read_parquet(pq_path, engine='pyarrow')
+        elif error is None:
+            error = outcome
+
+    write_reference_manifest(hashes)
+    stats['seconds'] = time.perf_counter() - started
+    print(f"Reference refresh took {stats['seconds']:.2f}s: {len(stats['changed'])} changed, {len(stats['unchanged'])} unchanged, {len(stats['failed'])} failed")
+    if refresh_stats is not None:
+        refresh_stats.update(stats)
+    if error is not None:
+        raise error
+
+#sheet of PO Entry List.xlsx holding the CPS export, a sheet name or a 0-based position
+PO_ENTRY_SHEET = 0
+
+#raw export columns typed right after the xlsx is read: only the dates prepare_dates parses
+#(processing_steps.DATE_COLUMNS, day-first the same way) and the amounts and quantities the
+#financial and receiving stages compute with; every other column keeps what the workbook holds
+PO_ENTRY_DATE_COLUMNS = [
+    "Requisition Approved Date", "Requisition Required Date", "PO Submit Date",
+    "PO Approval Date", "Receive PO Date", "Created TL Date", "Shipped Date",
+    "Received TL Date", "PO Required Date"
+]
+PO_ENTRY_NUMERIC_COLUMNS = [
+    "Exchange Rate", "PO Price", "Qty Order", "Jumlah PPN", "Requisition SubTotal",
+    "Qty Received", "Qty Shipped", "TL Qty Received"
+]
+
+def excel_engine():
+    """'calamine' when python-calamine is installed, otherwise 'openpyxl'."""
+    return 'calamine' if python_calamine is not None else 'openpyxl'
+
+def convert_po_entry_types(df):
+    """
+    Converts the PO_ENTRY_DATE_COLUMNS / PO_ENTRY_NUMERIC_COLUMNS present in df in place and returns it.
+    Cells that cannot be parsed become NaT / NaN; their count per column is printed.
+    """
+    coerced = {}
+    for col in PO_ENTRY_DATE_COLUMNS + PO_ENTRY_NUMERIC_COLUMNS:
+        if col not in df.columns:
+            continue
+        if col in PO_ENTRY_DATE_COLUMNS:
+            if pd.api.types.is_datetime64_any_dtype(df[col]):
+                continue
+            converted = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
+        else:
+            if pd.api.types.is_numeric_dtype(df[col]):
+                continue
+            converted = pd.to_numeric(df[col], errors='coerce')
+        lost = int((df[col].notna() & converted.isna()).sum())
+        if lost:
+            coerced[col] = lost
+        df[col] = converted
+    if coerced:
+        print("Warning: unparseable PO Entry List cells set to missing: " + ", ".join(f"{col} {count}" for col, count in coerced.items()))
+    return df
+
+def read_po_entry_excel(xlsx_path, sheet=None, engine=None):
+    """
+    Reads the PO Entry List workbook with the calamine engine (openpyxl when
+    python-calamine is missing) and applies convert_po_entry_types.
+
+    :param sheet: Sheet name or 0-based position, defaults to PO_ENTRY_SHEET.
+    :param engine: Force 'calamine' or 'openpyxl', defaults to excel_engine().
+    :return: DataFrame of the sheet.
+    """
+    sheet = PO_ENTRY_SHEET if sheet is None else sheet
+    engine = engine or excel_engine()
+    started = time.perf_counter()
+    df = pd.read_excel(xlsx_path, sheet_name=sheet, engine=engine)
+    df = convert_po_entry_types(df)
+    print(f"Read sheet {sheet!r} of {os.path.basename(xlsx_path)} with {engine} in {time.perf_counter() - started:.1f}s ({len(df)} rows)")
+    return df
+
+def po_entry_paths():
+    """Returns (xlsx_path, parquet_path) of the PO Entry List and its Parquet cache."""
+    return os.path.join(raw_dir, "PO Entry List.xlsx"), os.path.join(raw_dir, "PO_Entry_List.parquet")
+
+def load_po_entry_list():
+    """Loads the PO Entry List with automatic timestamp-based Parquet caching."""
+    xlsx_path, parquet_path = po_entry_paths()
     
     try:
         if os.path.exists(xlsx_path):
@@ -61,50 +272,60 @@ def load_all_data(refresh_cache=False):
             # Check if parquet exists and is newer than xlsx
             if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) > xlsx_mtime:
                 print("Loading PO Entry List from Parquet cache...")
-                data['df'] = pd.read_parquet(parquet_path, engine='pyarrow')
+                return pd.read_parquet(parquet_path, engine='pyarrow')
             else:
-                print("Excel file changed or cache missing. Loading PO Entry List.xlsx (takes ~45s)...")
-                data['df'] = pd.read_excel(xlsx_path)
-                data['df'].to_parquet(parquet_path, index=False, engine='pyarrow')
+                print(f"Excel file changed or cache missing. Loading PO Entry List.xlsx with {excel_engine()}...")
+                df = read_po_entry_excel(xlsx_path)
+                df.to_parquet(parquet_path, index=False, engine='pyarrow')
                 print("Saved PO Entry List to Parquet cache.")
+                return df
         else:
             # Fallback if xlsx_path does not exist but parquet does (e.g. production/offline)
             if os.path.exists(parquet_path):
                 print("PO Entry List.xlsx not found, loading from existing Parquet cache...")
-                data['df'] = pd.read_parquet(parquet_path, engine='pyarrow')
+                return pd.read_parquet(parquet_path, engine='pyarrow')
             else:
                 raise FileNotFoundError(f"Neither {xlsx_path} nor {parquet_path} exists.")
     except Exception as e:
         print(f"Error loading PO Entry List: {e}")
         raise
 
-    # 2. Define Reference Sheets mapping
-    ref_sheets = {
-        'holidays_df': ('holidays.parquet', nonworkdays_path),
-        'wilayah_df': ('wilayah.parquet', wilayah_path),
-        'pulau_df': ('pulau.parquet', pulau_path),
-        'jasa_service_df': ('jasa_service.parquet', jasa_service_path),
-        'cost_saving_df': ('cost_saving.parquet', cost_saving_path),
-        'freight_df': ('freight.parquet', freight_path),
-        'rara_df': ('rara.parquet', rara_path),
-        'ryi_df': ('ryi.parquet', ryi_path),
-        'way_df': ('way.parquet', way_path),
-        'sln_df': ('sln.parquet', sln_path),
-        'rfm_normalized_df': ('rfm_normalized.parquet', normalisasi_rfm_path),
-        'ontime_normalized_df': ('ontime_normalized.parquet', normalisasi_po_path),
-        'timedate_normalized_df': ('timedate_normalized.parquet', timedate_path),
-        'notcounted_df': ('notcounted.parquet', notcounted_po_path),
-        'logistic_normalized_df': ('logistic_normalized.parquet', normalisasi_logistic_path),
-        'normalisasi_rfm_solar_df': ('normalisasi_rfm_solar.parquet', normalisasi_rfm_solar_path),
-        'lebaran_dates_df': ('lebaran_dates.parquet', lebaran_dates_path),
-    }
+def ensure_po_entry_parquet():
+    """
+    Returns the PO Entry List Parquet cache path for readers that stream it in batches,
+    refreshing the cache from the xlsx first when it is missing or stale.
+    """
+    xlsx_path, parquet_path = po_entry_paths()
+    if os.path.exists(xlsx_path) and not (os.path.exists(parquet_path) and os.path.getmtime(parquet_path) > os.path.getmtime(xlsx_path)):
+        load_po_entry_list()
+    if not os.path.exists(parquet_path):
+        raise FileNotFoundError(f"Neither {xlsx_path} nor {parquet_path} exists.")
+    return parquet_path
+
+def load_all_data(refresh_cache=False, include_po_entry=True, compact_dtypes=True, refresh_stats=None):
+    """
+    Loads the PO Entry List and every reference table of REFERENCE_SHEETS from the parquet caches,
+    downloading the missing ones (all of them with refresh_cache) through refresh_references.
+
+    :param refresh_stats: Optional dict receiving the refresh outcome (see refresh_references).
+    :return: dict of DataFrames keyed by 'df' and the REFERENCE_SHEETS keys.
+    """
+    data = {}
+    
+    # 1. Load Main Data (skipped by the streaming runner, which reads the Parquet cache in batches)
+    if include_po_entry:
+        data['df'] = load_po_entry_list()
+        # Categoricals / Arrow strings / int8 / float32 from the dtype plan, kept through processing
+        if compact_dtypes:
+            data['df'] = optimize_dtypes(data['df'], report=True)
 
     # Ensure reference directory exists
     if not os.path.exists(reference_dir):
         os.makedirs(reference_dir)
 
-    # 3. Load or download references
-    for key, (pq_name, url_path) in ref_sheets.items():
+    # 2. Load the reference caches, collecting the tables that have to be downloaded
+    pending = []
+    for key, (pq_name, url_path) in REFERENCE_SHEETS.items():
         pq_path = os.path.join(reference_dir, pq_name)
         
         # Load from Parquet if cache exists and refresh_cache is False
@@ -113,39 +334,13 @@ def load_all_data(refresh_cache=False):
                 data[key] = pd.read_parquet(pq_path, engine='pyarrow')
             except Exception as e:
                 print(f"Error reading cache for {key}, will re-download: {e}")
-                # Force re-download
-                refresh_cache = True
 
-        # Download from URL if refresh_cache is True or local cache is missing
         if key not in data:
-            print(f"Downloading {key} from Google Sheets...")
-            try:
-                data[key] = pd.read_csv(url_path)
-                # Save to cache
-                data[key].to_parquet(pq_path, index=False, engine='pyarrow')
-            except Exception as e:
-                print(f"Failed to download {key} from {url_path}: {e}")
-                # Special fallback for lebaran_dates_df
-                if key == 'lebaran_dates_df':
-                    print("Using hardcoded fallback defaults for Lebaran dates...")
-                    default_lebaran_df = pd.DataFrame([
-                        {"YEAR": [2025, 2026], "START_DATE": ["2025-03-28", "2026-03-18"], "END_DATE": ["2025-04-13", "2026-03-31"]}
-                    ])
-                    # Fix dataframe layout
-                    default_lebaran_df = pd.DataFrame([
-                        {"YEAR": 2025, "START_DATE": "2025-03-28", "END_DATE": "2025-04-13"},
-                        {"YEAR": 2026, "START_DATE": "2026-03-18", "END_DATE": "2026-03-31"}
-                    ])
-                    data[key] = default_lebaran_df
-                    # Cache the fallback so we don't try downloading it again unless forced
-                    default_lebaran_df.to_parquet(pq_path, index=False, engine='pyarrow')
-                else:
-                    # Check if cache exists as fallback even if refresh_cache was True
-                    if os.path.exists(pq_path):
-                        print(f"Loading cached version of {key} as fallback...")
-                        data[key] = pd.read_parquet(pq_path, engine='pyarrow')
-                    else:
-                        raise e
+            pending.append(key)
+
+    # 3. Download them concurrently if refresh_cache is True or local caches are missing
+    if pending:
+        refresh_references(data, pending, refresh_stats)
 
     return data
 
@@ -0,0 +1,239 @@
+import pandas as pd
+import numpy as np
+
+#string columns with at most this share of distinct values become categoricals, the rest Arrow-backed strings
+CATEGORY_MAX_RATIO = 0.1
+
+#columns compared with each other must share one categorical dtype (comparing categoricals needs identical categories)
+SHARED_CATEGORY_GROUPS = [
+    ['PO Receive Location', 'Location TL Received', 'Final Destination Location'],
+]
+
+#amounts, prices, quantities and rates keep their loaded dtype: the financial and receiving stages
+#multiply and sum them, and products of float32 inputs lose precision even when every input is exact
+PRECISION_COLUMNS = [
+    'Exchange Rate', 'PO Price', 'Qty Order', 'PO Disc/Cost', 'PO Sub Total', 'Jumlah PPN',
+    'Qty Received', 'Qty Handover', 'Qty Requisition', 'Requisition Unit Price', 'Requisition SubTotal',
+    'Cost Saving', 'Urgent Cost', 'Qty Shipped', 'TL Qty Received',
+    'REQUISITION_TOTAL', 'PO_TOTAL', 'BUDGET', 'BUDGET%',
+]
+
+#largest magnitude float32 stores every integer exactly
+FLOAT32_EXACT_LIMIT = 2 ** 24
+
+#declared dtype kind of every processed output column (processing_steps.FINAL_COLUMN_ORDER). The
+#output plan comes from this table, not from the rows, so a single run, every streamed batch, every
+#partition and every incremental subset share one schema. Flags and day counts are whole by
+#construction; 'category' / 'text' are Arrow-backed strings, 'datetime' is datetime64[us]
+OUTPUT_COLUMN_KINDS = {
+    'category': [
+        'Requisition Type', 'Item Category', 'Department', 'Unit', 'Currency', 'PO Receive Location',
+        'Supplier', 'Supplier Location', 'Term of Payment', 'PO Status', 'PO Progress Status',
+        'Asset / Non Asset', 'Routine', 'Urgent', 'Background Needs', 'Procurement Name', 'Req Status',
+        'Shipping Type', 'Location TL Received', 'Final Destination Location', 'CATEGORYMERGED', 'LOC',
+        'URGENT_NORMAL', 'NORMAL', 'URGENT2', 'URGENT*', 'URGENT_FINALFORLOGBOOK', 'WILAYAH', 'PULAU',
+        'DEPARTMENT_', 'DIVISI', 'SUPPLIER_', 'TOP', 'Background Update', 'STATUS REC', 'RECEIVE_PO_STATUS',
+        'TL_RECEIVE_INFO', 'TRANSFER_ITEM', 'SHIPPING_TYPE_LAND', 'SHIPPING_TYPE_SEA', 'SHIPPING_TYPE_AIR',
+        'LOGISTIC_FREIGHT', 'PO_RECEIVE', 'JS_SERVICE', 'STATUS_Purchasing', '_Routine',
+    ],
+    'text': [
+        'Item Name', 'PO Number', 'Requisition Number', 'Urgent Note', 'Req Progress Status', 'TL Number', 'Remarks',
+    ],
+    'int8': [
+        'VALUE', 'UNIQUE COUNT PO', 'LOGISTICAL_PROCESS', 'RECEIVE_INDICATOR_PO', 'TL_NUMBER_?',
+        'RECEIVE_INDICATOR_LOGISTIC', 'FULLY_RECEIVE_INFO',
+    ],
+    'float32': [
+        'LEAD TIME', 'PR - PO', 'PO SUB - PO APP', 'PO - R PO', 'R-R SITE', 'PR - PO SUB WD', 'PO SUB - PO APP WD',
+        'RPO-TLC', 'TLC-SHIP', 'SHIP-RSITE', 'REC', 'ON_TIME', 'LATE', 'ON_TIME%', 'RECEIVED', 'NOT_RECEIVED',
+        'ON_TIME%_overall_original', 'ON_TIME%_original_purchasing', 'ON_TIME%_logistic', 'Purchasing_Duration',
+        'ON_TIME_Purchasing', 'LATE_Purchasing', 'ON_TIME%_Purchasing', 'Total_Logistic_Lead_Time', 'logistic_on_time',
+    ],
+    'float64': PRECISION_COLUMNS + ['Item ID', 'Final_ItemID'],
+    'datetime': [
+        'PO Submit Date', 'PO Required Date', 'PO Approval Date', 'Receive PO Estimation', 'Receive PO Date',
+        'Handover Date', 'Status Update Date', 'Requisition Date', 'Requisition Submited Date',
+        'Requisition Approved Date', 'Requisition Required Date', 'Created TL Date', 'Shipped Date', 'ETA Date',
+        'Received TL Date', 'Updated Requisition Approved Date', 'Updated Requisition Required Date',
+        'TIME DATE', 'FARTHEST REQUIRED DATE', 'USED RECEIVE DATE',
+    ],
+}
+
+def arrow_string_dtype():
+    """
+    Arrow-backed string dtype with NaN missing values, so comparisons and astype(str)
+    behave like the object columns they replace. Falls back to object on old pandas.
+    """
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except (TypeError, ImportError):
+        pass
+    try:
+        return pd.StringDtype('pyarrow_numpy')
+    except (TypeError, ValueError, ImportError):
+        return np.dtype(object)
+
+def _is_text(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return False
+    return pd.api.types.infer_dtype(series, skipna=True) == 'string'
+
+def _numeric_dtype(series):
+    # int8 for 0/1 flags, smallest integer for other integer columns, float32 for
+    # whole-number floats (day counts, quantities, NaN-able flags) it stores exactly
+    if not isinstance(series.dtype, np.dtype) or pd.api.types.is_bool_dtype(series) or len(series) == 0:
+        return None
+    values = series.to_numpy()
+
+    present = values[~np.isnan(values)] if pd.api.types.is_float_dtype(series) else values
+    if len(present) == 0:
+        return None
+    is_whole = pd.api.types.is_integer_dtype(series) or bool(np.all(np.mod(present, 1) == 0))
+    if not is_whole:
+        return None
+
+    has_nan = len(present) != len(values)
+    if not has_nan and np.isin(present, [0, 1]).all():
+        return np.dtype(np.int8)
+    if pd.api.types.is_integer_dtype(series):
+        for candidate in (np.int8, np.int16, np.int32):
+            limits = np.iinfo(candidate)
+            if limits.min <= present.min() and present.max() <= limits.max:
+                return np.dtype(candidate)
+        return None
+    if np.abs(present).max() < FLOAT32_EXACT_LIMIT and series.dtype != np.float32:
+        return np.dtype(np.float32)
+    return None
+
+def build_dtype_plan(df, category_ratio=CATEGORY_MAX_RATIO, skip=()):
+    """
+    Chooses a compact dtype per column from the data itself:
+    low-cardinality strings -> category (shared categories inside SHARED_CATEGORY_GROUPS),
+    other strings -> Arrow-backed strings, 0/1 columns -> int8, other integers -> smallest int,
+    whole-number floats -> float32. Datetimes, categoricals, mixed-type columns and the
+    PRECISION_COLUMNS are left alone.
+
+    :param skip: Columns to leave untouched.
+    :return: dict {column: dtype} containing only the columns that change.
+    """
+    plan = {}
+    grouped = {col for group in SHARED_CATEGORY_GROUPS for col in group}
+    text_dtype = arrow_string_dtype()
+
+    for col in df.columns:
+        if col in skip or col in grouped:
+            continue
+        series = df[col]
+        if _is_text(series):
+            n_unique = series.nunique(dropna=True)
+            if n_unique <= max(category_ratio * len(series), 1):
+                plan[col] = 'category'
+            elif series.dtype != text_dtype:
+                plan[col] = text_dtype
+        elif pd.api.types.is_numeric_dtype(series) and col not in PRECISION_COLUMNS:
+            dtype = _numeric_dtype(series)
+            if dtype is not None and dtype != series.dtype:
+                plan[col] = dtype
+
+    for group in SHARED_CATEGORY_GROUPS:
+        members = [col for col in group if col in df.columns and col not in skip]
+        if not members or not all(_is_text(df[col]) or df[col].isna().all() for col in members):
+            continue
+        categories = pd.unique(pd.concat([df[col] for col in members], ignore_index=True).dropna().astype(object))
+        shared = pd.CategoricalDtype(categories=pd.Index(sorted(categories), dtype=object))
+        for col in members:
+            plan[col] = shared
+    return plan
+
+def _text_like(series):
+    # text, categorical text or nothing at all (an all-missing column of any dtype)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return pd.api.types.infer_dtype(series.cat.categories, skipna=True) in ('string', 'empty')
+    return _is_text(series) or bool(series.isna().all())
+
+def build_output_dtype_plan(df):
+    """
+    Dtype plan of a processed frame from OUTPUT_COLUMN_KINDS. Only the shared categories of
+    SHARED_CATEGORY_GROUPS come from the rows; a column whose values do not fit its declared
+    kind (numbers in a text column, text in a numeric one) and undeclared columns are left alone.
+
+    :return: dict {column: dtype}.
+    """
+    plan = {}
+    text_dtype = arrow_string_dtype()
+    grouped = {col for group in SHARED_CATEGORY_GROUPS for col in group}
+    for kind, columns in OUTPUT_COLUMN_KINDS.items():
+        for col in columns:
+            if col not in df.columns or col in grouped:
+                continue
+            series = df[col]
+            is_missing = series.isna()
+            if kind in ('category', 'text'):
+                # stage categoricals keep their fixed label sets
+                if not _text_like(series) or (kind == 'category' and isinstance(series.dtype, pd.CategoricalDtype)):
+                    continue
+                plan[col] = 'category' if kind == 'category' else text_dtype
+            elif kind == 'datetime':
+                if pd.api.types.is_datetime64_dtype(series) or is_missing.all():
+                    plan[col] = np.dtype('datetime64[us]')
+            elif pd.api.types.is_numeric_dtype(series) or is_missing.all():
+                if kind == 'int8' and is_missing.any():
+                    continue
+                plan[col] = np.dtype(kind)
+
+    for group in SHARED_CATEGORY_GROUPS:
+        members = [col for col in group if col in df.columns]
+        if not members or not all(_text_like(df[col]) for col in members):
+            continue
+        categories = pd.unique(pd.concat([df[col].astype(object) for col in members], ignore_index=True).dropna())
+        shared = pd.CategoricalDtype(categories=pd.Index(sorted(categories), dtype=text_dtype))
+        for col in members:
+            plan[col] = shared
+    return plan
+
+def apply_dtype_plan(df, plan):
+    """Casts the planned columns in place and returns df."""
+    for col, dtype in plan.items():
+        if col in df.columns:
+            # text first, so the categories of a categorical are always Arrow-backed strings
+            if dtype == 'category' and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(arrow_string_dtype())
+            df[col] = df[col].astype(dtype)
+    return df
+
+def memory_report(before, after, top=10):
+    """
+    Prints total memory before/after and the columns that shrank the most.
+
+    :param before: Series of bytes per column (df.memory_usage(deep=True, index=False)) before the plan.
+    :param after: Same after the plan.
+    :return: DataFrame with BEFORE_MB, AFTER_MB and RATIO per column.
+    """
+    report = pd.DataFrame({'BEFORE_MB': before / 2 ** 20, 'AFTER_MB': after.reindex(before.index) / 2 ** 20})
+    report['RATIO'] = report['BEFORE_MB'] / report['AFTER_MB']
+    total_before, total_after = report['BEFORE_MB'].sum(), report['AFTER_MB'].sum()
+    print(f"Memory: {total_before:.1f} MB -> {total_after:.1f} MB ({total_before / total_after:.1f}x smaller)")
+    saved = (report['BEFORE_MB'] - report['AFTER_MB']).sort_values(ascending=False).head(top)
+    for col in saved.index:
+        print(f"   {col}: {report.at[col, 'BEFORE_MB']:.2f} MB -> {report.at[col, 'AFTER_MB']:.2f} MB")
+    return report
+
+def optimize_dtypes(df, skip=(), report=False):
+    """
+    Builds and applies the dtype plan to df. The columns are cast in place,
+    so the caller's frame is changed as well (pass a copy to keep it).
+
+    :param report: Print the before/after memory report.
+    :return: df with compact dtypes.
+    """
+    before = df.memory_usage(deep=True, index=False) if report else None
+    df = apply_dtype_plan(df, build_dtype_plan(df, skip=skip))
+    if report:
+        memory_report(before, df.memory_usage(deep=True, index=False))
+    return df
+
+def apply_output_dtypes(df):
+    """Casts a processed frame to the declared output dtypes (build_output_dtype_plan) in place and returns it."""
+    return apply_dtype_plan(df, build_output_dtype_plan(df))
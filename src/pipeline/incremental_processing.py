@@ -0,0 +1,295 @@
+import pandas as pd
+import numpy as np
+import os
+import hashlib
+
+import processing_steps
+from dtype_plan import apply_output_dtypes
+
+project_root = '../../'
+state_dir = os.path.join(project_root, 'data', 'state')
+
+#bump to invalidate every stored PO group regardless of fingerprints
+STATE_VERSION = 1
+
+#files the processed output depends on; a change in any of them reprocesses everything
+PIPELINE_SOURCES = ['processing_steps.py', 'data_helper.py', 'reference_registry.py', 'dtype_plan.py']
+
+#reference tables whose rows only affect the POs they name, keyed by the column matched against the PO Entry List.
+#every other reference table (holidays, wilayah, pulau, freight, lebaran) can touch any row and invalidates all POs.
+REFERENCE_KEY_COLUMNS = {
+    'rfm_normalized_df': 'Requisition Number',
+    'normalisasi_rfm_solar_df': 'PO Number',
+    'jasa_service_df': 'PO Number',
+    'rara_df': 'PO Number',
+    'ryi_df': 'PO Number',
+    'way_df': 'PO Number',
+    'sln_df': 'PO Number',
+    'cost_saving_df': 'PO Number',
+    'timedate_normalized_df': 'PO Number',
+    'ontime_normalized_df': 'PO Number',
+    'notcounted_df': 'PO Number',
+    'logistic_normalized_df': 'PO Number',
+}
+
+GLOBAL_KEY = '__all__'
+PIPELINE_TABLE = '__pipeline__'
+
+def po_keys(po_series):
+    """PO group key, identical to the stripped 'PO Number' written to the processed output."""
+    return po_series.astype(str).str.strip()
+
+def _match_keys(series):
+    # Loose key used to match reference rows to PO Entry rows ('123.0' == '123')
+    return series.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+
+def group_fingerprints(frame, keys):
+    """
+    Order-sensitive uint64 fingerprint of every row group of frame sharing a key.
+    Row hashes come from pd.util.hash_pandas_object; each is re-hashed with its
+    position inside the group and the results are summed (wrapping) per group.
+
+    :param frame: DataFrame whose rows are fingerprinted.
+    :param keys: Series of group keys aligned to frame.
+    :return: Series of fingerprints indexed by key.
+    """
+    codes, uniques = pd.factorize(keys.to_numpy(), use_na_sentinel=False)
+    if len(codes) == 0:
+        return pd.Series(np.array([], dtype=np.uint64), index=pd.Index([], dtype=object))
+
+    row_hash = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    position = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+    salted = pd.util.hash_pandas_object(pd.DataFrame({'h': row_hash, 'p': position}), index=False).to_numpy()
+
+    order = np.argsort(codes, kind='stable')
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    sums = np.add.reduceat(salted[order], starts)
+    return pd.Series(sums, index=pd.Index(uniques, dtype=object))
+
+def pipeline_fingerprint():
+    """Fingerprint of the pipeline source files and STATE_VERSION."""
+    digest = hashlib.sha256(str(STATE_VERSION).encode())
+    pipeline_dir = os.path.dirname(os.path.abspath(processing_steps.__file__))
+    for name in PIPELINE_SOURCES:
+        with open(os.path.join(pipeline_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return int.from_bytes(digest.digest()[:8], 'little')
+
+def reference_fingerprints(refs):
+    """
+    Fingerprints the reference tables. Keyed tables are fingerprinted per key,
+    the others as a whole under GLOBAL_KEY.
+
+    :return: DataFrame with TABLE, KEY and FINGERPRINT columns.
+    """
+    frames = [pd.DataFrame({'TABLE': [PIPELINE_TABLE], 'KEY': [GLOBAL_KEY], 'FINGERPRINT': np.array([pipeline_fingerprint()], dtype=np.uint64)})]
+    for name, table in refs.items():
+        if table is None:
+            continue
+        key_col = REFERENCE_KEY_COLUMNS.get(name)
+        if key_col is not None and key_col in table.columns:
+            fingerprints = group_fingerprints(table, _match_keys(table[key_col]))
+        else:
+            fingerprints = group_fingerprints(table, pd.Series(GLOBAL_KEY, index=table.index))
+        frames.append(pd.DataFrame({'TABLE': name, 'KEY': fingerprints.index.astype(str), 'FINGERPRINT': fingerprints.to_numpy()}))
+    return pd.concat(frames, ignore_index=True)
+
+def changed_reference_keys(previous, current):
+    """
+    Compares two reference fingerprint tables.
+
+    :return: (invalidate_all, {table name: set of changed keys}) for the keyed tables.
+    """
+    # uint64 fingerprints would be cast to float by the outer merge, compare them as objects
+    merged = previous.astype({'FINGERPRINT': object}).merge(
+        current.astype({'FINGERPRINT': object}), on=['TABLE', 'KEY'], how='outer', suffixes=('_old', '_new'))
+    changed = merged[merged['FINGERPRINT_old'] != merged['FINGERPRINT_new']]
+
+    invalidate_all = bool((changed['KEY'] == GLOBAL_KEY).any() or (~changed['TABLE'].isin(list(REFERENCE_KEY_COLUMNS))).any())
+    changed_keys = {table: set(group['KEY']) for table, group in changed.groupby('TABLE')}
+    return invalidate_all, changed_keys
+
+def load_state(path=None):
+    """Returns (processed_df, po_fingerprints, reference_fingerprints) or None if no usable state exists."""
+    path = path or state_dir
+    files = [os.path.join(path, name) for name in ('processed.parquet', 'po_fingerprints.parquet', 'reference_fingerprints.parquet')]
+    if not all(os.path.exists(f) for f in files):
+        return None
+    try:
+        processed = pd.read_parquet(files[0], engine='pyarrow')
+        po_fp = pd.read_parquet(files[1], engine='pyarrow')
+        ref_fp = pd.read_parquet(files[2], engine='pyarrow')
+    except Exception as e:
+        print(f"Warning: Failed to read incremental state, running full processing: {e}")
+        return None
+    return processed, po_fp.set_index('PO_KEY')['FINGERPRINT'], ref_fp
+
+def save_state(processed, po_fingerprints, ref_fingerprints, path=None):
+    """Persists the processed output and the fingerprints it was built from."""
+    path = path or state_dir
+    if not os.path.exists(path):
+        os.makedirs(path)
+    try:
+        processed.to_parquet(os.path.join(path, 'processed.parquet'), index=False, engine='pyarrow')
+        po_fingerprints.rename_axis('PO_KEY').rename('FINGERPRINT').reset_index().to_parquet(
+            os.path.join(path, 'po_fingerprints.parquet'), index=False, engine='pyarrow')
+        ref_fingerprints.to_parquet(os.path.join(path, 'reference_fingerprints.parquet'), index=False, engine='pyarrow')
+        print(f"Saved incremental state ({len(po_fingerprints)} PO groups) to {os.path.abspath(path)}")
+    except Exception as e:
+        print(f"Warning: Failed to save incremental state: {e}")
+
+def concat_processed(frames):
+    """
+    Concatenates processed parts. A column that is all-NA in one part takes the dtype
+    of the first part that has values, so the result keeps e.g. datetimes; categoricals
+    whose categories differ between parts are cast back to the declared output dtypes.
+    """
+    frames = [frame.copy() for frame in frames]
+    for col in frames[0].columns:
+        filled = [frame[col].dtype for frame in frames if col in frame.columns and not frame[col].isna().all()]
+        if not filled:
+            continue
+        for frame in frames:
+            if col in frame.columns and frame[col].dtype != filled[0] and frame[col].isna().all():
+                try:
+                    frame[col] = frame[col].astype(filled[0])
+                except (TypeError, ValueError):
+                    pass
+    return apply_output_dtypes(pd.concat(frames, ignore_index=True))
+
+def mismatched_columns(result, expected):
+    """
+    Columns of expected whose values differ in result, missing values (NaN / None / NaT)
+    counting as equal. Both frames must have the same shape and row order.
+    """
+    mismatched = []
+    for col in expected.columns:
+        a = result[col].astype(object).to_numpy()
+        b = expected[col].astype(object).to_numpy()
+        if not ((a == b) | (pd.isna(a) & pd.isna(b))).all():
+            mismatched.append(col)
+    return mismatched
+
+def restore_row_order(result, keys):
+    """
+    Orders processed rows like a full run over the input whose PO keys are given:
+    the k-th output row of a PO group takes the input position of the k-th input
+    row of that group (extra rows fanned out by the jasa service merge follow the
+    group's last input row).
+    """
+    input_codes, uniques = pd.factorize(keys.to_numpy(), use_na_sentinel=False)
+    order = np.argsort(input_codes, kind='stable')
+    sizes = np.bincount(input_codes, minlength=len(uniques))
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+
+    result_codes = pd.Index(uniques).get_indexer(po_keys(result['PO Number']))
+    rank = pd.Series(result_codes).groupby(result_codes).cumcount().to_numpy()
+    slot = starts[result_codes] + np.minimum(rank, sizes[result_codes] - 1)
+    positions = order[slot]
+    return result.iloc[np.argsort(positions, kind='stable')].reset_index(drop=True)
+
+def run_incremental_processing(df, refs, department_cache_path=None, path=None, registry=None, validate=True):
+    """
+    Runs run_all_processing only on new or changed PO groups (every row sharing a
+    stripped 'PO Number') and on POs named by changed rows of keyed reference
+    tables, then merges them with the untouched groups from the state store.
+    Whole PO groups are the unit of recomputation, so group rules such as VALUE,
+    UNIQUE COUNT PO and PO_RECEIVE stay correct.
+
+    :param df: Raw PO Entry List DataFrame.
+    :param refs: Dict of reference DataFrames keyed by processing_steps.REFERENCE_TABLES names (plus 'lebaran_dates_df').
+    :param path: Optional state directory, defaults to state_dir.
+    :param registry: Optional prebuilt reference registry (reference_registry.load_reference_registry).
+    :param validate: Run validate_processed_data once on the merged result.
+    :return: The fully processed pandas DataFrame.
+    """
+    keys = po_keys(df['PO Number'])
+    current_po_fp = group_fingerprints(df, keys)
+    current_ref_fp = reference_fingerprints(refs)
+
+    state = load_state(path)
+    if state is None:
+        print("No incremental state found, processing all PO groups...")
+        dirty = pd.Index(current_po_fp.index)
+        history = None
+    else:
+        history, previous_po_fp, previous_ref_fp = state
+        invalidate_all, changed_keys = changed_reference_keys(previous_ref_fp, current_ref_fp)
+
+        if invalidate_all:
+            print("Pipeline code or a global reference table changed, processing all PO groups...")
+            dirty = pd.Index(current_po_fp.index)
+        else:
+            previous = previous_po_fp.astype(object).reindex(current_po_fp.index)
+            dirty_mask = previous.isna().to_numpy() | (previous.to_numpy() != current_po_fp.to_numpy())
+
+            # POs touched by changed reference rows
+            match_po = _match_keys(df['PO Number'])
+            touched = np.zeros(len(df), dtype=bool)
+            for table, table_keys in changed_keys.items():
+                key_col = REFERENCE_KEY_COLUMNS[table]
+                lookup = match_po if key_col == 'PO Number' else _match_keys(df[key_col])
+                touched |= lookup.isin(table_keys).to_numpy()
+            touched_pos = pd.Index(keys[touched].unique())
+
+            dirty = current_po_fp.index[dirty_mask].union(touched_pos)
+
+    print(f"Incremental run: {len(dirty)} of {len(current_po_fp)} PO groups to process")
+
+    # Without state an empty input still goes through processing, so the result has the processed columns
+    result = None
+    if len(dirty) > 0 or history is None:
+        subset = df[keys.isin(dirty).to_numpy()].reset_index(drop=True)
+        result = processing_steps.run_all_processing(
+            subset, *[refs[name] for name in processing_steps.REFERENCE_TABLES],
+            lebaran_dates_df=refs.get('lebaran_dates_df'), department_cache_path=department_cache_path,
+            validate=False, registry=registry
+        )
+
+    if history is not None:
+        history_keys = po_keys(history['PO Number'])
+        kept = history[history_keys.isin(current_po_fp.index).to_numpy() & ~history_keys.isin(dirty).to_numpy()]
+        if result is None:
+            result = kept.reset_index(drop=True)
+        elif len(kept) > 0:
+            result = concat_processed([kept, result])
+
+    result = restore_row_order(result, keys)
+    save_state(result, current_po_fp, current_ref_fp, path)
+
+    # The report covers the merged output, not only the reprocessed groups
+    if validate and len(result) == 0:
+        print("Empty PO Entry List, skipping validation.")
+    elif validate:
+        processing_steps.validate_processed_data(result)
+    return result
+
+def verify_incremental_processing(df, refs, path, department_cache_path=None):
+    """
+    Compares run_incremental_processing against a full run_all_processing on copies
+    of the same inputs. Fills the state at path first if it is empty.
+    Prints the mismatching columns and returns True when every value matches.
+    """
+    def copies():
+        return df.copy(), {name: (table.copy() if table is not None else None) for name, table in refs.items()}
+
+    if load_state(path) is None:
+        frame, tables = copies()
+        run_incremental_processing(frame, tables, department_cache_path, path, validate=False)
+
+    frame, tables = copies()
+    incremental = run_incremental_processing(frame, tables, department_cache_path, path, validate=False)
+    frame, tables = copies()
+    full = processing_steps.run_all_processing(
+        frame, *[tables[name] for name in processing_steps.REFERENCE_TABLES],
+        lebaran_dates_df=tables.get('lebaran_dates_df'), department_cache_path=department_cache_path, validate=False
+    )
+
+    if incremental.shape != full.shape:
+        print(f"shape mismatch: incremental {incremental.shape} vs full {full.shape}")
+        return False
+
+    mismatched = mismatched_columns(incremental, full)
+    if mismatched:
+        print(f"incremental output differs in: {mismatched}")
+    return not mismatched
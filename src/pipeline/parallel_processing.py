@@ -0,0 +1,127 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import processing_steps
+from data_helper import resolve_department_attributes
+from incremental_processing import po_keys, concat_processed, restore_row_order, mismatched_columns
+from reference_registry import build_reference_registry
+
+#reference tables and registry of the current worker process, set once by _init_worker
+_worker_refs = None
+_worker_registry = None
+_worker_department_cache_path = None
+
+def default_workers():
+    """Worker count used when none is configured: every core but one."""
+    return max((os.cpu_count() or 1) - 1, 1)
+
+def partition_by_po(df, n_partitions):
+    """
+    Hash-partitions the rows by stripped 'PO Number', so every PO group lands in
+    exactly one partition. Rows keep their relative order inside a partition.
+
+    :return: List of non-empty DataFrames.
+    """
+    keys = po_keys(df['PO Number'])
+    buckets = pd.util.hash_pandas_object(keys, index=False).to_numpy() % np.uint64(n_partitions)
+    return [df[buckets == b].reset_index(drop=True) for b in range(n_partitions) if (buckets == b).any()]
+
+def _init_worker(refs, registry, department_cache_path):
+    global _worker_refs, _worker_registry, _worker_department_cache_path
+    _worker_refs = refs
+    _worker_registry = registry
+    _worker_department_cache_path = department_cache_path
+
+def _process_partition(partition):
+    # Runs in a worker: the reference tables and registry were shipped once through _init_worker
+    started = time.process_time()
+    processed = processing_steps.run_all_processing(
+        partition, *[_worker_refs[name] for name in processing_steps.REFERENCE_TABLES],
+        lebaran_dates_df=_worker_refs.get('lebaran_dates_df'),
+        department_cache_path=_worker_department_cache_path, validate=False, registry=_worker_registry
+    )
+    return processed, time.process_time() - started
+
+def run_parallel_processing(df, refs, workers=None, partitions=None, department_cache_path=None, validate=True, registry=None):
+    """
+    Runs run_all_processing on PO-hash partitions of df in a process pool and
+    concatenates the results in the original row order. Each PO group stays in one
+    partition, so VALUE, UNIQUE COUNT PO and PO_RECEIVE match a serial run.
+
+    :param df: Raw PO Entry List DataFrame.
+    :param refs: Dict of reference DataFrames keyed by processing_steps.REFERENCE_TABLES names (plus 'lebaran_dates_df').
+    :param workers: Process count, defaults to default_workers().
+    :param partitions: Partition count, defaults to twice the worker count for load balancing.
+    :param validate: Run validate_processed_data once on the combined result.
+    :param registry: Prebuilt reference registry, built once here when None and shipped to every worker.
+    :return: (processed DataFrame, stats dict with wall_seconds, partition CPU seconds and estimated_speedup).
+    """
+    workers = workers or default_workers()
+    partitions = partitions or workers * 2
+    keys = po_keys(df['PO Number'])
+
+    # Fill the department cache up front so the workers only ever read it
+    if department_cache_path is not None:
+        resolve_department_attributes(df['Department'], cache_path=department_cache_path)
+    if registry is None:
+        registry = build_reference_registry(refs)
+
+    parts = partition_by_po(df, partitions)
+    print(f"Running {len(parts)} PO partitions on {workers} worker processes...")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(refs, registry, department_cache_path)) as pool:
+        outcomes = list(pool.map(_process_partition, parts))
+    result = restore_row_order(concat_processed([processed for processed, _ in outcomes]), keys)
+    wall_seconds = time.perf_counter() - started
+
+    # The partitions' CPU seconds summed approximate a serial run without paying for one
+    partition_seconds = sum(seconds for _, seconds in outcomes)
+    stats = {
+        'workers': workers,
+        'partitions': len(parts),
+        'wall_seconds': wall_seconds,
+        'partition_seconds': partition_seconds,
+        'estimated_speedup': partition_seconds / wall_seconds if wall_seconds > 0 else np.nan,
+    }
+    print(f"Parallel processing took {wall_seconds:.2f}s (partitions {partition_seconds:.2f} CPU s, estimated speedup {stats['estimated_speedup']:.2f}x)")
+
+    if validate:
+        processing_steps.validate_processed_data(result)
+    return result, stats
+
+def compare_with_serial(df, refs, workers=None, partitions=None, department_cache_path=None, registry=None):
+    """
+    Times run_parallel_processing against a serial run_all_processing on copies of
+    the same inputs, checks that both outputs match and prints the measured speedup.
+
+    :return: (parallel output, dict with serial_seconds, parallel_seconds, speedup and matches).
+    """
+    copy_refs = lambda: {name: (table.copy() if table is not None else None) for name, table in refs.items()}
+
+    started = time.perf_counter()
+    tables = copy_refs()
+    serial = processing_steps.run_all_processing(
+        df.copy(), *[tables[name] for name in processing_steps.REFERENCE_TABLES],
+        lebaran_dates_df=tables.get('lebaran_dates_df'), department_cache_path=department_cache_path,
+        validate=False, registry=registry
+    )
+    serial_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    parallel, _ = run_parallel_processing(df.copy(), copy_refs(), workers, partitions, department_cache_path, validate=False, registry=registry)
+    parallel_seconds = time.perf_counter() - started
+
+    matches = serial.shape == parallel.shape
+    if matches:
+        mismatched = mismatched_columns(parallel, serial)
+        if mismatched:
+            print(f"parallel output differs in: {mismatched}")
+        matches = not mismatched
+
+    speedup = serial_seconds / parallel_seconds if parallel_seconds > 0 else np.nan
+    print(f"Serial {serial_seconds:.2f}s vs parallel {parallel_seconds:.2f}s: speedup {speedup:.2f}x, outputs {'match' if matches else 'DIFFER'}")
+    return parallel, {'serial_seconds': serial_seconds, 'parallel_seconds': parallel_seconds, 'speedup': speedup, 'matches': matches}
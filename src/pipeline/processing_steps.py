@@ -1,43 +1,183 @@
 import pandas as pd
 import numpy as np
+import time
 
 #Import all necessary helper functions from the helpers module
 from data_helper import (
-    LOC_strings, project_string, divisi_string, PTCV_strings, TOP_strings, 
-    item_category_merged, category_value_marker, category_value_xcmg, 
-    urgent_normal_function, days_excluding_lebaran, determine_freight, 
-    extract_finalisasi_date, determine_time_date_days, apply_routine_logic,
-    calculate_purchasing_status
+    resolve_department_attributes, PTCV_strings, TOP_strings, apply_on_unique,
+    item_category_merged_vectorized, category_value_marker_vectorized, category_value_xcmg_vectorized,
+    urgent_normal_vectorized, resolve_logistic_freight,
+    extract_finalisasi_dates, determine_time_date_days, logistic_ontime_threshold, apply_routine_logic,
+    calculate_purchasing_status, status_categorical, on_time_flags,
+    REC_STATUSES, URGENT_FINAL_STATUSES, RECEIVE_PO_STATUSES, TL_RECEIVE_STATUSES,
+    build_lebaran_calendar, days_excluding_lebaran_vectorized,
+    build_po_group_index, po_group_size, po_group_sum, po_group_max, take_matched,
+    unique_text_view, text_view, invalidate_text_views, masked_compute, report_masked_stats
+)
+from dtype_plan import apply_output_dtypes
+from validation_rules import validate_processed_data
+from reference_registry import (
+    build_reference_registry, frame_keys, lookup_keys, lookup_positions, lookup_values, lookup_contains, lookup_series
 )
 
-def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays_df, wilayah_df, pulau_df, jasa_service_df, 
-                       freight_df, rara_df, ryi_df, way_df, sln_df,
-                       cost_saving_df, timedate_normalized_df, 
-                       ontime_normalized_df, notcounted_df, logistic_normalized_df,
-                       lebaran_dates_df=None):
+#reference tables in the positional order of run_all_processing
+REFERENCE_TABLES = [
+    'rfm_normalized_df', 'normalisasi_rfm_solar_df', 'holidays_df', 'wilayah_df', 'pulau_df', 'jasa_service_df',
+    'freight_df', 'rara_df', 'ryi_df', 'way_df', 'sln_df',
+    'cost_saving_df', 'timedate_normalized_df',
+    'ontime_normalized_df', 'notcounted_df', 'logistic_normalized_df',
+]
+
+DATE_COLUMNS = [
+    'Requisition Approved Date', 'Requisition Required Date', 'PO Submit Date',
+    'PO Approval Date', 'Receive PO Date', 'Created TL Date', 'Shipped Date',
+    'Received TL Date', 'PO Required Date'
+]
+
+FINAL_COLUMN_ORDER = [
+    'Requisition Type', 'Item ID', 'Item Name', 'Item Category', 'Department',
+    'Unit', 'Currency', 'Exchange Rate', 'PO Price', 'Qty Order',
+    'PO Disc/Cost', 'PO Sub Total', 'Jumlah PPN', 'Qty Received', 'PO Receive Location',
+    'PO Submit Date', 'PO Required Date', 'PO Approval Date', 'Receive PO Estimation', 'Receive PO Date',
+    'Qty Handover', 'Handover Date', 'PO Number', 'Supplier', 'Supplier Location',
+    'Term of Payment', 'PO Status', 'PO Progress Status', 'Status Update Date', 'Requisition Number',
+    'Requisition Date', 'Requisition Submited Date', 'Requisition Approved Date', 'Requisition Required Date', 'Qty Requisition',
+    'Requisition Unit Price', 'Requisition SubTotal', 'Asset / Non Asset', 'Cost Saving', 'Routine',
+    'Urgent', 'Background Needs', 'Urgent Note', 'Urgent Cost', 'Procurement Name',
+    'Req Status', 'Req Progress Status', 'TL Number', 'Shipping Type', 'Created TL Date',
+    'Qty Shipped', 'Shipped Date', 'ETA Date', 'TL Qty Received', 'Received TL Date',
+    'Location TL Received', 'Final Destination Location', 'Remarks', 'VALUE', 'UNIQUE COUNT PO',
+    'CATEGORYMERGED', 'LOC', 'LEAD TIME', 'URGENT_NORMAL', 'NORMAL',
+    'URGENT2', 'URGENT*', 'URGENT_FINALFORLOGBOOK', 'WILAYAH', 'PULAU',
+    'DEPARTMENT_', 'DIVISI', 'SUPPLIER_', 'TOP', 'Updated Requisition Approved Date',
+    'Updated Requisition Required Date', 'Background Update', 'TIME DATE', 'PR - PO', 'PO SUB - PO APP',
+    'PO - R PO', 'R-R SITE', 'PR - PO SUB WD', 'PO SUB - PO APP WD', 'RPO-TLC', 'TLC-SHIP',
+    'SHIP-RSITE', 'REQUISITION_TOTAL', 'PO_TOTAL', 'BUDGET', 'BUDGET%',
+    'FARTHEST REQUIRED DATE', 'USED RECEIVE DATE', 'REC', 'STATUS REC', 'ON_TIME',
+    'LATE', 'ON_TIME%', 'LOGISTICAL_PROCESS', 'RECEIVE_INDICATOR_PO', 'RECEIVE_PO_STATUS',
+    'TL_NUMBER_?', 'RECEIVE_INDICATOR_LOGISTIC', 'TL_RECEIVE_INFO', 'FULLY_RECEIVE_INFO', 'TRANSFER_ITEM', 'SHIPPING_TYPE_LAND',
+    'SHIPPING_TYPE_SEA', 'SHIPPING_TYPE_AIR', 'LOGISTIC_FREIGHT', 'RECEIVED', 'NOT_RECEIVED',
+    'PO_RECEIVE', 'JS_SERVICE', 'ON_TIME%_overall_original' ,'ON_TIME%_original_purchasing', 'ON_TIME%_logistic', 'Final_ItemID',
+    'Purchasing_Duration', 'STATUS_Purchasing', 'ON_TIME_Purchasing', 'LATE_Purchasing', 'ON_TIME%_Purchasing','_Routine',
+    'Total_Logistic_Lead_Time', 'logistic_on_time'
+]
+
+# ---------------------------------------------------------
+# Stage registry
+# ---------------------------------------------------------
+#Each stage declares the columns it reads (inputs), the reference tables it needs (refs)
+#and the columns it writes (outputs). Lowercase names such as 'used_approved_date' are
+#intermediate values passed between stages through the run context instead of df columns.
+#Stages run in registration order; a stage that only overrides part of a column lists it
+#in both inputs and outputs.
+PROCESSING_STAGES = []
+
+#intermediate values that live in the run context, never in df
+CONTEXT_VALUES = {'holidays', 'lebaran_calendar', 'used_approved_date', 'used_required_date', 'is_calculable', 'po_groups'}
+
+def processing_stage(name, inputs=(), refs=(), outputs=()):
+    """Registers a function(df, ctx) -> df as a pipeline stage."""
+    def register(func):
+        PROCESSING_STAGES.append({
+            'name': name,
+            'func': func,
+            'inputs': set(inputs),
+            'refs': set(refs),
+            'outputs': set(outputs),
+        })
+        return func
+    return register
+
+def resolve_stages(outputs=None):
     """
-    Executes the entire data processing and feature engineering pipeline 
-    on the main Procurement DataFrame by applying sequential business logic.
-    
-    :return: The fully processed pandas DataFrame.
+    Returns the registered stages needed to produce the requested outputs, in run order.
+    Walks the registry backwards, keeping every stage that writes a still-needed name
+    and adding that stage's inputs to the needed set.
+
+    :param outputs: Iterable of output columns, or None for every stage.
+    """
+    if outputs is None:
+        return list(PROCESSING_STAGES)
+
+    needed = set(outputs)
+    selected = []
+    for stage in reversed(PROCESSING_STAGES):
+        if stage['outputs'] & needed:
+            selected.append(stage)
+            needed |= stage['inputs']
+    return selected[::-1]
+
+def run_stages(df, refs, outputs=None, department_cache_path=None, registry=None, stage_timings=None):
+    """
+    Executes the stage graph on the main Procurement DataFrame.
+
+    :param refs: Dict of reference DataFrames keyed by REFERENCE_TABLES names (plus 'lebaran_dates_df').
+                 Only the tables of the selected stages are required.
+    :param outputs: Optional list of columns to compute. Only the stages they depend on are run and
+                    the frame is returned with just these columns. None runs everything and returns
+                    the frame before final ordering.
+    :param department_cache_path: Optional parquet path for the persisted Department -> LOC/DEPARTMENT_/DIVISI table.
+    :param registry: Prebuilt reference registry (reference_registry.load_reference_registry), built from refs when None.
+    :param stage_timings: Optional dict receiving the wall seconds of every stage run, keyed by stage name.
+    :return: The processed pandas DataFrame.
     """
+    stages = resolve_stages(outputs)
+
+    if outputs is not None:
+        producible = set(df.columns).union(*(stage['outputs'] for stage in PROCESSING_STAGES)) - CONTEXT_VALUES
+        unknown = [col for col in outputs if col not in producible]
+        if unknown:
+            raise ValueError(f"Unknown output columns requested: {unknown}")
+
+    missing_refs = sorted({ref for stage in stages for ref in stage['refs'] if ref not in refs} - {'lebaran_dates_df'})
+    if missing_refs:
+        raise ValueError(f"Missing reference tables for the selected stages: {missing_refs}")
+
+    ctx = dict(refs)
+    ctx.setdefault('lebaran_dates_df', None)
+    ctx['department_cache_path'] = department_cache_path
+    # Every mapping stage gathers from the registry instead of indexing the raw reference tables
+    ctx['registry'] = registry if registry is not None else build_reference_registry(refs)
+    # Normalized column views (data_helper.unique_text_view) shared by the stages of this run
+    ctx['text_views'] = {}
+    # Computed / skipped row counts of the masked columns (data_helper.masked_compute)
+    ctx['masked_stats'] = {}
+
+    for stage in stages:
+        started = time.perf_counter()
+        df = stage['func'](df, ctx)
+        invalidate_text_views(ctx['text_views'], stage['outputs'])
+        if stage_timings is not None:
+            stage_timings[stage['name']] = stage_timings.get(stage['name'], 0.0) + time.perf_counter() - started
+
+    if ctx['masked_stats']:
+        print("masked evaluation:")
+        report_masked_stats(ctx['masked_stats'])
+
+    if outputs is not None:
+        return df[list(outputs)]
+    return df
 
+# ---------------------------------------------------------
+# Preparation
+# ---------------------------------------------------------
+@processing_stage('prepare_dates', inputs=DATE_COLUMNS, outputs=DATE_COLUMNS)
+def _prepare_dates(df, ctx):
     print("preparing data and normalizing dates...")
-    
+
     # 1.Date Preparation
-    date_columns = [
-        'Requisition Approved Date', 'Requisition Required Date', 'PO Submit Date',
-        'PO Approval Date', 'Receive PO Date', 'Created TL Date', 'Shipped Date',
-        'Received TL Date', 'PO Required Date'
-    ]
-    for col in date_columns:
+    for col in DATE_COLUMNS:
         df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
+    return df
 
+@processing_stage('calendars', refs=['holidays_df', 'lebaran_dates_df'], outputs=['holidays', 'lebaran_calendar'])
+def _calendars(df, ctx):
     # Extract holiday dates for busday_count (Pythonic variable naming used here)
-    holidays = pd.to_datetime(holidays_df['NONWORKDAYS'], format='%d/%m/%Y').dt.date.tolist()
-    
+    ctx['holidays'] = pd.to_datetime(ctx['holidays_df']['NONWORKDAYS'], format='%d/%m/%Y').dt.date.tolist()
+
     # Parse lebaran_dates_df to construct the set of exclusion dates
     lebaran_dates = set()
+    lebaran_dates_df = ctx['lebaran_dates_df']
     if lebaran_dates_df is not None:
         for _, row in lebaran_dates_df.iterrows():
             row_dict = {k.upper(): v for k, v in row.items()}
@@ -51,40 +191,52 @@ def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays
                 except Exception as e:
                     print(f"Warning: Failed to parse date range {start_val} - {end_val}: {e}")
 
-    # Prepare rfm_normalized_df (Normalization data for Requisition Approved/Required Dates)
-    rfm_normalized_indexed = rfm_normalized_df.drop_duplicates(subset='Requisition Number').set_index('Requisition Number')
+    # Sorted exclusion calendar shared by every Lebaran-aware duration column
+    ctx['lebaran_calendar'] = build_lebaran_calendar(lebaran_dates)
+    return df
 
-    # Prepare solar normalized df (Normalization for solar requisition)
-    solar_normalized_indexed = normalisasi_rfm_solar_df.drop_duplicates(subset=['Requisition Number', 'PO Number']).set_index(['Requisition Number', 'PO Number'])
+# ---------------------------------------------------------
+# Step 1: Initial Feature Engineering
+# ---------------------------------------------------------
+@processing_stage(
+    'requisition_dates',
+    inputs=['Req Progress Status', 'Requisition Number', 'PO Number', 'Requisition Approved Date', 'Requisition Required Date'],
+    refs=['rfm_normalized_df', 'normalisasi_rfm_solar_df'],
+    outputs=['Extracted Approved Date', 'Updated Requisition Approved Date', 'Updated Requisition Required Date',
+             'Background Update', 'used_approved_date', 'used_required_date']
+)
+def _requisition_dates(df, ctx):
+    print("running step 1: initial feature engineering...")
 
+    # rfm_normalized (Normalization data for Requisition Approved/Required Dates), matched on Requisition Number
+    rfm_normalized = ctx['registry']['rfm_normalized']
+    rfm_positions = lookup_positions(rfm_normalized, frame_keys(rfm_normalized, df, ctx['text_views']), normalized=True)
 
-    # --- Step 1: Initial Feature Engineering ---
-    print("running step 1: initial feature engineering...")
+    # solar normalized (Normalization for solar requisition), matched on the (Requisition Number, PO Number) pair
+    solar_normalized = ctx['registry']['solar_normalized']
+    solar_positions = lookup_positions(solar_normalized, frame_keys(solar_normalized, df, ctx['text_views']), normalized=True)
 
-    # A. Extract date from Req Progress Status using the helper function
-    df['Extracted Approved Date'] = df['Req Progress Status'].apply(extract_finalisasi_date)
+    # A. Extract date from Req Progress Status (once per distinct status text)
+    df['Extracted Approved Date'] = extract_finalisasi_dates(df['Req Progress Status'])
 
     # B.1 Map dates from rfm_normalized (normalisasi RFM)
-    df['Updated Requisition Approved Date'] = df['Requisition Number'].map(rfm_normalized_indexed['Updated Requisition Approved Date'])
-    df['Updated Requisition Required Date'] = df['Requisition Number'].map(rfm_normalized_indexed['Updated Requisition Required Date'])
-    df['Background Update'] = df['Requisition Number'].map(rfm_normalized_indexed['Background Update'])
+    df['Updated Requisition Approved Date'] = take_matched(rfm_normalized['table']['Updated Requisition Approved Date'], rfm_positions, index=df.index)
+    df['Updated Requisition Required Date'] = take_matched(rfm_normalized['table']['Updated Requisition Required Date'], rfm_positions, index=df.index)
+    df['Background Update'] = take_matched(rfm_normalized['table']['Background Update'], rfm_positions, index=df.index)
 
     # B. 2. Map dates from solar normalized (normalisasi RFM) and update existing columns
     # fill normalization from df to main df
     # Use fillna to ensure we only update where a match is found (priority to Solar)
-    
-    indexer = df.set_index(['Requisition Number', 'PO Number']).index
-    
+
     # helper to map and fill
     def map_and_fill(target_col):
-        mapped_values = indexer.map(solar_normalized_indexed[target_col])
-        # Convert index result to Series to allow fillna with another Series
-        return pd.Series(mapped_values, index=df.index).fillna(df[target_col])
+        mapped_values = take_matched(solar_normalized['table'][target_col], solar_positions, index=df.index)
+        return mapped_values.fillna(df[target_col])
 
     df['Updated Requisition Approved Date'] = map_and_fill('Updated Requisition Approved Date')
     df['Updated Requisition Required Date'] = map_and_fill('Updated Requisition Required Date')
-    
-    if 'Background Update' in solar_normalized_indexed.columns:
+
+    if 'Background Update' in solar_normalized['table'].columns:
         df['Background Update'] = map_and_fill('Background Update')
 
     # C. Apply Priority Logic from normalization (Highest: rfm_normalized -> Second: Extracted -> Lowest: Original)
@@ -97,116 +249,177 @@ def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays
     used_required_date = df['Updated Requisition Required Date'].fillna(df['Requisition Required Date'])
 
     # D. Convert final selected dates to datetime objects for calculations
-    used_approved_date = pd.to_datetime(used_approved_date, errors='coerce', dayfirst=True)
-    used_required_date = pd.to_datetime(used_required_date, errors='coerce', dayfirst=True)
-
-    # Apply helpers for LOC, LEAD TIME, URGENT/NORMAL flags
-    df['LOC'] = df['Department'].apply(LOC_strings)
-    df['LEAD TIME'] = np.floor((used_required_date - used_approved_date).dt.total_seconds() / (24 * 3600))
-    df['URGENT_NORMAL'] = df.apply(urgent_normal_function, axis=1)
-
-    df['URGENT*'] = np.where(
-        (df['Urgent'] == 'Normal') & (df['URGENT_NORMAL'] == 'Urgent'), 
-        'Urgent*', 
-        None
-    )
-    df['NORMAL'] = np.where(df['URGENT_NORMAL'] == 'Normal', 'Normal', None)
-    df['URGENT2'] = np.where(df['URGENT_NORMAL'] == 'Urgent', 'Urgent', None)
-    df['URGENT_FINALFORLOGBOOK'] = df['URGENT*'].combine_first(df['URGENT_NORMAL'])
-
-    # Wilayah and Pulau (Mapping Logic)
-    temp_df = df[['Supplier Location']].copy()
-    temp_df['Supplier Location'] = temp_df['Supplier Location'].str.strip().str.lower()
-    
-    wilayah_df['Supplier Location'] = wilayah_df['Supplier Location'].str.strip().str.lower()
-    pulau_df['Wilayah'] = pulau_df['Wilayah'].str.strip().str.lower()
-    
-    wilayah_process = pd.merge(temp_df, wilayah_df, on='Supplier Location', how='left')
-    wilayah_process['To'] = wilayah_process['To'].str.lower()
-    
-    supplier_process = pd.merge(wilayah_process, pulau_df, left_on='To', right_on='Wilayah', how='left')
-    
-    df['WILAYAH'] = supplier_process['To']
-    df['PULAU'] = supplier_process['Pulau']
+    ctx['used_approved_date'] = pd.to_datetime(used_approved_date, errors='coerce', dayfirst=True)
+    ctx['used_required_date'] = pd.to_datetime(used_required_date, errors='coerce', dayfirst=True)
+    return df
+
+@processing_stage('department_attributes', inputs=['Department'], outputs=['LOC', 'DEPARTMENT_', 'DIVISI'])
+def _department_attributes(df, ctx):
+    # Resolve LOC, DEPARTMENT_ and DIVISI once per distinct Department
+    department_attributes = resolve_department_attributes(df['Department'], cache_path=ctx['department_cache_path'])
+    df['LOC'] = department_attributes['LOC']
+    df['DEPARTMENT_'] = department_attributes['DEPARTMENT_']
+    df['DIVISI'] = department_attributes['DIVISI']
+    return df
+
+@processing_stage(
+    'urgency',
+    inputs=['used_approved_date', 'used_required_date', 'Requisition Type', 'LOC', 'Urgent'],
+    outputs=['LEAD TIME', 'URGENT_NORMAL', 'URGENT*', 'NORMAL', 'URGENT2', 'URGENT_FINALFORLOGBOOK']
+)
+def _urgency(df, ctx):
+    # Apply helpers for LEAD TIME, URGENT/NORMAL flags
+    df['LEAD TIME'] = np.floor((ctx['used_required_date'] - ctx['used_approved_date']).dt.total_seconds() / (24 * 3600))
+    df['URGENT_NORMAL'] = urgent_normal_vectorized(df['Requisition Type'], df['LOC'], df['LEAD TIME'])
+
+    # Status columns are int8-coded categoricals (code -1 = empty)
+    urgent_codes = df['URGENT_NORMAL'].cat.codes.to_numpy()
+    is_urgent_star = ((df['Urgent'] == 'Normal') & (urgent_codes == 1)).to_numpy()
+
+    df['URGENT*'] = status_categorical(np.where(is_urgent_star, 0, -1), ['Urgent*'])
+    df['NORMAL'] = status_categorical(np.where(urgent_codes == 0, 0, -1), ['Normal'])
+    df['URGENT2'] = status_categorical(np.where(urgent_codes == 1, 0, -1), ['Urgent'])
+    df['URGENT_FINALFORLOGBOOK'] = status_categorical(np.where(is_urgent_star, 2, urgent_codes), URGENT_FINAL_STATUSES)
+    return df
 
+@processing_stage('wilayah_pulau', inputs=['Supplier Location'], refs=['wilayah_df', 'pulau_df'], outputs=['WILAYAH', 'PULAU'])
+def _wilayah_pulau(df, ctx):
+    # Wilayah and Pulau (Mapping Logic): the registry resolved Supplier Location -> To -> Pulau per wilayah row
+    wilayah = ctx['registry']['wilayah']
+    positions = lookup_positions(wilayah, frame_keys(wilayah, df, ctx['text_views']), normalized=True)
+    df['WILAYAH'] = take_matched(wilayah['table']['WILAYAH'], positions, index=df.index)
+
+    # a Supplier Location without a wilayah row has no To, which is looked up in pulau like any other key
+    no_wilayah_pulau = lookup_values(ctx['registry']['pulau'], [pd.Series([np.nan], dtype=object)], 'Pulau', normalized=True).iloc[0]
+    df['PULAU'] = take_matched(wilayah['table']['PULAU'], positions, index=df.index).where(positions >= 0, no_wilayah_pulau)
+    return df
+
+@processing_stage('supplier_and_payment', inputs=['Supplier', 'Term of Payment'], outputs=['SUPPLIER_', 'TOP'])
+def _supplier_and_payment(df, ctx):
     # Apply other string helpers
-    df['DEPARTMENT_'] = df['Department'].apply(project_string)
-    df['DIVISI'] = df['Department'].apply(divisi_string)
-    df['SUPPLIER_'] = df['Supplier'].apply(PTCV_strings)
-    df['TOP'] = df['Term of Payment'].apply(TOP_strings)
-    df['CATEGORYMERGED'] = df.apply(
-        lambda x: item_category_merged(x['Item Category'], x.get('Unit')), 
-        axis=1
-    )
-    df['CATEGORYVALUE'] = df.apply(category_value_marker, axis=1)
-    df['CATEGORYVALUEXCMG'] = df.apply(category_value_xcmg, axis=1)
-    df['VALUE'] = 1
-    
-    # specific item within category is not calculated, calculated item is with 1 
-    df.loc[df.groupby("PO Number")["CATEGORYVALUE"].transform("max") == 1, "VALUE"] = 0
-    df.loc[df.groupby("PO Number")["CATEGORYVALUEXCMG"].transform("max") == 1, "VALUE"] = 0
-    
-    first_occurrence_mask = ~df.duplicated(subset=['PO Number'])
-    df.loc[first_occurrence_mask & (df.groupby('PO Number')['VALUE'].transform('sum') == 0), 'VALUE'] = 1
-    
-    df['UNIQUE COUNT PO'] = np.where(~df['PO Number'].duplicated(), 1, 0)
-    df['Final_ItemID'] = df['Item ID']
+    df['SUPPLIER_'] = apply_on_unique(df['Supplier'], PTCV_strings)
+    df['TOP'] = apply_on_unique(df['Term of Payment'], TOP_strings)
+    return df
+
+@processing_stage('category_merged', inputs=['Item Category', 'Unit'], outputs=['CATEGORYMERGED'])
+def _category_merged(df, ctx):
+    df['CATEGORYMERGED'] = item_category_merged_vectorized(df['Item Category'], df.get('Unit'))
+    return df
+
+#PO Number is factorized once per run; every per-PO transform below reads this index
+#instead of grouping df again. Stages keep the row order, so the codes stay aligned.
+@processing_stage('po_group_index', inputs=['PO Number'], outputs=['po_groups'])
+def _po_group_index(df, ctx):
+    codes, _ = unique_text_view(ctx['text_views'], df, 'PO Number', 'raw')
+    ctx['po_groups'] = build_po_group_index(df['PO Number'], codes=codes)
+    return df
+
+@processing_stage(
+    'po_value',
+    inputs=['Item Category', 'Requisition Type', 'Item Name', 'Background Needs', 'po_groups'],
+    outputs=['CATEGORYVALUE', 'CATEGORYVALUEXCMG', 'VALUE', 'UNIQUE COUNT PO']
+)
+def _po_value(df, ctx):
+    po_groups = ctx['po_groups']
+    df['CATEGORYVALUE'] = category_value_marker_vectorized(df['Item Category'], df['Requisition Type'], df['Item Name'])
+    df['CATEGORYVALUEXCMG'] = category_value_xcmg_vectorized(df['Requisition Type'], df['Item Category'], df['Background Needs'])
+    value = np.ones(len(df), dtype=np.int64)
 
+    # specific item within category is not calculated, calculated item is with 1
+    value[po_group_max(po_groups, df['CATEGORYVALUE']) == 1] = 0
+    value[po_group_max(po_groups, df['CATEGORYVALUEXCMG']) == 1] = 0
 
-    # --- Step 2: Time-Based Calculations ---
+    value[po_groups['is_first'] & (po_group_sum(po_groups, value) == 0)] = 1
+    df['VALUE'] = value
+
+    df['UNIQUE COUNT PO'] = np.where(po_groups['is_first'], 1, 0)
+    return df
+
+# ---------------------------------------------------------
+# Step 2: Time-Based Calculations
+# ---------------------------------------------------------
+@processing_stage(
+    'time_date',
+    inputs=['LOC', 'Item Category', 'PO Number', 'used_approved_date'],
+    refs=['timedate_normalized_df'],
+    outputs=['TIME DATE']
+)
+def _time_date(df, ctx):
     print("running step 2: time-based calculations...")
 
     # Set TIME DATE baseline using helper
-    days_to_add = determine_time_date_days(df['LOC'], df['Item Category']) 
+    days_to_add = determine_time_date_days(df['LOC'], df['Item Category'])
 
-    timedate_norm_map = timedate_normalized_df.set_index('PO Number')['timedate']
-    overrides = df['PO Number'].map(timedate_norm_map)
+    timedate = ctx['registry']['timedate']
+    overrides = lookup_values(timedate, frame_keys(timedate, df, ctx['text_views']), 'timedate', index=df.index, normalized=True)
 
     final_days_to_add = overrides.fillna(pd.Series(days_to_add, index=df.index)).astype(int)
-    df['TIME DATE'] = used_approved_date + pd.to_timedelta(final_days_to_add, unit='D')
-    
+    df['TIME DATE'] = ctx['used_approved_date'] + pd.to_timedelta(final_days_to_add, unit='D')
+    return df
+
+@processing_stage('calculable_mask', inputs=['VALUE', 'Requisition Type', 'Item Category', 'PO Approval Date'], outputs=['is_calculable'])
+def _calculable_mask(df, ctx):
     # Condition mask for time-based calculations
-    
+
     # Exclude Jasa Logistik
     # Include Solar ONLY IF PO Approval Date year >= 2026
     is_valid_category = (
-        (df['Item Category'] != 'Jasa Logistik') & 
+        (df['Item Category'] != 'Jasa Logistik') &
         ( (df['Item Category'] != 'Solar') | (df['PO Approval Date'].dt.year >= 2026) )
     )
 
-    is_calculable = (
+    ctx['is_calculable'] = (
         (df['VALUE'] == 1)
         & (df['Requisition Type'] != 'Consignment')
         & is_valid_category
     )
-    
-    # Calculate time differences using apply and helper functions (with normalized data)
+    return df
+
+@processing_stage(
+    'lebaran_durations',
+    inputs=['is_calculable', 'used_approved_date', 'lebaran_calendar', 'PO Submit Date', 'PO Approval Date',
+            'Receive PO Date', 'Received TL Date', 'Item Category', 'Location TL Received', 'LOC'],
+    outputs=['PR - PO', 'PO SUB - PO APP', 'PO - R PO', 'R-R SITE']
+)
+def _lebaran_durations(df, ctx):
+    is_calculable = ctx['is_calculable']
+    used_approved_date = ctx['used_approved_date']
+    lebaran_calendar = ctx['lebaran_calendar']
+
+    stats = ctx['masked_stats']
+
+    def lebaran_days(start_dates, end_dates):
+        return days_excluding_lebaran_vectorized(start_dates, end_dates, lebaran_calendar)
+
+    # Calculate time differences using the vectorized lebaran calendar (with normalized data), on the calculable rows only
     df['PR - PO'] = pd.Series(
-        np.where(
-            is_calculable, 
-            df.apply(lambda row: days_excluding_lebaran(used_approved_date[row.name], row['PO Submit Date'], lebaran_dates), axis=1), 
-            np.nan
-        )).clip(lower=0)
-    
-    df['PO SUB - PO APP'] = np.where(
-        is_calculable, 
-        df.apply(lambda row: days_excluding_lebaran(row['PO Submit Date'], row['PO Approval Date'], lebaran_dates), axis=1), 
-        np.nan
+        masked_compute(is_calculable, lebaran_days, [used_approved_date, df['PO Submit Date']], stats=stats, name='PR - PO')
+    ).clip(lower=0)
+
+    df['PO SUB - PO APP'] = masked_compute(
+        is_calculable, lebaran_days, [df['PO Submit Date'], df['PO Approval Date']], stats=stats, name='PO SUB - PO APP'
     )
 
     is_calculable_po_rpo = df['PR - PO'].notna() & df['Receive PO Date'].notna() & (df['Item Category'] != 'Jasa/Service')
-    df['PO - R PO'] = np.where(
-        is_calculable_po_rpo, 
-        df.apply(lambda row: days_excluding_lebaran(row['PO Approval Date'], row['Receive PO Date'], lebaran_dates), axis=1), 
-        np.nan
+    df['PO - R PO'] = masked_compute(
+        is_calculable_po_rpo, lebaran_days, [df['PO Approval Date'], df['Receive PO Date']], stats=stats, name='PO - R PO'
     )
 
     is_calculable_r_rsite = df['PR - PO'].notna() & df['Receive PO Date'].notna() & (df['Item Category'] != 'Jasa/Service') & df['Location TL Received'].notna() & (df['LOC'] != 'HO')
-    df['R-R SITE'] = np.where(
-        is_calculable_r_rsite, 
-        df.apply(lambda row: days_excluding_lebaran(row['Receive PO Date'], row['Received TL Date'], lebaran_dates), axis=1), 
-        np.nan
+    df['R-R SITE'] = masked_compute(
+        is_calculable_r_rsite, lebaran_days, [df['Receive PO Date'], df['Received TL Date']], stats=stats, name='R-R SITE'
     )
+    return df
+
+@processing_stage(
+    'workday_durations',
+    inputs=['is_calculable', 'used_approved_date', 'holidays', 'PO Submit Date', 'PO Approval Date'],
+    outputs=['PR - PO SUB WD', 'PO SUB - PO APP WD']
+)
+def _workday_durations(df, ctx):
+    is_calculable = ctx['is_calculable']
+    used_approved_date = ctx['used_approved_date']
+    holidays = ctx['holidays']
 
     #Calculate PR - PO SUB WD (Work days)
     df['PR - PO SUB WD'] = np.nan
@@ -235,7 +448,7 @@ def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays
     final_valid_index = start_dates_filtered[final_valid_mask].index
     valid_start_dates = start_dates_filtered[final_valid_mask]
     valid_end_dates = end_dates_filtered[final_valid_mask]
-    
+
     if not final_valid_index.empty:
         df.loc[final_valid_index, 'PO SUB - PO APP WD'] = np.busday_count(
             valid_start_dates.values.astype('datetime64[D]'),
@@ -243,48 +456,93 @@ def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays
             weekmask='1111100',
             holidays=holidays
         )
-    
+    return df
+
+@processing_stage(
+    'financials',
+    inputs=['Requisition SubTotal', 'Exchange Rate', 'Qty Order', 'PO Price', 'Jumlah PPN'],
+    outputs=['REQUISITION_TOTAL', 'PO_TOTAL', 'BUDGET', 'BUDGET%']
+)
+def _financials(df, ctx):
     # Calculate Financials
     df['REQUISITION_TOTAL'] = (df['Requisition SubTotal'] * df['Exchange Rate']) * 1.11
     df['PO_TOTAL'] = (df['Qty Order'] * df['PO Price'] * df['Exchange Rate']) + (df['Jumlah PPN'] * df['Exchange Rate'])
     df['BUDGET'] = (df['REQUISITION_TOTAL'] - df['PO_TOTAL']).round(2)
     df['BUDGET%'] = (df['PO_TOTAL'] / df['REQUISITION_TOTAL']).clip(upper=1)
-    
-    # Calculate Logistics Time Splits
-    df['RPO-TLC'] = np.where(df['R-R SITE'].notna(), (df['Created TL Date'] - df['Receive PO Date']).dt.days, np.nan)
-    df['TLC-SHIP'] = np.where(df['R-R SITE'].notna(), (df['Shipped Date'] - df['Created TL Date']).dt.days, np.nan)
-    df['SHIP-RSITE'] = np.where(df['R-R SITE'].notna(), (df['Received TL Date'] - df['Shipped Date']).dt.days, np.nan)
+    return df
+
+@processing_stage(
+    'logistics_splits',
+    inputs=['R-R SITE', 'Created TL Date', 'Receive PO Date', 'Shipped Date', 'Received TL Date'],
+    outputs=['RPO-TLC', 'TLC-SHIP', 'SHIP-RSITE']
+)
+def _logistics_splits(df, ctx):
+    # Calculate Logistics Time Splits, only where R-R SITE exists
+    stats = ctx['masked_stats']
+    has_r_rsite = df['R-R SITE'].notna()
+
+    def day_span(start_dates, end_dates):
+        return (end_dates - start_dates).dt.days
 
+    df['RPO-TLC'] = masked_compute(has_r_rsite, day_span, [df['Receive PO Date'], df['Created TL Date']], stats=stats, name='RPO-TLC')
+    df['TLC-SHIP'] = masked_compute(has_r_rsite, day_span, [df['Created TL Date'], df['Shipped Date']], stats=stats, name='TLC-SHIP')
+    df['SHIP-RSITE'] = masked_compute(has_r_rsite, day_span, [df['Shipped Date'], df['Received TL Date']], stats=stats, name='SHIP-RSITE')
+    return df
+
+@processing_stage(
+    'purchasing_ontime',
+    inputs=['is_calculable', 'used_approved_date', 'lebaran_calendar', 'PO Approval Date', 'Procurement Name'],
+    outputs=['Purchasing_Duration', 'STATUS_Purchasing', 'ON_TIME_Purchasing', 'LATE_Purchasing', 'ON_TIME%_Purchasing']
+)
+def _purchasing_ontime(df, ctx):
     # --- Purchasing On-Time Calculation ---
     print("calculating purchasing on-time metric...")
-    
-    df['Purchasing_Duration'] = np.where(
-        is_calculable, 
-        df.apply(lambda row: days_excluding_lebaran(used_approved_date[row.name], row['PO Approval Date'], lebaran_dates), axis=1),
-        np.nan
+
+    df['Purchasing_Duration'] = masked_compute(
+        ctx['is_calculable'],
+        lambda start_dates, end_dates: days_excluding_lebaran_vectorized(start_dates, end_dates, ctx['lebaran_calendar']),
+        [ctx['used_approved_date'], df['PO Approval Date']], stats=ctx['masked_stats'], name='Purchasing_Duration'
     )
 
     # Use helper function to calculate all status flags at once
     df['STATUS_Purchasing'], df['ON_TIME_Purchasing'], df['LATE_Purchasing'], df['ON_TIME%_Purchasing'] = \
         calculate_purchasing_status(df['Procurement Name'], df['Purchasing_Duration'])
+    return df
 
-
-    # --- Step 3: Logistics & Receiving Status ---
+# ---------------------------------------------------------
+# Step 3: Logistics & Receiving Status
+# ---------------------------------------------------------
+@processing_stage(
+    'logistic_freight',
+    inputs=['Item Category', 'Supplier', 'PO Number'],
+    refs=['freight_df', 'rara_df', 'ryi_df', 'way_df', 'sln_df'],
+    outputs=['LOGISTIC_FREIGHT']
+)
+def _logistic_freight(df, ctx):
     print("running step 3: logistics & receiving status...")
-    freight_mapping = dict(zip(freight_df['Supplier'], freight_df['Freight Type']))
-    
-    # Pre-compute RARA/RYI PO-to-Freight Type Mappings
-    rara_map = rara_df.drop_duplicates(subset=['PO Number']).set_index('PO Number')['Freight Type'].to_dict()
-    ryi_map = ryi_df.drop_duplicates(subset=['PO Number']).set_index('PO Number')['Freight Type'].to_dict()
-    way_map = way_df.drop_duplicates(subset=['PO Number']).set_index('PO Number')['Freight Type'].to_dict()
-    sln_map = sln_df.drop_duplicates(subset=['PO Number']).set_index('PO Number')['Freight Type'].to_dict()
-
-    df['LOGISTIC_FREIGHT'] = np.where(
-        df['Item Category'] == 'Jasa Logistik', 
-        df.apply(determine_freight, axis=1, args=(freight_mapping, rara_map, ryi_map, way_map, sln_map)), 
-        ''
+    registry = ctx['registry']
+    freight_mapping = lookup_series(registry['freight'], 'Freight Type')
+
+    # RARA/RYI/WAY/SLN PO-to-Freight Type Mappings from the registry
+    rara_map = lookup_series(registry['rara'], 'Freight Type')
+    ryi_map = lookup_series(registry['ryi'], 'Freight Type')
+    way_map = lookup_series(registry['way'], 'Freight Type')
+    sln_map = lookup_series(registry['sln'], 'Freight Type')
+
+    df['LOGISTIC_FREIGHT'] = resolve_logistic_freight(
+        df['Item Category'], df['Supplier'], df['PO Number'],
+        freight_mapping, rara_map, ryi_map, way_map, sln_map, stats=ctx['masked_stats']
     )
-    
+    return df
+
+@processing_stage(
+    'rec_status',
+    inputs=['PO Required Date', 'Requisition Required Date', 'TIME DATE', 'Receive PO Date', 'Received TL Date',
+            'VALUE', 'Requisition Type', 'Item Category', 'lebaran_calendar'],
+    outputs=['FARTHEST REQUIRED DATE', 'USED RECEIVE DATE', 'REC', 'STATUS REC', 'ON_TIME', 'LATE', 'ON_TIME%',
+             'ON_TIME%_original_purchasing']
+)
+def _rec_status(df, ctx):
     df['FARTHEST REQUIRED DATE'] = df[['PO Required Date', 'Requisition Required Date', 'TIME DATE']].max(axis=1)
     # df['USED RECEIVE DATE'] = np.where(
     #     df['PO Receive Location'] == df['Final Destination Location'],
@@ -292,43 +550,55 @@ def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays
     #     df['Received TL Date']
     #     )
     df['USED RECEIVE DATE'] = df['Receive PO Date'].fillna(df['Received TL Date'])
-    
-    df['REC'] = np.where(df['VALUE'] == 1, 
-        df.apply(lambda row: days_excluding_lebaran(row['FARTHEST REQUIRED DATE'], row['USED RECEIVE DATE'], lebaran_dates), axis=1), 
-        np.nan)
-    
-    df['STATUS REC'] = np.where(
-        df['REC'].isna(), 
-        "", 
-        np.where(
-            df['Requisition Type'] == "Consignment", 
-            "On Time", 
-            np.where(df['REC'] >= 1, "Late", "On Time")
-        )
+
+    df['REC'] = masked_compute(
+        df['VALUE'] == 1,
+        lambda start_dates, end_dates: days_excluding_lebaran_vectorized(start_dates, end_dates, ctx['lebaran_calendar']),
+        [df['FARTHEST REQUIRED DATE'], df['USED RECEIVE DATE']], stats=ctx['masked_stats'], name='REC'
+    )
+
+    # codes into REC_STATUSES: 0 On Time, 1 Late, 2 ''
+    status_rec_codes = np.select(
+        [df['REC'].isna(), df['Requisition Type'] == "Consignment", df['REC'] >= 1],
+        [2, 0, 1],
+        default=0
     )
-    df['ON_TIME'] = np.where(df['STATUS REC'] == 'On Time', 1, np.nan)
-    df['LATE'] = np.where(df['STATUS REC'] == 'Late', 1, np.nan)
-    df['ON_TIME%'] = np.where(df['STATUS REC'] == 'On Time', 1, np.where(df['STATUS REC'] == 'Late', 0, np.nan))
-    
+    df['STATUS REC'] = status_categorical(status_rec_codes, REC_STATUSES)
+    df['ON_TIME'], df['LATE'], df['ON_TIME%'] = on_time_flags(status_rec_codes)
+
     special_ontime_categories = ['Jasa/Service', 'Solar']
     mask_special_ontime = df['Item Category'].isin(special_ontime_categories)
     df.loc[mask_special_ontime, 'STATUS REC'] = 'On Time'
     df.loc[mask_special_ontime, 'ON_TIME'] = 1
     df.loc[mask_special_ontime, 'LATE'] = np.nan
     df.loc[mask_special_ontime, 'ON_TIME%'] = 1
-    
+
     df['ON_TIME%_original_purchasing'] = df['ON_TIME%']
+    return df
+
+@processing_stage(
+    'receiving_status',
+    inputs=['Final Destination Location', 'PO Receive Location', 'Qty Order', 'Qty Received', 'TL Number',
+            'TL Qty Received', 'Qty Shipped', 'Location TL Received', 'Requisition Type', 'Item Category', 'Shipping Type'],
+    outputs=['LOGISTICAL_PROCESS', 'RECEIVE_INDICATOR_PO', 'RECEIVE_PO_STATUS', 'TL_NUMBER_?', 'RECEIVE_INDICATOR_LOGISTIC',
+             'TL_RECEIVE_INFO', 'FULLY_RECEIVE_INFO', 'RECEIVED', 'NOT_RECEIVED', 'TRANSFER_ITEM',
+             'SHIPPING_TYPE_LAND', 'SHIPPING_TYPE_SEA', 'SHIPPING_TYPE_AIR']
+)
+def _receiving_status(df, ctx):
     df['LOGISTICAL_PROCESS'] = (df['Final Destination Location'] != df['PO Receive Location']).astype(int)
     df['RECEIVE_INDICATOR_PO'] = (df['Qty Order'] == df['Qty Received']).astype(int)
-    df['RECEIVE_PO_STATUS'] = np.where(df['Qty Received'] == 0, "PO Not Received", np.where(df['Qty Order'] == df['Qty Received'], "Fully Received", "Partial Received"))
+    df['RECEIVE_PO_STATUS'] = status_categorical(
+        np.select([df['Qty Received'] == 0, df['Qty Order'] == df['Qty Received']], [0, 1], default=2),
+        RECEIVE_PO_STATUSES
+    )
     df['TL_NUMBER_?'] = df['TL Number'].notnull().astype(int)
-    
+
     df['RECEIVE_INDICATOR_LOGISTIC'] = np.where(
         df['LOGISTICAL_PROCESS'] == 1,
         ((df['TL Qty Received'] == df['Qty Shipped']) & (df['Qty Order'] == df['Qty Received'])).astype(int),
         0
     )
-    
+
     conditions_tl = [
         df['LOGISTICAL_PROCESS'] == 0,
         (df['LOGISTICAL_PROCESS'] == 1) & (df['RECEIVE_PO_STATUS'] == "PO Not Received"),
@@ -338,44 +608,66 @@ def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays
         (df['Location TL Received'] == df['Final Destination Location']) & (df['TL Qty Received'] == df['Qty Shipped']) & (df['Qty Shipped'] == df['Qty Order']) & (df['Qty Order'] == df['Qty Received']),
         (df['Location TL Received'] == df['Final Destination Location'])
     ]
-    choices_tl = ["Without Logistical Process", "PO Not Received", "Transfer List Preparation", "On Transit", "At Intermediate Location", "Fully Received", "Partial Received"]
-    df['TL_RECEIVE_INFO'] = np.select(conditions_tl, choices_tl, default="Check Status")
-    
+    # codes into TL_RECEIVE_STATUSES, last label "Check Status" is the default
+    choices_tl = list(range(len(conditions_tl)))
+    df['TL_RECEIVE_INFO'] = status_categorical(np.select(conditions_tl, choices_tl, default=len(conditions_tl)), TL_RECEIVE_STATUSES)
+
     fully_received_cond = (df['Requisition Type'] == "Consignment") | (df['Item Category'] == "Jasa Logistik") | ((df['LOGISTICAL_PROCESS'] == 0) & (df['RECEIVE_INDICATOR_PO'] == 1)) | ((df['TL_RECEIVE_INFO'] == "Fully Received") & (df['RECEIVE_INDICATOR_PO'] == 1))
     df['FULLY_RECEIVE_INFO'] = np.where(fully_received_cond, 1, 0)
-    
+
     df['RECEIVED'] = np.where(df['FULLY_RECEIVE_INFO'] == 1, 1, np.nan)
     df['NOT_RECEIVED'] = np.where(df['FULLY_RECEIVE_INFO'] == 0, 1, np.nan)
-    
-    df['TRANSFER_ITEM'] = np.where((df['LOGISTICAL_PROCESS'] == 0) & (df['TL_NUMBER_?'] == 1), "Transfer Item", "")
-    df['SHIPPING_TYPE_LAND'] = np.where(df['Shipping Type'].astype(str).str.contains('darat', case=False, na=False), 'Land', '')
-    df['SHIPPING_TYPE_SEA'] = np.where(df['Shipping Type'].astype(str).str.contains('laut', case=False, na=False), 'Sea', '')
-    df['SHIPPING_TYPE_AIR'] = np.where(df['Shipping Type'].astype(str).str.contains('udara', case=False, na=False), 'Air', '')
 
+    df['TRANSFER_ITEM'] = status_categorical(np.where((df['LOGISTICAL_PROCESS'] == 0) & (df['TL_NUMBER_?'] == 1), 0, 1), ["Transfer Item", ""])
 
-    # --- Step 4: Fully Received PO Status ---
+    # Shipping Type keywords are searched once per distinct value; a missing Shipping Type matches none
+    shipping_codes, shipping_types = unique_text_view(ctx['text_views'], df, 'Shipping Type', 'str')
+    def has_keyword(word):
+        return np.append(shipping_types.str.contains(word, case=False, na=False).to_numpy(dtype=bool), False)[shipping_codes]
+
+    df['SHIPPING_TYPE_LAND'] = status_categorical(np.where(has_keyword('darat'), 0, 1), ['Land', ''])
+    df['SHIPPING_TYPE_SEA'] = status_categorical(np.where(has_keyword('laut'), 0, 1), ['Sea', ''])
+    df['SHIPPING_TYPE_AIR'] = status_categorical(np.where(has_keyword('udara'), 0, 1), ['Air', ''])
+    return df
+
+# ---------------------------------------------------------
+# Step 4: Fully Received PO Status
+# ---------------------------------------------------------
+@processing_stage('po_receive', inputs=['po_groups', 'RECEIVED'], outputs=['PO_RECEIVE'])
+def _po_receive(df, ctx):
     print("running step 4: fully received po status...")
-    po_group_counts = df.groupby('PO Number')['PO Number'].transform('count')
-    po_group_received = df.groupby('PO Number')['RECEIVED'].transform('sum')
+    po_group_counts = po_group_size(ctx['po_groups'])
+    po_group_received = po_group_sum(ctx['po_groups'], df['RECEIVED'])
     is_fully_received = (po_group_counts == po_group_received)
-    df['PO_RECEIVE'] = np.where(is_fully_received, 'Fully Received', '')
-
+    df['PO_RECEIVE'] = status_categorical(np.where(is_fully_received, 0, 1), ['Fully Received', ''])
+    return df
 
-    # --- Step 5: Jasa Service Merge ---
+# ---------------------------------------------------------
+# Step 5: Jasa Service Merge
+# ---------------------------------------------------------
+#a uid repeated in jasa_service_df fans out rows, so only full runs match the original row count in that case
+@processing_stage('jasa_service', inputs=['Item ID', 'PO Number'], refs=['jasa_service_df'], outputs=['JS_SERVICE'])
+def _jasa_service(df, ctx):
     print("running step 5: jasa service merge...")
-    
-    df_itemID_clean = df['Item ID'].astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
-    df_poNum_clean = df['PO Number'].astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
-    js_itemID_clean = jasa_service_df['Item ID'].astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
-    js_poNum_clean = jasa_service_df['PO Number'].astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
-    
-    df['uid'] = df_itemID_clean + df_poNum_clean
-    jasa_service_df['uid'] = js_itemID_clean + js_poNum_clean
-    
-    df = df.merge(jasa_service_df[['uid', 'JS_SERVICE']], on='uid', how='left')
-    df.drop(columns=['uid'], inplace=True)
+    jasa_service = ctx['registry']['jasa_service']
+
+    # uid = (Item ID, PO Number) with the '.0' float-ID cleanup on both parts, as packed integer codes
+    df['uid'] = lookup_keys(jasa_service, frame_keys(jasa_service, df, ctx['text_views']), normalized=True)
+    js_keys = pd.DataFrame({'uid': jasa_service['index']['keys'], 'JS_SERVICE': jasa_service['table']['JS_SERVICE']})
 
+    df = df.merge(js_keys, on='uid', how='left')
+    df.drop(columns=['uid'], inplace=True)
+    return df
 
+# ---------------------------------------------------------
+# Step 6: Normalizations
+# ---------------------------------------------------------
+@processing_stage(
+    'purchasing_normalization',
+    inputs=['Item Category', 'VALUE', 'STATUS_Purchasing', 'ON_TIME_Purchasing', 'LATE_Purchasing', 'ON_TIME%_Purchasing'],
+    outputs=['STATUS_Purchasing', 'ON_TIME_Purchasing', 'LATE_Purchasing', 'ON_TIME%_Purchasing']
+)
+def _purchasing_normalization(df, ctx):
     # --- Step 6a: Apply Purchasing Business Rule Normalizations ---
     print("running step 6a: apply purchasing business rule normalizations...")
     is_jasa_logistik_tracked = (df['Item Category'].str.contains('Jasa Logistik|Solar', na=False)) & (df['VALUE'] == 1)
@@ -383,74 +675,109 @@ def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays
     df.loc[is_jasa_logistik_tracked, 'ON_TIME_Purchasing'] = 1
     df.loc[is_jasa_logistik_tracked, 'LATE_Purchasing'] = np.nan
     df.loc[is_jasa_logistik_tracked, 'ON_TIME%_Purchasing'] = 1
+    return df
 
+@processing_stage('po_number_cleanup', inputs=['PO Number'], outputs=['PO Number'])
+def _po_number_cleanup(df, ctx):
+    df['PO Number'] = text_view(ctx['text_views'], df, 'PO Number', 'str_strip')
+    return df
 
+@processing_stage(
+    'delivery_normalization',
+    inputs=['PO Number', 'VALUE', 'STATUS REC', 'ON_TIME', 'LATE', 'ON_TIME%'],
+    refs=['ontime_normalized_df', 'notcounted_df'],
+    outputs=['STATUS REC', 'ON_TIME', 'LATE', 'ON_TIME%']
+)
+def _delivery_normalization(df, ctx):
     # --- Step 6b: Apply Manual Delivery On-Time Normalizations ---
     print("running step 6b: applying manual delivery on-time normalizations...")
-    df['PO Number'] = df['PO Number'].astype(str).str.strip()
-    ontime_normalized_df['PO Number'] = ontime_normalized_df['PO Number'].astype(str).str.strip()
-    notcounted_df['PO Number'] = notcounted_df['PO Number'].astype(str).str.strip()
-    
-    mask_ontime = df['PO Number'].isin(ontime_normalized_df['PO Number']) & (df['VALUE'] == 1)
+    registry = ctx['registry']
+
+    ontime_normalized = registry['ontime_normalized']
+    mask_ontime = lookup_contains(ontime_normalized, frame_keys(ontime_normalized, df, ctx['text_views']), normalized=True) & (df['VALUE'] == 1)
     df.loc[mask_ontime, 'STATUS REC'] = 'On Time'
     df.loc[mask_ontime, 'ON_TIME'] = 1
     df.loc[mask_ontime, 'LATE'] = np.nan
     df.loc[mask_ontime, 'ON_TIME%'] = 1
-    
-    mask_excluded = df['PO Number'].isin(notcounted_df['PO Number'])
+
+    notcounted = registry['notcounted']
+    mask_excluded = lookup_contains(notcounted, frame_keys(notcounted, df, ctx['text_views']), normalized=True)
     df.loc[mask_excluded, 'STATUS REC'] = None
     df.loc[mask_excluded, ['ON_TIME', 'LATE', 'ON_TIME%']] = np.nan
+    return df
 
-
+@processing_stage('logistic_normalization', inputs=['PO Number'], refs=['logistic_normalized_df'], outputs=['ON_TIME%_logistic'])
+def _logistic_normalization(df, ctx):
     # --- Step 6c: Apply Logistic On-Time Normalizations ---
     print("running step 6c: applying logistic on-time normalizations...")
-    logistic_normalized_df['PO Number'] = logistic_normalized_df['PO Number'].astype(str).str.strip()
-    logistic_normalized_po_set = set(logistic_normalized_df['PO Number'].unique())
-    df['ON_TIME%_logistic'] = df['PO Number'].apply(lambda po: 1 if po in logistic_normalized_po_set else np.nan)
-
-
+    logistic_normalized = ctx['registry']['logistic_normalized']
+    is_normalized = lookup_contains(logistic_normalized, frame_keys(logistic_normalized, df, ctx['text_views']), normalized=True)
+    df['ON_TIME%_logistic'] = np.where(is_normalized, 1, np.nan)
+    return df
 
+# ---------------------------------------------------------
+# Step 7 - 9: Cost Saving, Final_ItemID and Routine
+# ---------------------------------------------------------
+@processing_stage('cost_saving', inputs=['Item Name', 'PO Number', 'Cost Saving'], refs=['cost_saving_df'], outputs=['Cost Saving'])
+def _cost_saving(df, ctx):
     # --- Step 7: Apply Cost Saving Updates ---
     print("running step 7: apply cost saving updates...")
-    df['Unicode_Key'] = df['Item Name'].astype(str) + '-' + df['PO Number'].astype(str)
-    cost_saving_df['Unicode_Key'] = cost_saving_df['Item Name'].astype(str) + '-' + cost_saving_df['PO Number'].astype(str)
-    
-    cost_saving_dict = cost_saving_df.drop_duplicates(subset='Unicode_Key').set_index('Unicode_Key')['Cost Saving']
-    updated_cost_saving = df['Unicode_Key'].map(cost_saving_dict)
-    
-    df['Cost Saving'] = updated_cost_saving.fillna(df['Cost Saving'])
+    # Unicode_Key = (Item Name, PO Number) as packed integer codes, first cost saving row per key wins
+    cost_saving = ctx['registry']['cost_saving']
+    updated_cost_saving = lookup_values(cost_saving, frame_keys(cost_saving, df, ctx['text_views']), 'Cost Saving', index=df.index, normalized=True)
 
+    df['Cost Saving'] = updated_cost_saving.fillna(df['Cost Saving'])
+    return df
 
+@processing_stage('final_item_id', inputs=['Item ID'], outputs=['Final_ItemID'])
+def _final_item_id(df, ctx):
     # --- Step 8: Create Final_ItemID ---
     print("creating final_itemid (using item id as final id)...")
     df['Final_ItemID'] = df['Item ID']
+    return df
 
-    
+@processing_stage(
+    'routine',
+    inputs=['Routine', 'CATEGORYMERGED', 'Item Name', 'Procurement Name', 'Supplier', 'Requisition Type'],
+    outputs=['_Routine']
+)
+def _routine(df, ctx):
     # --- Step 9: Apply Routine Categorization Updates ---
     print("applying routine categorization updates...")
 
-    category_l = df['CATEGORYMERGED'].str.lower().fillna('')
-    item_name_l = df['Item Name'].str.lower().fillna('')
-    pic_name_l = df['Procurement Name'].str.strip().fillna('').str.lower()
-    supplier_name_l = df['Supplier'].str.strip().fillna('').str.lower()
-    requisition_type_l = df['Requisition Type'].str.strip().fillna('').str.lower()
+    # lower-cased views come from the run's text view cache, computed once per distinct value
+    text_views = ctx['text_views']
+    category_l = text_view(text_views, df, 'CATEGORYMERGED', 'lower').fillna('')
+    item_name_l = text_view(text_views, df, 'Item Name', 'lower').fillna('')
+    pic_name_l = text_view(text_views, df, 'Procurement Name', 'strip_lower').fillna('')
+    supplier_name_l = text_view(text_views, df, 'Supplier', 'strip_lower').fillna('')
+    requisition_type_l = text_view(text_views, df, 'Requisition Type', 'strip_lower').fillna('')
 
     df['_Routine'] = df['Routine']
 
     df['_Routine'] = apply_routine_logic(df['_Routine'], category_l, item_name_l, pic_name_l, requisition_type_l, supplier_name_l)
+    return df
 
+# ---------------------------------------------------------
+# Step 20 - 23: Original On Time, Cost Saving Fix, Logistic Lead Time
+# ---------------------------------------------------------
+@processing_stage('overall_original_ontime', inputs=['Item Category', 'REC'], outputs=['ON_TIME%_overall_original'])
+def _overall_original_ontime(df, ctx):
     # 20. On time unnormalized
     print("pulling unnormalized on time%...")
     df['ON_TIME%_overall_original'] = np.where(
         df['Item Category'].isin(['Jasa/Service', 'Solar']),
-        1,                                                  
-        np.where(                                             
-            df['REC'].isna(),                                  
-            np.nan,                                             
-            np.where(df['REC'] >= 1, 0, 1)                      
+        1,
+        np.where(
+            df['REC'].isna(),
+            np.nan,
+            np.where(df['REC'] >= 1, 0, 1)
         )
     )
+    return df
 
+@processing_stage('cost_saving_2024_fix', inputs=['Item ID', 'PO Number', 'Cost Saving'], outputs=['Cost Saving'])
+def _cost_saving_2024_fix(df, ctx):
     # 21. Update 2024 Logistic Cost Saving
     print("updating 2024 logistic cost saving...")
     df['Cost Saving'] = np.where(
@@ -458,14 +785,29 @@ def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays
         674957950,
         df['Cost Saving']
     )
+    return df
 
+@processing_stage(
+    'logistic_lead_time',
+    inputs=['Created TL Date', 'Receive PO Date', 'Shipped Date', 'Received TL Date'],
+    outputs=['Total_Logistic_Lead_Time']
+)
+def _logistic_lead_time(df, ctx):
     # 22. Calculate physical lead time splits directly from raw dates
     print("calculating total logistic lead time...")
     rpo_tlc_phys = (df['Created TL Date'] - df['Receive PO Date']).dt.days
     tlc_ship_phys = (df['Shipped Date'] - df['Created TL Date']).dt.days
     ship_rsite_phys = (df['Received TL Date'] - df['Shipped Date']).dt.days
     df['Total_Logistic_Lead_Time'] = rpo_tlc_phys + tlc_ship_phys + ship_rsite_phys
+    return df
 
+@processing_stage(
+    'logistic_ontime',
+    inputs=['VALUE', 'RECEIVED', 'Received TL Date', 'Requisition Type', 'PO Receive Location', 'LOGISTICAL_PROCESS',
+            'Item Category', 'Final Destination Location', 'LOC', 'Total_Logistic_Lead_Time'],
+    outputs=['logistic_on_time']
+)
+def _logistic_ontime(df, ctx):
     # 23. Calculate logistic on time status
     print("calculating logistic on-time marker...")
     is_calculable_logistic_ontime = (
@@ -478,288 +820,65 @@ def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays
         (df['Item Category'] != "Jasa Logistik") &
         (df['Item Category'] != "Jasa/Service")
     )
-    
-    conds = [
-        df['Final Destination Location'].isin(["Site IMS 52", "Site OPM", "Site KTS"]),
-        df['LOC'].isin({
-            "LC BARU", "LC FLUK", "LC LWI", "LC OBI",
-            "HO BARU", "HO FLUK", "HO LWI", "HO OBI"
-        })
-    ]
-    choices = [34, 24]
-    threshold = np.select(conds, choices, default=17)
-    
-    df['logistic_on_time'] = np.where(
-        is_calculable_logistic_ontime,
-        np.where(df['Total_Logistic_Lead_Time'].isna(), np.nan, np.where(df['Total_Logistic_Lead_Time'] <= threshold, 1, 0)),
-        np.nan
+
+    def on_time_marker(lead_time, final_destination, loc):
+        threshold = logistic_ontime_threshold(final_destination, loc)
+        return np.where(lead_time.isna(), np.nan, np.where(lead_time <= threshold, 1, 0))
+
+    df['logistic_on_time'] = masked_compute(
+        is_calculable_logistic_ontime, on_time_marker,
+        [df['Total_Logistic_Lead_Time'], df['Final Destination Location'], df['LOC']],
+        stats=ctx['masked_stats'], name='logistic_on_time'
     )
+    return df
+
+def run_all_processing(df, rfm_normalized_df, normalisasi_rfm_solar_df, holidays_df, wilayah_df, pulau_df, jasa_service_df,
+                       freight_df, rara_df, ryi_df, way_df, sln_df,
+                       cost_saving_df, timedate_normalized_df,
+                       ontime_normalized_df, notcounted_df, logistic_normalized_df,
+                       lebaran_dates_df=None, department_cache_path=None, validate=True, registry=None, stage_timings=None):
+    """
+    Executes the entire data processing and feature engineering pipeline
+    on the main Procurement DataFrame by running every registered stage.
+
+    :param department_cache_path: Optional parquet path for the persisted Department -> LOC/DEPARTMENT_/DIVISI table.
+    :param validate: Run validate_processed_data on the result (batch runners validate once at the end instead).
+    :param registry: Prebuilt reference registry shared across runs and partitions, built from the tables when None.
+    :param stage_timings: Optional dict receiving wall seconds per stage (see run_stages).
+    :return: The fully processed pandas DataFrame.
+    """
+    refs = dict(zip(REFERENCE_TABLES, [
+        rfm_normalized_df, normalisasi_rfm_solar_df, holidays_df, wilayah_df, pulau_df, jasa_service_df,
+        freight_df, rara_df, ryi_df, way_df, sln_df,
+        cost_saving_df, timedate_normalized_df,
+        ontime_normalized_df, notcounted_df, logistic_normalized_df,
+    ]))
+    refs['lebaran_dates_df'] = lebaran_dates_df
+
+    df = run_stages(df, refs, department_cache_path=department_cache_path, registry=registry, stage_timings=stage_timings)
 
     print("reordering columns and performing final cleanup...")
+    started = time.perf_counter()
     # --- Final Column Ordering and Cleanup ---
-    final_column_order = [
-        'Requisition Type', 'Item ID', 'Item Name', 'Item Category', 'Department', 
-        'Unit', 'Currency', 'Exchange Rate', 'PO Price', 'Qty Order', 
-        'PO Disc/Cost', 'PO Sub Total', 'Jumlah PPN', 'Qty Received', 'PO Receive Location', 
-        'PO Submit Date', 'PO Required Date', 'PO Approval Date', 'Receive PO Estimation', 'Receive PO Date', 
-        'Qty Handover', 'Handover Date', 'PO Number', 'Supplier', 'Supplier Location', 
-        'Term of Payment', 'PO Status', 'PO Progress Status', 'Status Update Date', 'Requisition Number', 
-        'Requisition Date', 'Requisition Submited Date', 'Requisition Approved Date', 'Requisition Required Date', 'Qty Requisition', 
-        'Requisition Unit Price', 'Requisition SubTotal', 'Asset / Non Asset', 'Cost Saving', 'Routine', 
-        'Urgent', 'Background Needs', 'Urgent Note', 'Urgent Cost', 'Procurement Name', 
-        'Req Status', 'Req Progress Status', 'TL Number', 'Shipping Type', 'Created TL Date', 
-        'Qty Shipped', 'Shipped Date', 'ETA Date', 'TL Qty Received', 'Received TL Date', 
-        'Location TL Received', 'Final Destination Location', 'Remarks', 'VALUE', 'UNIQUE COUNT PO', 
-        'CATEGORYMERGED', 'LOC', 'LEAD TIME', 'URGENT_NORMAL', 'NORMAL', 
-        'URGENT2', 'URGENT*', 'URGENT_FINALFORLOGBOOK', 'WILAYAH', 'PULAU', 
-        'DEPARTMENT_', 'DIVISI', 'SUPPLIER_', 'TOP', 'Updated Requisition Approved Date', 
-        'Updated Requisition Required Date', 'Background Update', 'TIME DATE', 'PR - PO', 'PO SUB - PO APP', 
-        'PO - R PO', 'R-R SITE', 'PR - PO SUB WD', 'PO SUB - PO APP WD', 'RPO-TLC', 'TLC-SHIP', 
-        'SHIP-RSITE', 'REQUISITION_TOTAL', 'PO_TOTAL', 'BUDGET', 'BUDGET%', 
-        'FARTHEST REQUIRED DATE', 'USED RECEIVE DATE', 'REC', 'STATUS REC', 'ON_TIME', 
-        'LATE', 'ON_TIME%', 'LOGISTICAL_PROCESS', 'RECEIVE_INDICATOR_PO', 'RECEIVE_PO_STATUS', 
-        'TL_NUMBER_?', 'RECEIVE_INDICATOR_LOGISTIC', 'TL_RECEIVE_INFO', 'FULLY_RECEIVE_INFO', 'TRANSFER_ITEM', 'SHIPPING_TYPE_LAND', 
-        'SHIPPING_TYPE_SEA', 'SHIPPING_TYPE_AIR', 'LOGISTIC_FREIGHT', 'RECEIVED', 'NOT_RECEIVED', 
-        'PO_RECEIVE', 'JS_SERVICE', 'ON_TIME%_overall_original' ,'ON_TIME%_original_purchasing', 'ON_TIME%_logistic', 'Final_ItemID',
-        'Purchasing_Duration', 'STATUS_Purchasing', 'ON_TIME_Purchasing', 'LATE_Purchasing', 'ON_TIME%_Purchasing','_Routine',
-        'Total_Logistic_Lead_Time', 'logistic_on_time'
-    ]
-    
-    for col in final_column_order:
+    for col in FINAL_COLUMN_ORDER:
         if col not in df.columns:
             df[col] = np.nan
-            
-    df = df[final_column_order]
-    
-    df.drop(columns=['Unicode_Key', 'CATEGORYVALUEXCMG', 'CATEGORYVALUE'], inplace=True, errors='ignore')
+
+    df = df[FINAL_COLUMN_ORDER]
+
+    df.drop(columns=['CATEGORYVALUEXCMG', 'CATEGORYVALUE'], inplace=True, errors='ignore')
+
+    # Declared output dtypes (categoricals, int8 flags, float32 day counts), the same for every batch and partition
+    df = apply_output_dtypes(df)
+    if stage_timings is not None:
+        stage_timings['final_cleanup'] = time.perf_counter() - started
 
     # Run post-processing data validation checks
-    validate_processed_data(df)
+    if validate:
+        validate_processed_data(df)
 
     print("processing complete!")
     return df
 
-def validate_processed_data(df):
-    """
-    Performs post-processing validation checks on the processed DataFrame,
-    prints a consolidated report to the console, and exports the detailed
-    anomalies to a CSV file.
-    """
-    print("\n" + "="*50)
-    print("             DATA VALIDATION REPORT             ")
-    print("="*50)
-    
-    has_issues = False
-    anomalies = []
-    
-    # 1. Empty Item Category
-    empty_cat_mask = df['Item Category'].isna() | (df['Item Category'].astype(str).str.strip() == '') | (df['Item Category'].astype(str).str.strip().str.lower() == 'nan')
-    empty_cat_count = empty_cat_mask.sum()
-    if empty_cat_count > 0:
-        has_issues = True
-        sample_pos = df.loc[empty_cat_mask, 'PO Number'].dropna().unique()[:5]
-        sample_str = ", ".join(map(str, sample_pos))
-        print(f"⚠️  Missing Item Category: Found {empty_cat_count} rows.")
-        if sample_str:
-            print(f"   (Sample POs: {sample_str})")
-            
-        for _, row in df.loc[empty_cat_mask].iterrows():
-            anomalies.append({
-                'PO Number': row.get('PO Number', ''),
-                'Item ID': row.get('Item ID', ''),
-                'Item Name': row.get('Item Name', ''),
-                'Issue Type': 'Missing Item Category',
-                'Details': 'Empty/NaN Item Category'
-            })
-            
-    # 2. Unknown/Incomplete LOC
-    invalid_loc_mask = df['LOC'].isna() | df['LOC'].astype(str).str.strip().isin(['Unknown', 'LC'])
-    unknown_loc_count = invalid_loc_mask.sum()
-    if unknown_loc_count > 0:
-        has_issues = True
-        sample_pos = df.loc[invalid_loc_mask, 'PO Number'].dropna().unique()[:5]
-        sample_str = ", ".join(map(str, sample_pos))
-        print(f"⚠️  Unknown/Incomplete LOC: Found {unknown_loc_count} rows.")
-        if sample_str:
-            print(f"   (Sample POs: {sample_str})")
-            
-        for _, row in df.loc[invalid_loc_mask].iterrows():
-            anomalies.append({
-                'PO Number': row.get('PO Number', ''),
-                'Item ID': row.get('Item ID', ''),
-                'Item Name': row.get('Item Name', ''),
-                'Issue Type': 'Unknown/Incomplete LOC',
-                'Details': f"LOC is {row.get('LOC', '')}"
-            })
-            
-    # 3. Unresolved Logistic Freight
-    jasa_logistik_mask = df['Item Category'] == 'Jasa Logistik'
-    unresolved_freight_mask = jasa_logistik_mask & (
-        df['LOGISTIC_FREIGHT'].isna() | 
-        (df['LOGISTIC_FREIGHT'].astype(str).str.strip() == '') | 
-        df['LOGISTIC_FREIGHT'].astype(str).str.lower().str.contains('unknown')
-    )
-    unresolved_freight_count = unresolved_freight_mask.sum()
-    if unresolved_freight_count > 0:
-        has_issues = True
-        freight_vals = df.loc[unresolved_freight_mask, 'LOGISTIC_FREIGHT'].astype(str)
-        
-        rara_count = freight_vals.str.contains('RARA', case=False, na=False).sum()
-        ryi_count = (freight_vals.str.contains('RYI', case=False, na=False) | freight_vals.str.contains('FYI', case=False, na=False)).sum()
-        way_count = freight_vals.str.contains('WAY', case=False, na=False).sum()
-        sln_count = freight_vals.str.contains('SLN', case=False, na=False).sum()
-        other_count = unresolved_freight_count - (rara_count + ryi_count + way_count + sln_count)
-        
-        detail_parts = []
-        if rara_count > 0: detail_parts.append(f"RARA ({rara_count})")
-        if ryi_count > 0: detail_parts.append(f"RYI ({ryi_count})")
-        if way_count > 0: detail_parts.append(f"WAY ({way_count})")
-        if sln_count > 0: detail_parts.append(f"SLN ({sln_count})")
-        if other_count > 0: detail_parts.append(f"Other ({other_count})")
-        
-        detail_str = ", ".join(detail_parts)
-        print(f"⚠️  Unresolved Logistic Freight: Found {unresolved_freight_count} rows of 'Jasa Logistik'.")
-        if detail_str:
-            print(f"   (Unresolved details: {detail_str})")
-        sample_pos = df.loc[unresolved_freight_mask, 'PO Number'].dropna().unique()[:5]
-        sample_str = ", ".join(map(str, sample_pos))
-        if sample_str:
-            print(f"   (Sample POs: {sample_str})")
-            
-        for _, row in df.loc[unresolved_freight_mask].iterrows():
-            anomalies.append({
-                'PO Number': row.get('PO Number', ''),
-                'Item ID': row.get('Item ID', ''),
-                'Item Name': row.get('Item Name', ''),
-                'Issue Type': 'Unresolved Logistic Freight',
-                'Details': f"LOGISTIC_FREIGHT is {row.get('LOGISTIC_FREIGHT', '')}"
-            })
-            
-    # 4. Outlier Lead Times
-    pr_po_col = 'PR - PO'
-    if pr_po_col in df.columns:
-        pr_po_outlier_mask = df[pr_po_col].notna() & ((df[pr_po_col] < 0) | (df[pr_po_col] > 180))
-        pr_po_outlier_count = pr_po_outlier_mask.sum()
-        if pr_po_outlier_count > 0:
-            has_issues = True
-            sample_data = df.loc[pr_po_outlier_mask, ['PO Number', pr_po_col]].drop_duplicates(subset=['PO Number'])[:5]
-            sample_str = ", ".join([f"{row['PO Number']} ({int(row[pr_po_col])} days)" for _, row in sample_data.iterrows()])
-            print(f"⚠️  Lead Time Outliers (PR - PO): Found {pr_po_outlier_count} rows (< 0 or > 180 days).")
-            if sample_str:
-                print(f"   (Sample POs: {sample_str})")
-                
-            for _, row in df.loc[pr_po_outlier_mask].iterrows():
-                anomalies.append({
-                    'PO Number': row.get('PO Number', ''),
-                    'Item ID': row.get('Item ID', ''),
-                    'Item Name': row.get('Item Name', ''),
-                    'Issue Type': 'Lead Time Outlier (PR - PO)',
-                    'Details': f"PR - PO is {int(row[pr_po_col])} days"
-                })
-                
-    po_rpo_col = 'PO - R PO'
-    if po_rpo_col in df.columns:
-        po_rpo_outlier_mask = df[po_rpo_col].notna() & ((df[po_rpo_col] < 0) | (df[po_rpo_col] > 180))
-        po_rpo_outlier_count = po_rpo_outlier_mask.sum()
-        if po_rpo_outlier_count > 0:
-            has_issues = True
-            sample_data = df.loc[po_rpo_outlier_mask, ['PO Number', po_rpo_col]].drop_duplicates(subset=['PO Number'])[:5]
-            sample_str = ", ".join([f"{row['PO Number']} ({int(row[po_rpo_col])} days)" for _, row in sample_data.iterrows()])
-            print(f"⚠️  Lead Time Outliers (PO - R PO): Found {po_rpo_outlier_count} rows (< 0 or > 180 days).")
-            if sample_str:
-                print(f"   (Sample POs: {sample_str})")
-                
-            for _, row in df.loc[po_rpo_outlier_mask].iterrows():
-                anomalies.append({
-                    'PO Number': row.get('PO Number', ''),
-                    'Item ID': row.get('Item ID', ''),
-                    'Item Name': row.get('Item Name', ''),
-                    'Issue Type': 'Lead Time Outlier (PO - R PO)',
-                    'Details': f"PO - R PO is {int(row[po_rpo_col])} days"
-                })
-
-    # 5. Future Dates
-    future_limit = pd.Timestamp.now() + pd.Timedelta(days=1)
-    date_cols_to_check = ['PO Approval Date', 'Receive PO Date', 'Requisition Date', 'Received TL Date', 'Shipped Date']
-    future_date_issues = []
-    
-    for col in date_cols_to_check:
-        if col in df.columns:
-            dt_series = pd.to_datetime(df[col], errors='coerce')
-            future_mask = dt_series.notna() & (dt_series > future_limit)
-            future_count = future_mask.sum()
-            if future_count > 0:
-                future_date_issues.append((col, future_count, future_mask))
-                
-    if future_date_issues:
-        has_issues = True
-        total_future_rows = sum([count for _, count, _ in future_date_issues])
-        print(f"⚠️  Future Dates: Found {total_future_rows} occurrences across date columns.")
-        for col, count, mask in future_date_issues:
-            sample_pos = df.loc[mask, 'PO Number'].dropna().unique()[:3]
-            sample_str = ", ".join(map(str, sample_pos))
-            sample_val = df.loc[mask, col].dropna().iloc[0]
-            if isinstance(sample_val, pd.Timestamp):
-                sample_val_str = sample_val.strftime('%Y-%m-%d')
-            else:
-                sample_val_str = str(sample_val)
-            print(f"   - '{col}': {count} rows. (Sample POs: {sample_str} [e.g. {sample_val_str}])")
-            
-            for _, row in df.loc[mask].iterrows():
-                anomalies.append({
-                    'PO Number': row.get('PO Number', ''),
-                    'Item ID': row.get('Item ID', ''),
-                    'Item Name': row.get('Item Name', ''),
-                    'Issue Type': 'Future Date',
-                    'Details': f"{col} is {row.get(col, '')}"
-                })
-            
-    # 6. Over-Received Quantities
-    if 'Qty Received' in df.columns and 'Qty Order' in df.columns:
-        over_rec_mask = (df['Qty Received'].notna()) & (df['Qty Order'].notna()) & (df['Qty Received'] > df['Qty Order'])
-        over_rec_count = over_rec_mask.sum()
-        if over_rec_count > 0:
-            has_issues = True
-            sample_data = df.loc[over_rec_mask, ['PO Number', 'Qty Order', 'Qty Received']].drop_duplicates(subset=['PO Number'])[:5]
-            sample_str = ", ".join([f"{row['PO Number']} (Ordered: {row['Qty Order']}, Received: {row['Qty Received']})" for _, row in sample_data.iterrows()])
-            print(f"⚠️  Over-Received Quantities: Found {over_rec_count} rows.")
-            if sample_str:
-                print(f"   (Sample POs: {sample_str})")
-                
-            for _, row in df.loc[over_rec_mask].iterrows():
-                anomalies.append({
-                    'PO Number': row.get('PO Number', ''),
-                    'Item ID': row.get('Item ID', ''),
-                    'Item Name': row.get('Item Name', ''),
-                    'Issue Type': 'Over-Received Quantity',
-                    'Details': f"Ordered: {row.get('Qty Order', '')}, Received: {row.get('Qty Received', '')}"
-                })
-
-    if not has_issues:
-        print("✅ All check items passed! No data quality issues found.")
-    else:
-        # Export anomalies to CSV
-        try:
-            import os
-            import datetime
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(os.path.dirname(current_dir))
-            export_dir = os.path.join(project_root, 'export')
-            os.makedirs(export_dir, exist_ok=True)
-            
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            anomalies_filename = f"validation_anomalies_{timestamp}.csv"
-            anomalies_filepath = os.path.join(export_dir, anomalies_filename)
-            
-            anomalies_df = pd.DataFrame(anomalies)
-            anomalies_df.to_csv(anomalies_filepath, index=False)
-            print(f"ℹ️  Full anomalies report saved to: {os.path.abspath(anomalies_filepath)}")
-        except Exception as e:
-            print(f"❌ Failed to export validation anomalies to CSV: {e}")
-        
-    print("="*50)
-    print("Reminder: Don't forget to pull the Approved PO from 01/01/2025 onwards, not the whole data.")
-    print("="*50 + "\n")
-
 if __name__ == '__main__':
     print("processing_steps.py is the core logic module. Run from the notebook.")
\ No newline at end of file
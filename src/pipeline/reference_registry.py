@@ -0,0 +1,198 @@
+import pandas as pd
+import os
+import hashlib
+
+from data_helper import (
+    build_key_index, key_index_codes, first_match_positions, take_matched, unique_text_view, TEXT_VARIANTS
+)
+
+project_root = '../../'
+registry_dir = os.path.join(project_root, 'data', 'reference', 'registry')
+
+#bump when a lookup definition or a key rule changes, every persisted registry is rebuilt
+REGISTRY_VERSION = 1
+
+#source files of the lookup definitions and key rules
+REGISTRY_SOURCES = ['reference_registry.py', 'data_helper.py']
+
+#every mapping done against a reference table:
+#  table   - reference table name (processing_steps.REFERENCE_TABLES)
+#  keys    - key columns, matched against main-frame columns in the same order
+#  rule    - data_helper.TEXT_VARIANTS cleanup applied to both sides before matching
+#  missing - 'part' or 'key', see data_helper.build_key_index
+#  values  - columns gathered for matched rows (absent optional columns are skipped)
+#  keep    - 'first' / 'last' row per key, or 'all' for joins that fan out duplicate keys
+REFERENCE_LOOKUPS = {
+    'rfm_normalized': {
+        'table': 'rfm_normalized_df', 'keys': ['Requisition Number'], 'rule': 'raw', 'missing': 'key', 'keep': 'first',
+        'values': ['Updated Requisition Approved Date', 'Updated Requisition Required Date', 'Background Update'],
+    },
+    'solar_normalized': {
+        'table': 'normalisasi_rfm_solar_df', 'keys': ['Requisition Number', 'PO Number'], 'rule': 'raw', 'missing': 'part', 'keep': 'first',
+        'values': ['Updated Requisition Approved Date', 'Updated Requisition Required Date', 'Background Update'],
+    },
+    'pulau': {
+        'table': 'pulau_df', 'keys': ['Wilayah'], 'rule': 'strip_lower', 'missing': 'key', 'keep': 'first', 'values': ['Pulau'],
+    },
+    'wilayah': {
+        'table': 'wilayah_df', 'keys': ['Supplier Location'], 'rule': 'strip_lower', 'missing': 'key', 'keep': 'first', 'values': ['To'],
+    },
+    'timedate': {
+        'table': 'timedate_normalized_df', 'keys': ['PO Number'], 'rule': 'raw', 'missing': 'key', 'keep': 'first', 'values': ['timedate'],
+    },
+    # dict(zip(Supplier, Freight Type)) let the last row win
+    'freight': {
+        'table': 'freight_df', 'keys': ['Supplier'], 'rule': 'raw', 'missing': 'key', 'keep': 'last', 'values': ['Freight Type'],
+    },
+    'rara': {'table': 'rara_df', 'keys': ['PO Number'], 'rule': 'raw', 'missing': 'key', 'keep': 'first', 'values': ['Freight Type']},
+    'ryi': {'table': 'ryi_df', 'keys': ['PO Number'], 'rule': 'raw', 'missing': 'key', 'keep': 'first', 'values': ['Freight Type']},
+    'way': {'table': 'way_df', 'keys': ['PO Number'], 'rule': 'raw', 'missing': 'key', 'keep': 'first', 'values': ['Freight Type']},
+    'sln': {'table': 'sln_df', 'keys': ['PO Number'], 'rule': 'raw', 'missing': 'key', 'keep': 'first', 'values': ['Freight Type']},
+    'jasa_service': {
+        'table': 'jasa_service_df', 'keys': ['Item ID', 'PO Number'], 'rule': 'id_text', 'missing': 'key', 'keep': 'all', 'values': ['JS_SERVICE'],
+    },
+    'cost_saving': {
+        'table': 'cost_saving_df', 'keys': ['Item Name', 'PO Number'], 'rule': 'str', 'missing': 'key', 'keep': 'first', 'values': ['Cost Saving'],
+    },
+    'ontime_normalized': {'table': 'ontime_normalized_df', 'keys': ['PO Number'], 'rule': 'str_strip', 'missing': 'key', 'keep': 'first', 'values': []},
+    'notcounted': {'table': 'notcounted_df', 'keys': ['PO Number'], 'rule': 'str_strip', 'missing': 'key', 'keep': 'first', 'values': []},
+    'logistic_normalized': {'table': 'logistic_normalized_df', 'keys': ['PO Number'], 'rule': 'str_strip', 'missing': 'key', 'keep': 'first', 'values': []},
+}
+
+def _build_lookup(name, table):
+    spec = REFERENCE_LOOKUPS[name]
+    rule = TEXT_VARIANTS[spec['rule']]
+    values = [col for col in spec['values'] if col in table.columns]
+
+    # Normalized key columns are stored under their own names, the index is then built without a rule
+    normalized = pd.DataFrame({col: pd.Series(rule(table[col].to_numpy()), dtype=object) for col in spec['keys']})
+    for col in values:
+        normalized[col] = table[col].reset_index(drop=True)
+
+    if spec['keep'] != 'all':
+        keys = build_key_index([normalized[col] for col in spec['keys']], missing=spec['missing'])['keys']
+        normalized = normalized[~pd.Index(keys).duplicated(keep=spec['keep'])].reset_index(drop=True)
+    return normalized
+
+def _index_lookup(name, normalized):
+    # Hash index over the stored normalized keys; main-frame keys get the spec's rule at lookup time
+    spec = REFERENCE_LOOKUPS[name]
+    key_index = build_key_index([normalized[col] for col in spec['keys']], missing=spec['missing'])
+    key_index['clean'] = TEXT_VARIANTS[spec['rule']]
+    return {'name': name, 'table': normalized, 'index': key_index}
+
+def _derive_lookups(registry):
+    # WILAYAH / PULAU: the Supplier Location -> To -> Pulau chain is resolved once per wilayah row.
+    # To is lower-cased (not stripped) and matched exactly against the normalized pulau keys.
+    if 'wilayah' in registry and 'pulau' in registry:
+        wilayah = registry['wilayah']['table']
+        wilayah['WILAYAH'] = wilayah['To'].str.lower()
+        wilayah['PULAU'] = lookup_values(registry['pulau'], [wilayah['WILAYAH']], 'Pulau', normalized=True).to_numpy()
+
+def build_reference_registry(refs):
+    """
+    Builds every lookup of REFERENCE_LOOKUPS whose reference table is present in refs.
+
+    :param refs: Dict of reference DataFrames keyed by processing_steps.REFERENCE_TABLES names.
+    :return: dict {lookup name: {'name', 'table' (normalized keys + values), 'index' (data_helper.build_key_index)}}.
+    """
+    registry = {}
+    for name, spec in REFERENCE_LOOKUPS.items():
+        table = refs.get(spec['table'])
+        if table is not None:
+            registry[name] = _index_lookup(name, _build_lookup(name, table))
+    _derive_lookups(registry)
+    return registry
+
+def frame_keys(lookup, df, text_views):
+    """
+    Key columns of the lookup taken from df under the same names, as cached
+    (codes, values) views with the lookup's key rule applied; pass them with normalized=True.
+    """
+    spec = REFERENCE_LOOKUPS[lookup['name']]
+    return [unique_text_view(text_views, df, col, spec['rule']) for col in spec['keys']]
+
+def lookup_keys(lookup, columns, normalized=False):
+    """Packed int64 codes of main-frame key columns against the lookup (see data_helper.key_index_codes)."""
+    return key_index_codes(lookup['index'], columns, clean=not normalized)
+
+def lookup_positions(lookup, columns, normalized=False):
+    """Row of the lookup table matching each main-frame row, -1 when none."""
+    return first_match_positions(lookup_keys(lookup, columns, normalized), lookup['index']['keys'])
+
+def lookup_values(lookup, columns, value_col, index=None, normalized=False):
+    """Gathers value_col of the matching lookup row for every main-frame row, NaN when none."""
+    return take_matched(lookup['table'][value_col], lookup_positions(lookup, columns, normalized), index=index)
+
+def lookup_contains(lookup, columns, normalized=False):
+    """Boolean array: does the main-frame key appear in the lookup."""
+    return lookup_positions(lookup, columns, normalized) >= 0
+
+def lookup_series(lookup, value_col):
+    """
+    value_col of a single-key lookup as a Series indexed by the normalized key, for
+    mapping distinct values with Series.map. Built once per lookup and reused.
+    """
+    cache = lookup.setdefault('series', {})
+    if value_col not in cache:
+        table = lookup['table']
+        key_col = REFERENCE_LOOKUPS[lookup['name']]['keys'][0]
+        cache[value_col] = pd.Series(table[value_col].to_numpy(), index=pd.Index(table[key_col], dtype=object))
+    return cache[value_col]
+
+def registry_fingerprint(refs):
+    """Hex digest of REGISTRY_VERSION, the registry source files and every reference table a lookup reads."""
+    digest = hashlib.sha256(str(REGISTRY_VERSION).encode())
+    pipeline_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in REGISTRY_SOURCES:
+        with open(os.path.join(pipeline_dir, name), 'rb') as f:
+            digest.update(f.read())
+    for table_name in sorted({spec['table'] for spec in REFERENCE_LOOKUPS.values()}):
+        table = refs.get(table_name)
+        digest.update(table_name.encode())
+        if table is None:
+            continue
+        digest.update(repr([(col, str(dtype)) for col, dtype in table.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def save_reference_registry(registry, fingerprint, path=None):
+    """Persists the normalized lookup tables and the fingerprint they were built from."""
+    path = path or registry_dir
+    if not os.path.exists(path):
+        os.makedirs(path)
+    try:
+        for name, lookup in registry.items():
+            lookup['table'].to_parquet(os.path.join(path, f"{name}.parquet"), index=False, engine='pyarrow')
+        pd.DataFrame({'LOOKUP': list(registry), 'FINGERPRINT': fingerprint}).to_parquet(
+            os.path.join(path, 'manifest.parquet'), index=False, engine='pyarrow')
+        print(f"Saved reference registry ({len(registry)} lookups) to {os.path.abspath(path)}")
+    except Exception as e:
+        print(f"Warning: Failed to save reference registry: {e}")
+
+def load_reference_registry(refs, path=None):
+    """
+    Returns the reference registry for refs: read from path when it was built from the
+    same reference tables and lookup definitions, otherwise built and persisted there.
+    """
+    path = path or registry_dir
+    fingerprint = registry_fingerprint(refs)
+    manifest_path = os.path.join(path, 'manifest.parquet')
+
+    if os.path.exists(manifest_path):
+        try:
+            manifest = pd.read_parquet(manifest_path, engine='pyarrow')
+            if len(manifest) and (manifest['FINGERPRINT'] == fingerprint).all():
+                registry = {
+                    name: _index_lookup(name, pd.read_parquet(os.path.join(path, f"{name}.parquet"), engine='pyarrow'))
+                    for name in manifest['LOOKUP']
+                }
+                print(f"Loaded reference registry ({len(registry)} lookups) from {os.path.abspath(path)}")
+                return registry
+        except Exception as e:
+            print(f"Warning: Failed to read reference registry, rebuilding it: {e}")
+
+    print("Building reference registry...")
+    registry = build_reference_registry(refs)
+    save_reference_registry(registry, fingerprint, path)
+    return registry
@@ -0,0 +1,194 @@
+import pandas as pd
+import numpy as np
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import processing_steps
+from validation_rules import validate_processed_data, validation_columns
+from reference_registry import build_reference_registry
+from incremental_processing import po_keys, concat_processed, mismatched_columns
+
+#rows pulled from the parquet file per read, independent of the processing batch size
+READ_BATCH_ROWS = 65536
+
+def po_group_boundaries(po_series, batch_rows):
+    """
+    Splits row positions into contiguous [start, end) ranges of about batch_rows rows
+    that never cut through a PO group. A range may only end after row i when no group
+    seen so far has a row past i, so scattered PO groups widen their range instead
+    of being split.
+
+    :param po_series: 'PO Number' column of the whole PO Entry List.
+    :param batch_rows: Target rows per batch.
+    :return: List of (start, end) tuples covering every row in order.
+    """
+    n_rows = len(po_series)
+    if n_rows == 0:
+        return []
+
+    codes, uniques = pd.factorize(po_keys(po_series).to_numpy(), use_na_sentinel=False)
+    last_position = np.zeros(len(uniques), dtype=np.int64)
+    last_position[codes] = np.arange(n_rows)
+    reach = np.maximum.accumulate(last_position[codes])
+    cut_points = np.flatnonzero(reach == np.arange(n_rows)) + 1
+
+    boundaries = []
+    start = 0
+    while start < n_rows:
+        # Largest cut within the budget, or the first cut past it when one group is bigger
+        idx = np.searchsorted(cut_points, start + batch_rows, side='right') - 1
+        if idx < 0 or cut_points[idx] <= start:
+            idx = np.searchsorted(cut_points, start, side='right')
+        end = int(cut_points[idx])
+        boundaries.append((start, end))
+        start = end
+    return boundaries
+
+def iter_po_batches(parquet_path, batch_rows):
+    """
+    Yields PO-group aligned DataFrames from the PO Entry List parquet file.
+    Only the 'PO Number' column is read up front; the rows are then streamed and
+    at most one batch (plus one read chunk) is held in memory.
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+    po_series = parquet_file.read(columns=['PO Number']).to_pandas()['PO Number']
+    boundaries = po_group_boundaries(po_series, batch_rows)
+    del po_series
+
+    largest = max((end - start for start, end in boundaries), default=0)
+    print(f"Streaming {parquet_file.metadata.num_rows} rows in {len(boundaries)} batches (largest {largest} rows)...")
+    if largest > 2 * batch_rows:
+        print("Warning: PO groups are scattered across the file, sort it by PO Number to keep batches near batch_rows.")
+
+    pending = []
+    pending_rows = 0
+    reader = parquet_file.iter_batches(batch_size=READ_BATCH_ROWS)
+    for start, end in boundaries:
+        size = end - start
+        while pending_rows < size:
+            record_batch = next(reader)
+            pending.append(record_batch)
+            pending_rows += record_batch.num_rows
+
+        table = pa.Table.from_batches(pending, schema=parquet_file.schema_arrow)
+        yield table.slice(0, size).to_pandas()
+
+        rest = table.slice(size)
+        pending = rest.to_batches()
+        pending_rows = rest.num_rows
+
+def part_schema(table):
+    """
+    Arrow schema every part is written with, taken from the first part: dictionary
+    (categorical) columns get int32 indices, so a later batch with more distinct values
+    than fit the first part's int8 / int16 codes still matches it.
+    """
+    fields = [
+        pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type, field.type.ordered), field.nullable)
+        if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ]
+    return pa.schema(fields, metadata=table.schema.metadata)
+
+def write_part(processed, part_path, schema=None):
+    """
+    Writes one processed batch cast to schema (part_schema of the first part when None).
+
+    :return: The schema used, to pass to the next part.
+    """
+    table = pa.Table.from_pandas(processed, preserve_index=False)
+    schema = schema if schema is not None else part_schema(table)
+    try:
+        table = table.cast(schema)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise ValueError(f"{os.path.basename(part_path)} does not fit the schema of the first part: {e}")
+    pq.write_table(table, part_path)
+    return schema
+
+def run_streaming_processing(parquet_path, refs, output_dir, batch_rows=50000, department_cache_path=None, registry=None, validate=True):
+    """
+    Runs run_all_processing batch by batch over the PO Entry List parquet file and
+    writes every processed batch as its own part file in output_dir. Batches contain
+    whole PO groups, so the group rules (VALUE, UNIQUE COUNT PO, PO_RECEIVE) see the
+    same rows as in a single-frame run, and the parts concatenated in name order
+    equal the single-frame output. Peak memory follows batch_rows, not the history length.
+
+    :param parquet_path: PO Entry List parquet file (see data_loader.ensure_po_entry_parquet).
+    :param refs: Dict of reference DataFrames keyed by processing_steps.REFERENCE_TABLES names (plus 'lebaran_dates_df').
+    :param output_dir: Directory receiving part-00000.parquet, part-00001.parquet, ...
+    :param batch_rows: Target rows per batch.
+    :param registry: Prebuilt reference registry, built once from refs when None and shared by every batch.
+    :param validate: Run validate_processed_data once over all parts (see validate_streamed_output).
+    :return: List of written part paths.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    if registry is None:
+        registry = build_reference_registry(refs)
+
+    parts = []
+    schema = None
+    for batch_no, batch in enumerate(iter_po_batches(parquet_path, batch_rows)):
+        print(f"processing batch {batch_no} ({len(batch)} rows)...")
+        processed = processing_steps.run_all_processing(
+            batch, *[refs[name] for name in processing_steps.REFERENCE_TABLES],
+            lebaran_dates_df=refs.get('lebaran_dates_df'), department_cache_path=department_cache_path,
+            validate=False, registry=registry
+        )
+        part_path = os.path.join(output_dir, f"part-{batch_no:05d}.parquet")
+        # one schema for every part, so the output directory reads as a single parquet dataset
+        schema = write_part(processed, part_path, schema)
+        parts.append(part_path)
+        del batch, processed
+
+    print(f"Wrote {len(parts)} processed parts to {os.path.abspath(output_dir)}")
+    if validate:
+        validate_streamed_output(output_dir)
+    return parts
+
+def read_streamed_output(output_dir):
+    """Reads the part files of run_streaming_processing as one parquet dataset, in part order."""
+    names = sorted(name for name in os.listdir(output_dir) if name.startswith('part-') and name.endswith('.parquet'))
+    table = pq.read_table([os.path.join(output_dir, name) for name in names])
+    # the location columns compared with each other get their shared categories back
+    return concat_processed([table.to_pandas()])
+
+def validate_streamed_output(output_dir):
+    """
+    Runs validate_processed_data once over every part of output_dir, reading only the
+    columns the validation rules use, so the report and the anomalies export cover the
+    whole run like a single-frame run does while memory stays at a few columns.
+    """
+    names = sorted(name for name in os.listdir(output_dir) if name.startswith('part-') and name.endswith('.parquet'))
+    if not names:
+        return
+    available = set(pq.read_schema(os.path.join(output_dir, names[0])).names)
+    columns = [col for col in validation_columns() if col in available]
+    frames = [pd.read_parquet(os.path.join(output_dir, name), columns=columns, engine='pyarrow') for name in names]
+    validate_processed_data(concat_processed(frames))
+
+def verify_streaming_processing(parquet_path, refs, output_dir, batch_rows=1000):
+    """
+    Compares the streamed output against a single-frame run_all_processing on the
+    same parquet file. Prints the mismatching columns and returns True when every value matches.
+    """
+    copy_refs = lambda: {name: (table.copy() if table is not None else None) for name, table in refs.items()}
+
+    run_streaming_processing(parquet_path, copy_refs(), output_dir, batch_rows, validate=False)
+    streamed = read_streamed_output(output_dir)
+
+    tables = copy_refs()
+    full = processing_steps.run_all_processing(
+        pd.read_parquet(parquet_path, engine='pyarrow'), *[tables[name] for name in processing_steps.REFERENCE_TABLES],
+        lebaran_dates_df=tables.get('lebaran_dates_df'), validate=False
+    )
+
+    if streamed.shape != full.shape:
+        print(f"shape mismatch: streamed {streamed.shape} vs full {full.shape}")
+        return False
+
+    mismatched = mismatched_columns(streamed, full)
+    if mismatched:
+        print(f"streamed output differs in: {mismatched}")
+    return not mismatched
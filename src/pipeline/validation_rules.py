@@ -0,0 +1,314 @@
+import pandas as pd
+import numpy as np
+import os
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from data_helper import apply_on_unique, text_view
+
+# ---------------------------------------------------------
+# Validation rule registry
+# ---------------------------------------------------------
+#Each rule declares the columns it needs (the rule is skipped when one is absent) and the
+#column views it reads as (column, variant) pairs: a data_helper.TEXT_VARIANTS name or 'date'.
+#validate_processed_data prepares every declared view once, then evaluates the rules
+#concurrently; a rule returns (report lines, anomaly frames) and must not modify df.
+VALIDATION_RULES = []
+
+#threads evaluating the rules; the rules only read the prepared views
+VALIDATION_WORKERS = 4
+
+#columns identifying the flagged rows in the anomalies report
+ANOMALY_COLUMNS = ['PO Number', 'Item ID', 'Item Name']
+
+#date columns checked for values in the future
+FUTURE_DATE_COLUMNS = ['PO Approval Date', 'Receive PO Date', 'Requisition Date', 'Received TL Date', 'Shipped Date']
+
+#where the anomalies report is written; orchestrator.py patches it like data_export.export_dir
+export_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'export')
+
+def validation_rule(name, columns=(), views=()):
+    """Registers a function(df, views) -> (lines, anomalies) as a validation rule."""
+    def register(func):
+        VALIDATION_RULES.append({
+            'name': name,
+            'func': func,
+            'columns': list(columns),
+            'views': list(views),
+        })
+        return func
+    return register
+
+def prepare_column_views(df, rules):
+    """
+    Builds every (column, variant) view declared by rules once.
+    Text variants are computed per distinct value (data_helper.text_view), 'date' parses the column.
+
+    :return: dict {(column, variant): Series aligned with df}.
+    """
+    text_views = {}
+    prepared = {}
+    for rule in rules:
+        for column, variant in rule['views']:
+            if (column, variant) in prepared or column not in df.columns:
+                continue
+            if variant == 'date':
+                prepared[(column, variant)] = pd.to_datetime(df[column], errors='coerce')
+            else:
+                prepared[(column, variant)] = text_view(text_views, df, column, variant)
+    return prepared
+
+def _value_text(series):
+    """str() of every value, computed once per distinct value (missing values read 'nan')."""
+    return apply_on_unique(series.astype(object), str)
+
+def _anomaly_frame(df, mask, issue_type, details):
+    """
+    Anomalies report rows for the flagged rows of one check, sliced from df as whole columns.
+
+    :param details: Scalar text, or a Series of texts aligned with the flagged rows.
+    """
+    anomaly_df = pd.DataFrame({col: (df.loc[mask, col] if col in df.columns else '') for col in ANOMALY_COLUMNS})
+    anomaly_df['Issue Type'] = issue_type
+    anomaly_df['Details'] = details
+    return anomaly_df
+
+def _sample_pos(df, mask, n=5):
+    return ", ".join(map(str, df.loc[mask, 'PO Number'].dropna().unique()[:n]))
+
+# 1. Empty Item Category
+@validation_rule('missing_item_category', columns=['Item Category'], views=[('Item Category', 'str_strip'), ('Item Category', 'strip_lower')])
+def _missing_item_category(df, views):
+    empty_cat_mask = df['Item Category'].isna() | (views[('Item Category', 'str_strip')] == '') | (views[('Item Category', 'strip_lower')] == 'nan')
+    empty_cat_count = empty_cat_mask.sum()
+    if empty_cat_count == 0:
+        return [], []
+
+    lines = [f"⚠️  Missing Item Category: Found {empty_cat_count} rows."]
+    sample_str = _sample_pos(df, empty_cat_mask)
+    if sample_str:
+        lines.append(f"   (Sample POs: {sample_str})")
+    return lines, [_anomaly_frame(df, empty_cat_mask, 'Missing Item Category', 'Empty/NaN Item Category')]
+
+# 2. Unknown/Incomplete LOC
+@validation_rule('unknown_loc', columns=['LOC'], views=[('LOC', 'str_strip')])
+def _unknown_loc(df, views):
+    invalid_loc_mask = df['LOC'].isna() | views[('LOC', 'str_strip')].isin(['Unknown', 'LC'])
+    unknown_loc_count = invalid_loc_mask.sum()
+    if unknown_loc_count == 0:
+        return [], []
+
+    lines = [f"⚠️  Unknown/Incomplete LOC: Found {unknown_loc_count} rows."]
+    sample_str = _sample_pos(df, invalid_loc_mask)
+    if sample_str:
+        lines.append(f"   (Sample POs: {sample_str})")
+    anomalies = _anomaly_frame(df, invalid_loc_mask, 'Unknown/Incomplete LOC', 'LOC is ' + _value_text(df.loc[invalid_loc_mask, 'LOC']))
+    return lines, [anomalies]
+
+# 3. Unresolved Logistic Freight
+@validation_rule(
+    'unresolved_logistic_freight',
+    columns=['Item Category', 'LOGISTIC_FREIGHT'],
+    views=[('LOGISTIC_FREIGHT', 'str_strip'), ('LOGISTIC_FREIGHT', 'lower')]
+)
+def _unresolved_logistic_freight(df, views):
+    jasa_logistik_mask = df['Item Category'] == 'Jasa Logistik'
+    # per distinct value instead of .str: an empty or all-missing view is float64, not text
+    is_unknown = apply_on_unique(views[('LOGISTIC_FREIGHT', 'lower')], lambda v: isinstance(v, str) and 'unknown' in v).astype(bool)
+    unresolved_freight_mask = jasa_logistik_mask & (
+        df['LOGISTIC_FREIGHT'].isna() |
+        (views[('LOGISTIC_FREIGHT', 'str_strip')] == '') |
+        is_unknown
+    )
+    unresolved_freight_count = unresolved_freight_mask.sum()
+    if unresolved_freight_count == 0:
+        return [], []
+
+    freight_vals = df.loc[unresolved_freight_mask, 'LOGISTIC_FREIGHT'].astype(str)
+    rara_count = freight_vals.str.contains('RARA', case=False, na=False).sum()
+    ryi_count = (freight_vals.str.contains('RYI', case=False, na=False) | freight_vals.str.contains('FYI', case=False, na=False)).sum()
+    way_count = freight_vals.str.contains('WAY', case=False, na=False).sum()
+    sln_count = freight_vals.str.contains('SLN', case=False, na=False).sum()
+    other_count = unresolved_freight_count - (rara_count + ryi_count + way_count + sln_count)
+
+    detail_parts = []
+    if rara_count > 0: detail_parts.append(f"RARA ({rara_count})")
+    if ryi_count > 0: detail_parts.append(f"RYI ({ryi_count})")
+    if way_count > 0: detail_parts.append(f"WAY ({way_count})")
+    if sln_count > 0: detail_parts.append(f"SLN ({sln_count})")
+    if other_count > 0: detail_parts.append(f"Other ({other_count})")
+
+    lines = [f"⚠️  Unresolved Logistic Freight: Found {unresolved_freight_count} rows of 'Jasa Logistik'."]
+    detail_str = ", ".join(detail_parts)
+    if detail_str:
+        lines.append(f"   (Unresolved details: {detail_str})")
+    sample_str = _sample_pos(df, unresolved_freight_mask)
+    if sample_str:
+        lines.append(f"   (Sample POs: {sample_str})")
+    anomalies = _anomaly_frame(
+        df, unresolved_freight_mask, 'Unresolved Logistic Freight',
+        'LOGISTIC_FREIGHT is ' + _value_text(df.loc[unresolved_freight_mask, 'LOGISTIC_FREIGHT'])
+    )
+    return lines, [anomalies]
+
+# 4. Outlier Lead Times
+def _lead_time_outlier_rule(duration_col):
+    @validation_rule(f"lead_time_outlier ({duration_col})", columns=[duration_col])
+    def _lead_time_outlier(df, views):
+        outlier_mask = df[duration_col].notna() & ((df[duration_col] < 0) | (df[duration_col] > 180))
+        outlier_count = outlier_mask.sum()
+        if outlier_count == 0:
+            return [], []
+
+        sample_data = df.loc[outlier_mask, ['PO Number', duration_col]].drop_duplicates(subset=['PO Number'])[:5]
+        sample_str = ", ".join([f"{row['PO Number']} ({int(row[duration_col])} days)" for _, row in sample_data.iterrows()])
+        lines = [f"⚠️  Lead Time Outliers ({duration_col}): Found {outlier_count} rows (< 0 or > 180 days)."]
+        if sample_str:
+            lines.append(f"   (Sample POs: {sample_str})")
+        anomalies = _anomaly_frame(
+            df, outlier_mask, f"Lead Time Outlier ({duration_col})",
+            f"{duration_col} is " + _value_text(df.loc[outlier_mask, duration_col].astype(np.int64)) + ' days'
+        )
+        return lines, [anomalies]
+    return _lead_time_outlier
+
+_lead_time_outlier_rule('PR - PO')
+_lead_time_outlier_rule('PO - R PO')
+
+# 5. Future Dates
+@validation_rule('future_dates', views=[(col, 'date') for col in FUTURE_DATE_COLUMNS])
+def _future_dates(df, views):
+    future_limit = pd.Timestamp.now() + pd.Timedelta(days=1)
+    future_date_issues = []
+    for col in FUTURE_DATE_COLUMNS:
+        if col in df.columns:
+            dt_series = views[(col, 'date')]
+            future_mask = dt_series.notna() & (dt_series > future_limit)
+            future_count = future_mask.sum()
+            if future_count > 0:
+                future_date_issues.append((col, future_count, future_mask))
+    if not future_date_issues:
+        return [], []
+
+    total_future_rows = sum([count for _, count, _ in future_date_issues])
+    lines = [f"⚠️  Future Dates: Found {total_future_rows} occurrences across date columns."]
+    anomalies = []
+    for col, count, mask in future_date_issues:
+        sample_str = _sample_pos(df, mask, n=3)
+        sample_val = df.loc[mask, col].dropna().iloc[0]
+        if isinstance(sample_val, pd.Timestamp):
+            sample_val_str = sample_val.strftime('%Y-%m-%d')
+        else:
+            sample_val_str = str(sample_val)
+        lines.append(f"   - '{col}': {count} rows. (Sample POs: {sample_str} [e.g. {sample_val_str}])")
+        anomalies.append(_anomaly_frame(df, mask, 'Future Date', f"{col} is " + _value_text(df.loc[mask, col])))
+    return lines, anomalies
+
+# 6. Over-Received Quantities
+@validation_rule('over_received_quantity', columns=['Qty Received', 'Qty Order'])
+def _over_received_quantity(df, views):
+    over_rec_mask = (df['Qty Received'].notna()) & (df['Qty Order'].notna()) & (df['Qty Received'] > df['Qty Order'])
+    over_rec_count = over_rec_mask.sum()
+    if over_rec_count == 0:
+        return [], []
+
+    sample_data = df.loc[over_rec_mask, ['PO Number', 'Qty Order', 'Qty Received']].drop_duplicates(subset=['PO Number'])[:5]
+    sample_str = ", ".join([f"{row['PO Number']} (Ordered: {row['Qty Order']}, Received: {row['Qty Received']})" for _, row in sample_data.iterrows()])
+    lines = [f"⚠️  Over-Received Quantities: Found {over_rec_count} rows."]
+    if sample_str:
+        lines.append(f"   (Sample POs: {sample_str})")
+    anomalies = _anomaly_frame(
+        df, over_rec_mask, 'Over-Received Quantity',
+        'Ordered: ' + _value_text(df.loc[over_rec_mask, 'Qty Order']) + ', Received: ' + _value_text(df.loc[over_rec_mask, 'Qty Received'])
+    )
+    return lines, [anomalies]
+
+def _timed_rule(rule, df, views):
+    started = time.perf_counter()
+    lines, anomalies = rule['func'](df, views)
+    return lines, anomalies, time.perf_counter() - started
+
+def validation_columns(rules=None):
+    """Columns the rules read (declared columns, view columns and the anomaly report columns), in a stable order."""
+    rules = VALIDATION_RULES if rules is None else rules
+    columns = list(ANOMALY_COLUMNS)
+    for rule in rules:
+        columns.extend(rule['columns'])
+        columns.extend(column for column, _ in rule['views'])
+    return list(dict.fromkeys(columns))
+
+def run_validation_rules(df, rules=None, workers=VALIDATION_WORKERS):
+    """
+    Prepares the column views of the rules once and evaluates the rules concurrently.
+
+    :param rules: Rules to run, defaults to every registered rule.
+    :return: (list of (rule, lines, anomaly frames, seconds) in registration order for the applicable rules,
+              seconds spent preparing the views).
+    """
+    rules = [rule for rule in (VALIDATION_RULES if rules is None else rules) if all(col in df.columns for col in rule['columns'])]
+
+    started = time.perf_counter()
+    views = prepare_column_views(df, rules)
+    view_seconds = time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        futures = [pool.submit(_timed_rule, rule, df, views) for rule in rules]
+        outcomes = [(rule, *future.result()) for rule, future in zip(rules, futures)]
+    return outcomes, view_seconds
+
+def validate_processed_data(df, anomalies_dir=None):
+    """
+    Performs post-processing validation checks on the processed DataFrame,
+    prints a consolidated report to the console, and exports the detailed
+    anomalies to CSV and parquet files.
+
+    :param anomalies_dir: Directory of the anomalies report, defaults to export_dir.
+    """
+    print("\n" + "="*50)
+    print("             DATA VALIDATION REPORT             ")
+    print("="*50)
+
+    outcomes, view_seconds = run_validation_rules(df)
+
+    has_issues = False
+    # one anomaly frame per check, concatenated once for the export
+    anomalies = []
+    for rule, lines, rule_anomalies, _ in outcomes:
+        for line in lines:
+            print(line)
+        has_issues = has_issues or bool(lines)
+        anomalies.extend(rule_anomalies)
+
+    if not has_issues:
+        print("✅ All check items passed! No data quality issues found.")
+    else:
+        # Export anomalies to CSV and parquet
+        try:
+            target_dir = anomalies_dir or export_dir
+            os.makedirs(target_dir, exist_ok=True)
+
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            anomalies_filename = f"validation_anomalies_{timestamp}.csv"
+            anomalies_filepath = os.path.join(target_dir, anomalies_filename)
+
+            anomalies_df = pd.concat(anomalies, ignore_index=True)
+            anomalies_df.to_csv(anomalies_filepath, index=False)
+            print(f"ℹ️  Full anomalies report saved to: {os.path.abspath(anomalies_filepath)}")
+        except Exception as e:
+            print(f"❌ Failed to export validation anomalies to CSV: {e}")
+        else:
+            parquet_filepath = anomalies_filepath[:-len('.csv')] + '.parquet'
+            try:
+                anomalies_df.to_parquet(parquet_filepath, index=False, engine='pyarrow')
+                print(f"ℹ️  Anomalies parquet saved to: {os.path.abspath(parquet_filepath)}")
+            except Exception as e:
+                print(f"❌ Failed to export validation anomalies to parquet: {e}")
+
+    print(f"Check timings (column views {view_seconds:.3f}s):")
+    for rule, _, _, seconds in outcomes:
+        print(f"   {rule['name']}: {seconds:.3f}s")
+
+    print("="*50)
+    print("Reminder: Don't forget to pull the Approved PO from 01/01/2025 onwards, not the whole data.")
+    print("="*50 + "\n")